@@ -1,18 +1,23 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
-import pandas as pd
+from functools import partial
 from pathlib import Path
+from typing import Literal, Optional
 
 from .settings import settings
-from .schemas import ChatRequest, ChatResponse, CourseInsightsResponse
-from .services.data_repo import CourseDataRepo
-from .services.analytics import struggling_students, hardest_assignments
-from .services.predictive import GradePredictor, load_predictor, save_predictor
-from .services.rag import MiniRetriever
-from .services.chat_orchestrator import answer
+from .schemas import ChatRequest, ChatResponse, CourseInsightsResponse, StudentUpdate
+from .services.analytics import student_snapshot
+from .services.executor import CpuExecutor, Overloaded
+from .services.interventions import MEDIA_TYPES, stream_report
+from .services.response_cache import RedisBackend, ResponseCache, chat_key
+from .services.sessions import SessionStore, resolve_followup
+from .services.snapshot import SnapshotManager, build_snapshot
+from .services.tasks import chat_task, insights_task, interventions_task
+from .services.training import start_background_training
 
 
 app = FastAPI(title="Teacher Performance AI Assistant", version="0.1.0")
@@ -26,43 +31,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load data at startup (simple baseline)
-repo = CourseDataRepo(data_path=Path(settings.data_path))
-df_students: pd.DataFrame | None = None
-df_assignments: pd.DataFrame | None = None
+# Picklable so process-pool workers can build their own copy
+build = partial(
+    build_snapshot,
+    data_path=Path(settings.data_path),
+    artifacts_dir=Path(settings.artifacts_dir),
+    inference_engine=settings.inference_engine,
+    retrieval_index_dir=Path(settings.retrieval_index_dir),
+    retrieval_mode=settings.retrieval_mode,
+    intent_rules_path=Path(settings.intent_rules_path) if settings.intent_rules_path else None,
+)
 
-predictor: GradePredictor | None = None
-retriever: MiniRetriever | None = None
+watch_paths = [Path(settings.data_path), Path(settings.artifacts_dir)]
+if settings.intent_rules_path:
+    watch_paths.append(Path(settings.intent_rules_path))
 
+# Current data/model snapshot; swapped atomically on reload
+snapshots = SnapshotManager(
+    build=build,
+    watch_paths=watch_paths,
+    poll_seconds=settings.reload_poll_seconds,
+)
 
-@app.on_event("startup")
-def startup():
-    global df_students, df_assignments, predictor, retriever
+# Repeat questions skip recomputation; dropped whenever a new snapshot is swapped in
+responses = ResponseCache(
+    max_bytes=int(settings.response_cache_mb * 1024 * 1024),
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    shared=RedisBackend(settings.redis_url) if settings.redis_url else None,
+)
+snapshots.on_swap(lambda snap: responses.clear())
 
-    df = repo.load()
+# Per-conversation context, so follow-ups can say "them" and clients send only a token
+sessions = SessionStore(
+    max_bytes=int(settings.session_store_mb * 1024 * 1024),
+    ttl_seconds=settings.session_ttl_seconds,
+    max_results=settings.session_max_results,
+)
+snapshots.on_swap(lambda snap: sessions.clear_results())
+
+# Dedicated, bounded pool for CPU-heavy request work
+cpu = CpuExecutor(
+    kind=settings.executor_kind,
+    workers=settings.executor_workers,
+    max_pending=settings.executor_max_pending,
+    retry_after=settings.executor_retry_after_seconds,
+    build=build,
+)
 
-    # students table (one row per student per course)
-    df_students = df[df["record_type"] == "student"].copy()
 
-    # assignments aggregated table (one row per assignment per course)
-    df_assignments = df[df["record_type"] == "assignment"].copy()
+# Background training process, started when only the baseline model is available
+trainer = None
 
-    # Train/load predictor
-    artifacts = Path(settings.artifacts_dir)
-    model_path = artifacts / "grade_predictor.pkl"
-    if model_path.exists():
-        predictor = load_predictor(artifacts)
-    else:
-        predictor = GradePredictor.train(df_students)
-        save_predictor(predictor, artifacts)
 
-    # Simple “course notes” corpus for retrieval
-    docs = [
-        ("course_policy", "Late work is accepted up to 3 days with a 10% penalty per day."),
-        ("grading_weights", "Grades are computed from: Homework 30%, Quizzes 20%, Exams 40%, Participation 10%."),
-        ("interventions", "High-impact interventions: missing work recovery plan, attendance plan, reteach weak standards."),
-    ]
-    retriever = MiniRetriever(docs=docs)
+@app.on_event("startup")
+def startup():
+    global trainer
+    snapshots.reload()
+    snapshots.start_watching()
+    if settings.train_in_background and snapshots.current.predictor.baseline:
+        trainer = start_background_training(data_path=Path(settings.data_path), artifacts_dir=Path(settings.artifacts_dir))
+
+
+@app.on_event("shutdown")
+def shutdown():
+    snapshots.stop_watching()
+    cpu.shutdown()
+    if trainer is not None and trainer.poll() is None:
+        trainer.terminate()
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 @app.get("/health")
@@ -71,42 +115,105 @@ def health():
 
 
 @app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    assert df_students is not None and df_assignments is not None
-    assert predictor is not None and retriever is not None
-
-    answer_text, cited, followups = answer(
-        df_students=df_students,
-        df_assignments=df_assignments,
-        course_id=req.course_id,
-        message=req.message,
-        predictor=predictor,
-        retriever=retriever,
-    )
-    return ChatResponse(answer=answer_text, cited_data=cited, suggested_followups=followups)
+async def chat(req: ChatRequest):
+    snap = snapshots.current
+    history = [m.content for m in req.history if m.role == "user"][-settings.max_context_turns:]
+    session = sessions.open(req.teacher_id, req.session_id, req.course_id, history=history, router=snap.router)
+    # Resolve "them"/"it" against the session first, so the cache key names the student
+    parsed = resolve_followup(snap.router.parse(req.message), req.message, session)
+    key = responses.key(snap.data_tag, req.course_id, chat_key(parsed, req.message))
+    result = sessions.result(session, key)
+    if result is None:
+        result = await responses.get(key)
+    if result is None:
+        result = await cpu.run(chat_task, snap, req.course_id, req.message, parsed)
+        await responses.put(key, result)
+    sessions.record(session, parsed, key, result)
+    answer_text, cited, followups = result
+    return ChatResponse(answer=answer_text, cited_data=cited, suggested_followups=followups,
+                        session_id=session.session_id)
 
 
 @app.get("/courses/{course_id}/insights", response_model=CourseInsightsResponse)
-def course_insights(course_id: str):
-    assert df_students is not None and df_assignments is not None
-
-    struggling = struggling_students(df_students, course_id, threshold=70.0).head(10)
-    hard = hardest_assignments(df_assignments, course_id, top_n=5)
-
-    struggling_list = []
-    for r in struggling.itertuples():
-        struggling_list.append(
-            {
-                "student_id": r.student_id,
-                "current_grade": float(r.current_grade),
-                "attendance_rate": float(r.attendance_rate),
-                "missing_assignments": int(r.missing_assignments),
-                "risk_of_failing": float(max(0.0, min(1.0, (70 - r.current_grade) / 20))),
-            }
+async def course_insights(course_id: str):
+    snap = snapshots.current
+    key = responses.key(snap.data_tag, course_id, "insights")
+    result = await responses.get(key)
+    if result is None:
+        result = await cpu.run(insights_task, snap, course_id)
+        await responses.put(key, result)
+    return result
+
+
+@app.get("/courses/{course_id}/interventions")
+async def course_interventions(
+    course_id: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    sort: Literal["risk", "grade"] = "risk",
+    min_risk: float = Query(0.0, ge=0.0, le=1.0),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """
+    Predicted grade, fail risk, drivers and prioritized recommendations for every
+    student in the course, streamed as NDJSON (one student per line) or CSV.
+    Scoring runs on the CPU pool; rows are rendered and sent in chunks.
+    """
+    snap = snapshots.current
+    if course_id not in snap.students.partitions:
+        raise HTTPException(status_code=404, detail=f"Course {course_id} not found.")
+    page = await cpu.run(interventions_task, snap, course_id, sort, min_risk, offset, limit)
+
+    headers = {"X-Total-Count": str(page.total)}
+    if page.next_offset is not None:
+        headers["X-Next-Offset"] = str(page.next_offset)
+    return StreamingResponse(stream_report(snap.students, page, format), media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@app.patch("/courses/{course_id}/students/{student_id}")
+def update_student(course_id: str, student_id: str, update: StudentUpdate):
+    snap = snapshots.current
+    if cpu.kind == "process":
+        # Workers answer from their own copy of the data and would keep serving (and
+        # caching, under the bumped revision) the pre-update values
+        raise HTTPException(
+            status_code=409,
+            detail="Student updates need EXECUTOR_KIND=thread; with process workers, "
+                   "update the data files and let the snapshot reload pick them up.",
         )
 
+    changes = update.model_dump(exclude_none=True)
+    try:
+        snap.students.update(course_id, student_id, changes)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    snap.predictor.cache.invalidate(course_id, student_id)
+    responses.invalidate_course(course_id)
+    return student_snapshot(snap.students, course_id, student_id)
+
+
+@app.get("/admin/stats")
+def admin_stats():
+    snap = snapshots.current
     return {
-        "course_id": course_id,
-        "struggling_students": struggling_list,
-        "hardest_assignments": hard,
+        "snapshot_version": snap.version,
+        "model_version": snap.predictor.version,
+        "baseline_model": snap.predictor.baseline,
+        "training": trainer is not None and trainer.poll() is None,
+        "prediction_cache": snap.predictor.cache.stats(),
+        "response_cache": responses.stats(),
+        "sessions": sessions.stats(),
+        "executor": cpu.stats(),
     }
+
+
+@app.get("/admin/snapshot")
+def admin_snapshot():
+    return snapshots.stats()
+
+
+@app.post("/admin/reload", status_code=202)
+def admin_reload():
+    """Rebuild data + model in the background; requests keep using the current snapshot."""
+    started = snapshots.reload_in_background()
+    return {"started": started, **snapshots.stats()}
@@ -11,13 +11,18 @@ class ChatRequest(BaseModel):
     teacher_id: str = Field(..., description="Teacher identifier (synthetic in this project).")
     course_id: str = Field(..., description="Course identifier.")
     message: str = Field(..., description="User message to the assistant.")
-    history: List[ChatMessage] = Field(default_factory=list)
+    session_id: Optional[str] = Field(None, description="Token from an earlier response; omit to start a session.")
+    history: List[ChatMessage] = Field(
+        default_factory=list,
+        description="Earlier turns; only read when the server doesn't know the session (new or expired).",
+    )
 
 
 class ChatResponse(BaseModel):
     answer: str
     cited_data: Dict[str, str] = Field(default_factory=dict)
     suggested_followups: List[str] = Field(default_factory=list)
+    session_id: Optional[str] = None
 
 
 class StudentSummary(BaseModel):
@@ -25,9 +30,21 @@ class StudentSummary(BaseModel):
     current_grade: float
     attendance_rate: float
     missing_assignments: int
+    predicted_final_grade: Optional[float] = None
     risk_of_failing: float
 
 
+class StudentUpdate(BaseModel):
+    current_grade: Optional[float] = None
+    attendance_rate: Optional[float] = None
+    missing_assignments: Optional[int] = None
+    late_submissions: Optional[int] = None
+    avg_quiz_score: Optional[float] = None
+    avg_hw_score: Optional[float] = None
+    avg_exam_score: Optional[float] = None
+    logins_last_7d: Optional[int] = None
+
+
 class CourseInsightsResponse(BaseModel):
     course_id: str
     struggling_students: List[StudentSummary]
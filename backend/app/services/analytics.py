@@ -7,7 +7,10 @@ Descriptive analytics:
 """
 
 from __future__ import annotations
-import pandas as pd
+import numpy as np
+
+from .rules import Rule, RuleHits, RuleTable
+from .store import AssignmentStore, StudentStore, SubmissionStore
 
 
 FEATURE_COLS = [
@@ -21,11 +24,8 @@ FEATURE_COLS = [
 ]
 
 
-def student_snapshot(df: pd.DataFrame, course_id: str, student_id: str) -> dict:
-    row = df[(df["course_id"] == course_id) & (df["student_id"] == student_id)]
-    if row.empty:
-        raise ValueError(f"Student {student_id} not found in course {course_id}.")
-    r = row.iloc[0].to_dict()
+def student_snapshot(store: StudentStore, course_id: str, student_id: str) -> dict:
+    r = store.record(store.locate(course_id, student_id))
 
     return {
         "student_id": student_id,
@@ -41,40 +41,79 @@ def student_snapshot(df: pd.DataFrame, course_id: str, student_id: str) -> dict:
     }
 
 
-def grade_drivers(df: pd.DataFrame, course_id: str, student_id: str) -> dict:
-    """
-    Provide a simple, interpretable breakdown for what's likely pulling a grade down.
-    This is rule-based on purpose: easy to explain and portfolio-friendly.
-    """
-    s = student_snapshot(df, course_id, student_id)
-
-    issues = []
-    if s["attendance_rate"] < 0.9:
-        issues.append({"factor": "attendance", "severity": "high", "detail": f"Attendance is {s['attendance_rate']:.0%}."})
-    if s["missing_assignments"] >= 3:
-        issues.append({"factor": "missing_assignments", "severity": "high", "detail": f"Missing {s['missing_assignments']} assignments."})
-    if s["late_submissions"] >= 3:
-        issues.append({"factor": "late_work", "severity": "medium", "detail": f"{s['late_submissions']} late submissions."})
-    if s["avg_exam_score"] < 70:
-        issues.append({"factor": "exam_performance", "severity": "high", "detail": f"Average exam score {s['avg_exam_score']:.1f}."})
-    if s["avg_hw_score"] < 75:
-        issues.append({"factor": "homework_performance", "severity": "medium", "detail": f"Average HW score {s['avg_hw_score']:.1f}."})
-    if s["avg_quiz_score"] < 75:
-        issues.append({"factor": "quiz_performance", "severity": "medium", "detail": f"Average quiz score {s['avg_quiz_score']:.1f}."})
-    if s["recent_activity"] < 2:
-        issues.append({"factor": "low_platform_engagement", "severity": "medium", "detail": f"Only {s['recent_activity']} logins in last 7 days."})
-
-    issues = sorted(issues, key=lambda x: {"high": 0, "medium": 1, "low": 2}[x["severity"]])
-    return {"student_id": student_id, "course_id": course_id, "drivers": issues}
-
-
-def struggling_students(df: pd.DataFrame, course_id: str, threshold: float = 70.0) -> pd.DataFrame:
-    sub = df[df["course_id"] == course_id].copy()
-    return sub[sub["current_grade"] < threshold].sort_values("current_grade")
-
-
-def hardest_assignments(df_assignments: pd.DataFrame, course_id: str, top_n: int = 5) -> list[dict]:
-    sub = df_assignments[df_assignments["course_id"] == course_id].copy()
-    sub["avg_score"] = sub["avg_score"].astype(float)
-    hard = sub.sort_values("avg_score").head(top_n)
-    return hard[["assignment_id", "assignment_name", "avg_score", "submission_rate"]].to_dict(orient="records")
+# What's likely pulling a grade down. Rule-based on purpose: easy to explain and portfolio-friendly.
+DRIVER_RULES = RuleTable(
+    [
+        Rule.of("attendance", "high", "Attendance is {attendance_rate:.0%}.", ("attendance_rate", "<", 0.9)),
+        Rule.of("missing_assignments", "high", "Missing {missing_assignments:.0f} assignments.",
+                ("missing_assignments", ">=", 3)),
+        Rule.of("late_work", "medium", "{late_submissions:.0f} late submissions.", ("late_submissions", ">=", 3)),
+        Rule.of("exam_performance", "high", "Average exam score {avg_exam_score:.1f}.", ("avg_exam_score", "<", 70)),
+        Rule.of("homework_performance", "medium", "Average HW score {avg_hw_score:.1f}.", ("avg_hw_score", "<", 75)),
+        Rule.of("quiz_performance", "medium", "Average quiz score {avg_quiz_score:.1f}.", ("avg_quiz_score", "<", 75)),
+        Rule.of("low_platform_engagement", "medium", "Only {logins_last_7d:.0f} logins in last 7 days.",
+                ("logins_last_7d", "<", 2)),
+    ],
+    keys={"factor": "name", "severity": "level", "detail": "message"},
+)
+
+
+def grade_drivers(store: StudentStore, course_id: str, student_id: str) -> dict:
+    """Driver list for one student (DRIVER_RULES evaluated on a single row)."""
+    row = store.locate(course_id, student_id)
+    hits = evaluate_drivers(store, np.array([row]))
+    return {"student_id": student_id, "course_id": course_id, "drivers": hits.for_row(0)}
+
+
+def evaluate_drivers(store: StudentStore, rows: np.ndarray) -> RuleHits:
+    """DRIVER_RULES over many rows at once (e.g. a whole course)."""
+    return DRIVER_RULES.evaluate({f: store.column(f)[rows] for f in DRIVER_RULES.features})
+
+
+def struggling_students(store: StudentStore, course_id: str, threshold: float = 70.0) -> np.ndarray:
+    """Store rows of students below `threshold`, lowest grade first (no copy, no sort)."""
+    return store.below(course_id, threshold)
+
+
+def hardest_assignments(assignments: AssignmentStore, course_id: str, top_n: int = 5) -> list[dict]:
+    return assignments.hardest(course_id, top_n)
+
+
+def assignment_strugglers(
+    submissions: SubmissionStore,
+    students: StudentStore,
+    course_id: str,
+    assignment_id: str,
+    threshold: float | None = None,
+    top_n: int = 10,
+    max_missing: int = 100,
+) -> dict:
+    """Who didn't hand one assignment in (first `max_missing`), and the lowest scores (below `threshold`)."""
+    missing = submissions.missing(course_id, assignment_id)
+    missing = missing[submissions.student_row[missing] >= 0]
+    n_missing = len(missing)
+    missing = missing[:max_missing]
+    rows = submissions.weakest(course_id, assignment_id, threshold)
+    rows = rows[submissions.student_row[rows] >= 0][:top_n]
+    return {
+        "not_submitted_count": n_missing,
+        "not_submitted": students.student_ids(submissions.student_row[missing]).tolist(),
+        "lowest": [
+            {"student_id": str(sid), "score": float(score), "late": bool(late)}
+            for sid, score, late in zip(students.student_ids(submissions.student_row[rows]),
+                                        submissions.score[rows], submissions.late[rows])
+        ],
+    }
+
+
+def score_trend(submissions: SubmissionStore, students: StudentStore, course_id: str, student_id: str) -> float | None:
+    """Least-squares change in assignment score per assignment (due order); None under two scores."""
+    row = students.find(course_id, student_id)
+    if row is None or row >= len(submissions.trend) or np.isnan(submissions.trend[row]):
+        return None
+    return float(submissions.trend[row])
+
+
+def grade_drivers_many(store: StudentStore, rows: np.ndarray) -> np.ndarray:
+    """";"-separated driver factors per row, high severity first (same order as grade_drivers)."""
+    return evaluate_drivers(store, rows).names()
@@ -9,58 +9,158 @@ Later upgrades:
 """
 
 from __future__ import annotations
-import re
+import numpy as np
 import pandas as pd
 from typing import Dict, Tuple
 
-from .analytics import student_snapshot, grade_drivers, struggling_students
+from .cohort import CohortQuery, cohort_table, compact_csv, select
+from .analytics import (
+    assignment_strugglers,
+    grade_drivers,
+    hardest_assignments,
+    score_trend,
+    struggling_students,
+    student_snapshot,
+)
 from .prescriptive import recommendations
+from .dense import DenseRetriever, HybridRetriever
+from .intent_router import DEFAULT_ROUTER, IntentRouter, ParsedMessage
 from .predictive import GradePredictor
-from .rag import MiniRetriever
+from .rag import Bm25Retriever, MiniRetriever
+from .store import AssignmentStore, StudentStore, SubmissionStore
 
 
-def normalize(text: str) -> str:
-    return re.sub(r"\s+", " ", text.strip().lower())
+# Assignment drill-down. Intent rules are keyword-only (and pinned to the legacy router),
+# so a question that names an assignment and asks who struggled is promoted here: from
+# these intents (or the fallback), when one of these keywords occurs.
+DRILLDOWN_INTENTS = ("struggling_students", "hard_assignments")
+DRILLDOWN_KEYWORDS = ("which students", "struggling", "failing", "struggled", "hard")
+
+# Intents about one student; without a student_id they ask for one
+STUDENT_INTENTS = ("student_status", "grade_drivers", "predict_outcome", "prescribe")
 
 
 def route_intent(message: str) -> str:
-    m = normalize(message)
-    if "how is" in m and "doing" in m:
-        return "student_status"
-    if "pulling" in m and "grade" in m:
-        return "grade_drivers"
-    if "which students" in m and ("struggling" in m or "failing" in m):
-        return "struggling_students"
-    if "key assignments" in m and ("struggled" in m or "hard" in m):
-        return "hard_assignments"
-    if "by the end" in m or "will" in m and ("pass" in m or "fail" in m or "final" in m):
-        return "predict_outcome"
-    if "recommendation" in m or ("given" in m and "failing" in m):
-        return "prescribe"
-    return "fallback"
+    return DEFAULT_ROUTER.route(message)
 
 
 def extract_student_id(message: str) -> str | None:
     # Accept formats like S100123 or "student S100123"
-    m = re.search(r"(S\d{6,})", message)
-    return m.group(1) if m else None
+    return DEFAULT_ROUTER.parse(message).student_id
+
+
+def cohort_answer(
+    students: StudentStore,
+    course_id: str,
+    cohort: CohortQuery,
+    predictor: GradePredictor,
+) -> Tuple[str, Dict[str, str], list[str]]:
+    rows, not_found = select(students, course_id, cohort)
+    note = f"\nNot found in {course_id}: {', '.join(not_found)}." if not_found else ""
+    selector = cohort.describe()
+    if cohort.student_ids:
+        selector = f"of {len(cohort.student_ids)} listed" + (f", {selector}" if selector else "")
+    if not len(rows):
+        return (f"No students in {course_id} match ({selector}).{note}", {}, ["Which students are struggling?"])
+
+    table = cohort_table(students, predictor, rows)
+    cited = {"cohort": compact_csv(table)}
+    at_risk = int((table["predicted_final_grade"] < 60).sum())
+    lines = "\n".join(
+        f"- {r.student_id}: {r.current_grade:.1f}% now, projected {r.predicted_final_grade:.1f}% "
+        f"(risk {r.risk_of_failing:.0%}); {r.top_action}"
+        for r in table.head(5).itertuples()
+    )
+    more = f"\n…and {len(table) - 5} more (see table)." if len(table) > 5 else ""
+    first = table["student_id"].iloc[0]
+    return (
+        f"{len(table)} students ({selector}): average grade {table['current_grade'].mean():.1f}%, "
+        f"{at_risk} projected to fail.\n{lines}{more}{note}",
+        cited,
+        [f"What is pulling {first}'s grade down?", f"Give recommendations to help {first} pass."],
+    )
+
+
+def is_drilldown(parsed: ParsedMessage, router: IntentRouter) -> bool:
+    if not parsed.assignment_ids or parsed.intent not in (*DRILLDOWN_INTENTS, router.fallback):
+        return False
+    bits = [router.keywords.index(k) for k in DRILLDOWN_KEYWORDS if k in router.keywords]
+    return any(parsed.keyword_mask >> b & 1 for b in bits)
+
+
+def assignment_answer(
+    students: StudentStore,
+    assignments: AssignmentStore,
+    submissions: SubmissionStore | None,
+    course_id: str,
+    assignment_id: str,
+    threshold: float | None,
+) -> Tuple[str, Dict[str, str], list[str]]:
+    known = {a["assignment_id"]: a for a in assignments.by_course.get(course_id, [])}
+    a = known.get(assignment_id)
+    if a is None and (submissions is None or not submissions.has_assignment(course_id, assignment_id)):
+        return (f"I can't find assignment {assignment_id} in course {course_id}.", {}, [])
+    if submissions is None or not submissions.has_assignment(course_id, assignment_id):
+        return (
+            f"Per-student results for {assignment_id} aren't loaded, only the course average "
+            f"({a['avg_score']:.1f}, {a['submission_rate']:.0%} submitted).",
+            {},
+            ["What are key assignments students struggled with?"],
+        )
+
+    found = assignment_strugglers(submissions, students, course_id, assignment_id, threshold=threshold)
+    missing, n_missing, lowest = found["not_submitted"], found["not_submitted_count"], found["lowest"]
+    label = f"{a['assignment_name']} ({assignment_id})" if a is not None else assignment_id
+    summary = f", class avg {a['avg_score']:.1f}, {a['submission_rate']:.0%} submitted" if a is not None else ""
+    scope = f" below {threshold:g}" if threshold is not None else ""
+    if not missing and not lowest:
+        return (f"Everyone submitted {label}{summary}, and no one scored{scope}.", {}, ["Which students are struggling?"])
+
+    cited = {"assignment_lowest_scores": pd.DataFrame(lowest, columns=["student_id", "score", "late"]).to_csv(index=False),
+             "assignment_not_submitted": ", ".join(missing)}
+    shown = ", ".join(missing[:10]) + (f" and {n_missing - 10} more" if n_missing > 10 else "")
+    lines = [f"- Not submitted ({n_missing}): {shown}"] if missing else []
+    lines += [f"- {r['student_id']}: {r['score']:.1f}" + (" (late)" if r["late"] else "") for r in lowest]
+    first = lowest[0]["student_id"] if lowest else missing[0]
+    return (
+        f"Students who struggled most{scope} on {label}{summary}:\n" + "\n".join(lines),
+        cited,
+        [f"What is pulling {first}'s grade down?", f"Give recommendations to help {first} pass."],
+    )
 
 
 def answer(
-    df_students: pd.DataFrame,
-    df_assignments: pd.DataFrame,
+    students: StudentStore,
+    assignments: AssignmentStore,
     course_id: str,
     message: str,
     predictor: GradePredictor,
-    retriever: MiniRetriever,
+    retriever: MiniRetriever | Bm25Retriever | DenseRetriever | HybridRetriever,
+    router: IntentRouter = DEFAULT_ROUTER,
+    submissions: SubmissionStore | None = None,
+    parsed: ParsedMessage | None = None,
 ) -> Tuple[str, Dict[str, str], list[str]]:
-    intent = route_intent(message)
+    # Intent and entities in one pass over the message (unless already parsed and
+    # resolved against the session, see sessions.resolve_followup)
+    if parsed is None:
+        parsed = router.parse(message)
+    intent = parsed.intent
     cited: Dict[str, str] = {}
     followups: list[str] = []
 
-    sid = extract_student_id(message)
+    sid = parsed.student_id
+
+    if is_drilldown(parsed, router):
+        return assignment_answer(students, assignments, submissions, course_id, parsed.assignment_ids[0],
+                                 parsed.threshold)
+
+    # Several students or a cohort selector: answer for the whole set at once
+    cohort = CohortQuery.from_parsed(parsed, message)
+    if (cohort is not None and intent != "hard_assignments"
+            and not (intent == "struggling_students" and cohort.grade_ceiling_only)):
+        return cohort_answer(students, course_id, cohort, predictor)
 
-    if intent in ("student_status", "grade_drivers", "predict_outcome", "prescribe") and not sid:
+    if intent in STUDENT_INTENTS and not sid:
         return (
             "I can help—what is the student_id? (Example: S100123)",
             {},
@@ -68,22 +168,27 @@ def answer(
         )
 
     if intent == "student_status":
-        snap = student_snapshot(df_students, course_id, sid)
+        snap = student_snapshot(students, course_id, sid)
         cited["student_snapshot"] = str(snap)
         followups = [
             f"What is pulling {sid}'s grade down?",
             f"How will {sid} do by the end of the course?",
         ]
+        trend = score_trend(submissions, students, course_id, sid) if submissions is not None else None
+        trend_note = ""
+        if trend is not None:
+            cited["score_trend_per_assignment"] = f"{trend:.2f}"
+            trend_note = f" Assignment scores are trending {'up' if trend >= 0 else 'down'} ({trend:+.1f} per assignment)."
         return (
             f"Student {sid} currently has a {snap['current_grade']:.1f}% with "
             f"{snap['attendance_rate']:.0%} attendance and {snap['missing_assignments']} missing assignments. "
-            f"Recent activity: {snap['recent_activity']} logins in the last 7 days.",
+            f"Recent activity: {snap['recent_activity']} logins in the last 7 days.{trend_note}",
             cited,
             followups,
         )
 
     if intent == "grade_drivers":
-        drivers = grade_drivers(df_students, course_id, sid)
+        drivers = grade_drivers(students, course_id, sid)
         cited["grade_drivers"] = str(drivers)
         bullets = "\n".join([f"- **{d['factor']}** ({d['severity']}): {d['detail']}" for d in drivers["drivers"]]) or "- No major drivers detected."
         followups = [
@@ -97,31 +202,35 @@ def answer(
         )
 
     if intent == "struggling_students":
-        struggling = struggling_students(df_students, course_id, threshold=70.0).head(10)
-        cited["struggling_students_top10"] = struggling[["student_id", "current_grade"]].to_csv(index=False)
+        threshold = parsed.threshold if parsed.threshold is not None else 70.0
+        rows = struggling_students(students, course_id, threshold=threshold)[:10]
+        struggling = pd.DataFrame({
+            "student_id": students.student_ids(rows),
+            "current_grade": students.column("current_grade")[rows],
+        })
+        cited["struggling_students_top10"] = struggling.to_csv(index=False)
         followups = ["What are key assignments students struggled with?", "Pick a student_id and ask why they're struggling."]
         if struggling.empty:
-            return ("No students are currently below 70% in this course.", cited, followups)
+            return (f"No students are currently below {threshold:g}% in this course.", cited, followups)
         ids = ", ".join(struggling["student_id"].tolist())
-        return (f"Students currently struggling (below 70%): {ids}", cited, followups)
+        return (f"Students currently struggling (below {threshold:g}%): {ids}", cited, followups)
 
     if intent == "hard_assignments":
-        # Use assignment table directly for now
-        sub = df_assignments[df_assignments["course_id"] == course_id].copy()
-        hard = sub.sort_values("avg_score").head(5)
-        cited["hardest_assignments"] = hard.to_csv(index=False)
-        followups = ["Which students struggled the most on assignment A3?", "What skills are required for the hardest assignments?"]
-        names = "\n".join([f"- {r.assignment_name} (avg {r.avg_score:.1f}, submit {r.submission_rate:.0%})" for r in hard.itertuples()])
+        hard = hardest_assignments(assignments, course_id, top_n=5)
+        cited["hardest_assignments"] = pd.DataFrame(hard).to_csv(index=False)
+        hardest = hard[0]["assignment_id"] if hard else "A3"
+        followups = [f"Which students struggled the most on assignment {hardest}?", "What skills are required for the hardest assignments?"]
+        names = "\n".join([f"- {r['assignment_name']} (avg {r['avg_score']:.1f}, submit {r['submission_rate']:.0%})" for r in hard])
         return (f"Hardest assignments in the course:\n{names}", cited, followups)
 
     if intent == "predict_outcome":
-        row = df_students[(df_students["course_id"] == course_id) & (df_students["student_id"] == sid)]
-        if row.empty:
+        row = students.find(course_id, sid)
+        if row is None:
             return (f"I can't find {sid} in course {course_id}.", {}, [])
-        r = row.iloc[0]
-        pred = predictor.predict_final_grade(r)
-        p_fail = predictor.prob_fail(pred, pass_cutoff=60.0)
-        cited["prediction_inputs"] = r.to_dict().__repr__()
+        r = students.record(row)
+        pred = float(predictor.cached_predict(students, [row])[0])
+        p_fail = float(predictor.risk_rows(students, [row], np.array([pred]), pass_cutoff=60.0)[0])
+        cited["prediction_inputs"] = r.__repr__()
         followups = [f"What can we do to help {sid} improve?", f"What is pulling {sid}'s grade down?"]
         status = "pass" if pred >= 60 else "fail"
         return (
@@ -132,10 +241,10 @@ def answer(
         )
 
     if intent == "prescribe":
-        row = df_students[(df_students["course_id"] == course_id) & (df_students["student_id"] == sid)]
-        if row.empty:
+        row = students.find(course_id, sid)
+        if row is None:
             return (f"I can't find {sid} in course {course_id}.", {}, [])
-        recs = recommendations(row.iloc[0])
+        recs = recommendations(students.record(row))
         cited["recommendations"] = str(recs)
         bullets = "\n".join([f"- **{r['priority'].upper()}**: {r['action']} — {r['details']}" for r in recs])
         followups = [f"Which assignment patterns explain {sid}'s struggles?", "Which students are struggling overall?"]
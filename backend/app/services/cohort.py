@@ -0,0 +1,193 @@
+"""
+Multi-student and cohort queries, answered with one vectorized pass over the store.
+
+- CohortQuery turns router entities (student lists, field conditions like
+  "attendance below 80%" / "3 or more missing", "bottom 30") into a selection.
+  Conditions alone only select students under a student intent or with cohort
+  wording ("students with ..."), so policy questions with numbers in them
+  ("more than 2 days late") still reach the course notes.
+- `select` resolves it to store rows with boolean masks over one course partition.
+- `cohort_table` computes snapshot columns, predicted final grade, fail risk,
+  grade drivers and the top recommendation for every selected row at once.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+import re
+import numpy as np
+import pandas as pd
+
+from .analytics import grade_drivers_many
+from .intent_router import ParsedMessage
+from .predictive import GradePredictor
+from .prescriptive import top_recommendations
+from .store import StudentStore
+
+
+# Router field words -> store columns (no field named -> current grade)
+FIELD_COLUMNS = {
+    None: "current_grade",
+    "grade": "current_grade",
+    "score": "current_grade",
+    "attendance": "attendance_rate",
+    "attend": "attendance_rate",
+    "absen": "attendance_rate",
+    "missing": "missing_assignments",
+    "late": "late_submissions",
+    "login": "logins_last_7d",
+    "activity": "logins_last_7d",
+    "exam": "avg_exam_score",
+    "quiz": "avg_quiz_score",
+    "homework": "avg_hw_score",
+    "hw": "avg_hw_score",
+}
+# Stored as 0-1 fractions; "80%" / "80" in a question means 0.8
+FRACTION_COLUMNS = {"attendance_rate"}
+
+COUNT_COLUMNS = {"missing_assignments", "late_submissions", "logins_last_7d"}
+SNAPSHOT_COLUMNS = [
+    "current_grade",
+    "attendance_rate",
+    "missing_assignments",
+    "late_submissions",
+    "logins_last_7d",
+]
+RECOMMENDATION_COLUMNS = [
+    "attendance_rate",
+    "missing_assignments",
+    "late_submissions",
+    "avg_exam_score",
+    "avg_hw_score",
+    "avg_quiz_score",
+    "logins_last_7d",
+]
+
+# Intents whose conditions ("below 60") filter students; any other intent, the
+# fallback included, needs cohort wording, a rank or 2+ student IDs
+FILTER_INTENTS = {"struggling_students", "student_status", "grade_drivers", "predict_outcome", "prescribe"}
+COHORT_WORDING = re.compile(r"\bwhich students\b|\bstudents?\s+(?:with|who|whose|that|where|having)\b", re.I)
+
+# Rows shown in cited_data; the answer text still summarizes the whole cohort
+MAX_TABLE_ROWS = 50
+
+
+@dataclass(frozen=True)
+class CohortCondition:
+    column: str
+    op: str  # "<", "<=", ">", ">=", "between"
+    value: float
+    upper: float | None = None
+
+    def mask(self, x: np.ndarray) -> np.ndarray:
+        # NaN compares False, so rows missing the field never match
+        if self.op == "<":
+            return x < self.value
+        if self.op == "<=":
+            return x <= self.value
+        if self.op == ">":
+            return x > self.value
+        if self.op == ">=":
+            return x >= self.value
+        return (x >= self.value) & (x <= self.upper)
+
+    def describe(self) -> str:
+        if self.op == "between":
+            return f"{self.column} between {self.value:g} and {self.upper:g}"
+        return f"{self.column} {self.op} {self.value:g}"
+
+
+@dataclass(frozen=True)
+class CohortQuery:
+    student_ids: list[str]
+    conditions: list[CohortCondition]
+    rank: tuple[str, int] | None = None  # ("bottom" | "top", n) by current grade
+
+    @staticmethod
+    def from_parsed(parsed: ParsedMessage, message: str = "") -> "CohortQuery | None":
+        """
+        A cohort when the message names 2+ students, a rank, or (without one student) a
+        condition under a FILTER_INTENTS intent or cohort wording in `message`.
+        """
+        many = len(parsed.student_ids) > 1
+        if not many and parsed.rank is None:
+            if parsed.student_ids or not parsed.conditions:
+                return None
+            if parsed.intent not in FILTER_INTENTS and not COHORT_WORDING.search(message):
+                return None
+        conditions = []
+        for c in parsed.conditions:
+            column = FIELD_COLUMNS.get(c.field, "current_grade")
+            value, upper = c.value, c.upper
+            if column in FRACTION_COLUMNS and max(value, upper or 0) > 1:
+                value, upper = value / 100, (upper / 100 if upper is not None else None)
+            conditions.append(CohortCondition(column=column, op=c.op, value=value, upper=upper))
+        return CohortQuery(student_ids=parsed.student_ids if many else [], conditions=conditions, rank=parsed.rank)
+
+    @property
+    def grade_ceiling_only(self) -> bool:
+        """Just "below N" on the grade: the plain struggling-students question."""
+        return (not self.student_ids and self.rank is None and len(self.conditions) == 1
+                and self.conditions[0].column == "current_grade" and self.conditions[0].op == "<")
+
+    def describe(self) -> str:
+        parts = [c.describe() for c in self.conditions]
+        if self.rank is not None:
+            parts.append(f"{self.rank[0]} {self.rank[1]} by grade")
+        return ", ".join(parts)
+
+
+def select(store: StudentStore, course_id: str, query: CohortQuery) -> tuple[np.ndarray, list[str]]:
+    """(rows, listed student_ids not found in the course). Rows come lowest grade first
+    unless students were listed, in which case their order is kept."""
+    missing: list[str] = []
+    if query.student_ids:
+        found = []
+        for sid in dict.fromkeys(query.student_ids):
+            row = store.find(course_id, sid)
+            if row is None:
+                missing.append(sid)
+            else:
+                found.append(row)
+        rows = np.asarray(found, dtype=np.intp)
+    else:
+        rows = store.course_rows(course_id)
+
+    if query.conditions and len(rows):
+        mask = np.ones(len(rows), dtype=bool)
+        for cond in query.conditions:
+            mask &= cond.mask(store.column(cond.column)[rows])
+        rows = rows[mask]
+
+    if query.rank is not None and len(rows):
+        which, n = query.rank
+        grade = store.column("current_grade")[rows]
+        order = np.argsort(grade, kind="stable")  # NaN last
+        if which == "top":
+            order = order[: np.count_nonzero(~np.isnan(grade))][::-1]
+        rows = rows[order[:n]]
+    return rows, missing
+
+
+def cohort_table(store: StudentStore, predictor: GradePredictor, rows: np.ndarray) -> pd.DataFrame:
+    """One row per student: snapshot, prediction, risk, drivers, top recommendation."""
+    pred = predictor.cached_predict(store, rows)
+    table = pd.DataFrame({"student_id": store.student_ids(rows)})
+    for c in SNAPSHOT_COLUMNS:
+        x = store.column(c)[rows]
+        table[c] = pd.Series(x).round().astype("Int64") if c in COUNT_COLUMNS else x
+    table["predicted_final_grade"] = pred
+    table["risk_of_failing"] = predictor.risk_rows(store, rows, pred, pass_cutoff=60.0)
+    table["drivers"] = grade_drivers_many(store, rows)
+    table["top_action"] = top_recommendations({c: store.column(c)[rows] for c in RECOMMENDATION_COLUMNS})
+    return table
+
+
+def compact_csv(table: pd.DataFrame, max_rows: int = MAX_TABLE_ROWS) -> str:
+    """Rounded CSV of the first `max_rows` rows, for cited_data."""
+    out = table.head(max_rows).round({
+        "current_grade": 1,
+        "attendance_rate": 2,
+        "predicted_final_grade": 1,
+        "risk_of_failing": 2,
+    })
+    return out.to_csv(index=False)
@@ -1,25 +1,362 @@
 """
 Data access layer.
 
-Today: reads a CSV (synthetic dataset).
+Today: reads a CSV (synthetic dataset), a directory of CSV shards, or a typed
+columnar directory.
 Tomorrow: swap this to a database without rewriting your analytics code.
+
+Columnar layout (see `convert_csv_to_columnar`):
+    <dir>/students/values.npy            float64 (n_rows, n_cols), Fortran order
+    <dir>/students/<col>.codes.npy       int32 dictionary codes for string columns
+    <dir>/students/<col>.dict.json       dictionary values
+    <dir>/students/meta.json             column names
+    <dir>/assignments/...                same layout
+    <dir>/submissions/...                same layout, optional: one row per student x assignment
+
+Submissions (record_type=submission in the CSV) carry score (blank if not
+submitted), submitted_at (ISO timestamp in the CSV, epoch seconds once loaded)
+and a late flag.
+
+`values.npy` and the code arrays are memory-mapped, so worker processes share
+the OS page cache instead of each holding a private copy. Bulk writers can
+`allocate` a table on disk and fill row ranges in parallel with `write_rows`.
+
+Large CSV exports are ingested in chunks (`read_csv_chunked`) with pinned dtypes
+and rows routed by record_type as they stream, so peak memory stays near
+chunk size + final compact tables.
 """
 
 from __future__ import annotations
 from dataclasses import dataclass
+from typing import Mapping, Sequence
+import json
+import tracemalloc
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
 
+STUDENT_NUMERIC_COLS = [
+    "current_grade",
+    "attendance_rate",
+    "missing_assignments",
+    "late_submissions",
+    "avg_quiz_score",
+    "avg_hw_score",
+    "avg_exam_score",
+    "logins_last_7d",
+    "final_grade",
+    "label",
+]
+STUDENT_STRING_COLS = ["course_id", "student_id"]
+
+ASSIGNMENT_NUMERIC_COLS = ["avg_score", "submission_rate"]
+ASSIGNMENT_STRING_COLS = ["course_id", "assignment_id", "assignment_name"]
+
+SUBMISSION_NUMERIC_COLS = ["score", "submitted_at", "late"]
+SUBMISSION_STRING_COLS = ["course_id", "student_id", "assignment_id"]
+
+# Pinned CSV dtypes: float64 for rates/scores (they feed threshold rules, the model
+# and cited data, so 0.9 must stay 0.9), small nullable ints for counts (assignment
+# rows leave the student columns blank). ID columns are read as strings per chunk
+# and dictionary-encoded into categoricals.
+CSV_DTYPES = {
+    "attendance_rate": "float64",
+    "avg_quiz_score": "float64",
+    "avg_hw_score": "float64",
+    "avg_exam_score": "float64",
+    "current_grade": "float64",
+    "final_grade": "float64",
+    "avg_score": "float64",
+    "submission_rate": "float64",
+    "missing_assignments": "Int16",
+    "late_submissions": "Int16",
+    "logins_last_7d": "Int16",
+    "label": "Int8",
+    "score": "float64",
+    "late": "Int8",
+    "submitted_at": str,
+}
+CSV_ID_COLS = ["record_type", "course_id", "student_id", "assignment_id", "assignment_name"]
+DEFAULT_CHUNKSIZE = 250_000
+
+
+@dataclass(frozen=True)
+class ColumnarTable:
+    """Numeric columns in one Fortran-ordered float64 matrix + dictionary-encoded strings."""
+
+    numeric_columns: tuple[str, ...]
+    values: np.ndarray                   # (n_rows, n_cols) float64, each column contiguous
+    codes: dict[str, np.ndarray]         # string column -> int32 codes
+    dictionaries: dict[str, np.ndarray]  # string column -> object array of distinct values
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame, numeric_cols: list[str], string_cols: list[str]) -> "ColumnarTable":
+        numeric = tuple(c for c in numeric_cols if c in df.columns)
+        values = np.empty((len(df), len(numeric)), dtype=np.float64, order="F")
+        for j, c in enumerate(numeric):
+            values[:, j] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+        codes, dictionaries = {}, {}
+        for c in string_cols:
+            if c not in df.columns:
+                continue
+            if isinstance(df[c].dtype, pd.CategoricalDtype):
+                # Already dictionary-encoded (chunked ingestion); reuse codes as-is
+                codes[c] = df[c].cat.codes.to_numpy(dtype=np.int32)
+                dictionaries[c] = np.asarray(df[c].cat.categories, dtype=object)
+                continue
+            col_codes, uniques = pd.factorize(df[c].astype(str))
+            codes[c] = col_codes.astype(np.int32)
+            dictionaries[c] = np.asarray(uniques, dtype=object)
+        return ColumnarTable(numeric_columns=numeric, values=values, codes=codes, dictionaries=dictionaries)
+
+    def strings(self, name: str) -> np.ndarray:
+        return self.dictionaries[name][self.codes[name]]
+
+    def to_frame(self) -> pd.DataFrame:
+        data = {c: self.strings(c) for c in self.codes}
+        for j, c in enumerate(self.numeric_columns):
+            data[c] = np.asarray(self.values[:, j])
+        return pd.DataFrame(data)
+
+    def save(self, out_dir: Path) -> None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        np.save(out_dir / "values.npy", np.asfortranarray(self.values, dtype=np.float64))
+        for c, col_codes in self.codes.items():
+            np.save(out_dir / f"{c}.codes.npy", col_codes.astype(np.int32))
+            (out_dir / f"{c}.dict.json").write_text(json.dumps(self.dictionaries[c].tolist()))
+        meta = {"numeric_columns": list(self.numeric_columns), "string_columns": list(self.codes), "n_rows": len(self)}
+        (out_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+
+    @staticmethod
+    def allocate(out_dir: Path, numeric_columns: Sequence[str], n_rows: int,
+                 dictionaries: Mapping[str, Sequence[str]]) -> None:
+        """Create a zero-filled table on disk, same layout as `save`, for `write_rows` to fill."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        np.lib.format.open_memmap(out_dir / "values.npy", mode="w+", dtype=np.float64,
+                                  shape=(n_rows, len(numeric_columns)), fortran_order=True).flush()
+        for c, uniques in dictionaries.items():
+            np.lib.format.open_memmap(out_dir / f"{c}.codes.npy", mode="w+", dtype=np.int32, shape=(n_rows,)).flush()
+            (out_dir / f"{c}.dict.json").write_text(json.dumps(list(uniques)))
+        meta = {"numeric_columns": list(numeric_columns), "string_columns": list(dictionaries), "n_rows": n_rows}
+        (out_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+
+    @staticmethod
+    def write_rows(out_dir: Path, start: int, columns: Mapping[str, np.ndarray]) -> None:
+        """Fill rows [start, start + n) of an allocated table in place; string columns take codes."""
+        meta = json.loads((out_dir / "meta.json").read_text())
+        values = np.load(out_dir / "values.npy", mmap_mode="r+")
+        for j, c in enumerate(meta["numeric_columns"]):
+            col = columns[c]
+            values[start:start + len(col), j] = col
+        for c in meta["string_columns"]:
+            codes = np.load(out_dir / f"{c}.codes.npy", mmap_mode="r+")
+            codes[start:start + len(columns[c])] = columns[c]
+            codes.flush()
+        values.flush()
+
+    @staticmethod
+    def load(in_dir: Path, mmap: bool = True) -> "ColumnarTable":
+        meta = json.loads((in_dir / "meta.json").read_text())
+        # Copy-on-write: pages are shared until a row is updated in place
+        mode = "c" if mmap else None
+        codes, dictionaries = {}, {}
+        for c in meta["string_columns"]:
+            codes[c] = np.load(in_dir / f"{c}.codes.npy", mmap_mode=mode)
+            dictionaries[c] = np.asarray(json.loads((in_dir / f"{c}.dict.json").read_text()), dtype=object)
+        return ColumnarTable(
+            numeric_columns=tuple(meta["numeric_columns"]),
+            values=np.load(in_dir / "values.npy", mmap_mode=mode),
+            codes=codes,
+            dictionaries=dictionaries,
+        )
+
+
+class _Dictionary:
+    """Global string -> int32 code mapping grown chunk by chunk."""
+
+    def __init__(self):
+        self.index: dict[str, int] = {}
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(values)
+        mapping = np.fromiter((self.index.setdefault(u, len(self.index)) for u in uniques),
+                              dtype=np.int32, count=len(uniques))
+        out = np.full(len(codes), -1, dtype=np.int32)
+        present = codes >= 0
+        out[present] = mapping[codes[present]]
+        return out
+
+    def categories(self) -> list[str]:
+        return list(self.index)
+
+
+@dataclass(frozen=True)
+class IngestResult:
+    students: pd.DataFrame
+    assignments: pd.DataFrame
+    rows_read: int
+    chunks: int
+    peak_bytes: int | None  # tracemalloc peak during ingestion, if tracked
+    submissions: pd.DataFrame | None = None  # None when the CSV has no submission records
+
+    def table_bytes(self) -> int:
+        frames = [self.students, self.assignments] + ([self.submissions] if self.submissions is not None else [])
+        return int(sum(f.memory_usage(deep=True).sum() for f in frames))
+
+
+def epoch_seconds(values: pd.Series) -> np.ndarray:
+    """ISO timestamps -> float64 seconds since the epoch (NaN for blanks)."""
+    ts = pd.to_datetime(values, utc=True, format="ISO8601")
+    return ((ts - pd.Timestamp(0, tz="UTC")).dt.total_seconds()).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def csv_shards(path: Path) -> list[Path]:
+    """The CSV files behind `path`: itself, or a directory's *.csv shards in name order."""
+    return sorted(path.glob("*.csv")) if path.is_dir() else [path]
+
+
+def read_csv_chunked(
+    path: Path | Sequence[Path],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    track_memory: bool = False,
+) -> IngestResult:
+    """
+    Stream the mixed CSV (or several shards of it, in order) in chunks with pinned
+    dtypes, routing rows by record_type into separate student/assignment tables as
+    it goes.
+    """
+    paths = [Path(path)] if isinstance(path, (str, Path)) else list(path)
+    routes = {
+        "student": STUDENT_NUMERIC_COLS + STUDENT_STRING_COLS,
+        "assignment": ASSIGNMENT_NUMERIC_COLS + ASSIGNMENT_STRING_COLS,
+        "submission": SUBMISSION_NUMERIC_COLS + SUBMISSION_STRING_COLS,
+    }
+    dicts = {c: _Dictionary() for c in CSV_ID_COLS}
+    parts: dict[str, dict[str, list]] = {t: {} for t in routes}
+    rows_read = chunks = 0
+
+    if track_memory:
+        tracemalloc.start()
+    try:
+        dtypes = {**CSV_DTYPES, **{c: str for c in CSV_ID_COLS}}
+        chunks_iter = (chunk for p in paths for chunk in pd.read_csv(p, chunksize=chunksize, dtype=dtypes))
+        for chunk in chunks_iter:
+            rows_read += len(chunk)
+            chunks += 1
+            for record_type, cols in routes.items():
+                sub = chunk[chunk["record_type"] == record_type]
+                if sub.empty:
+                    continue
+                for c in cols:
+                    if c not in sub.columns:
+                        continue
+                    if c in dicts:
+                        col = dicts[c].encode(sub[c])
+                    elif c == "submitted_at":
+                        col = epoch_seconds(sub[c])
+                    else:
+                        col = sub[c].array
+                    parts[record_type].setdefault(c, []).append(col)
+            del chunk
+
+        def build(record_type: str) -> pd.DataFrame:
+            data = {}
+            for c, pieces in parts[record_type].items():
+                if c in dicts:
+                    data[c] = pd.Categorical.from_codes(np.concatenate(pieces), categories=dicts[c].categories())
+                else:
+                    data[c] = pd.concat([pd.Series(p) for p in pieces], ignore_index=True)
+            return pd.DataFrame(data)
+
+        # Concatenating the chunk pieces is the largest allocation; trace through it
+        students = build("student")
+        assignments = build("assignment")
+        submissions = build("submission") if parts["submission"] else None
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+
+    return IngestResult(
+        students=students,
+        assignments=assignments,
+        rows_read=rows_read,
+        chunks=chunks,
+        peak_bytes=peak,
+        submissions=submissions,
+    )
+
+
+def split_tables(df: pd.DataFrame) -> tuple[ColumnarTable, ColumnarTable]:
+    """Split the mixed CSV frame by record_type into (students, assignments) tables."""
+    students = df[df["record_type"] == "student"]
+    assignments = df[df["record_type"] == "assignment"]
+    return (
+        ColumnarTable.from_frame(students, STUDENT_NUMERIC_COLS, STUDENT_STRING_COLS),
+        ColumnarTable.from_frame(assignments, ASSIGNMENT_NUMERIC_COLS, ASSIGNMENT_STRING_COLS),
+    )
+
+
+def ingested_tables(result: IngestResult) -> tuple[ColumnarTable, ColumnarTable]:
+    return (
+        ColumnarTable.from_frame(result.students, STUDENT_NUMERIC_COLS, STUDENT_STRING_COLS),
+        ColumnarTable.from_frame(result.assignments, ASSIGNMENT_NUMERIC_COLS, ASSIGNMENT_STRING_COLS),
+    )
+
+
+def submission_table(result: IngestResult) -> ColumnarTable | None:
+    if result.submissions is None:
+        return None
+    return ColumnarTable.from_frame(result.submissions, SUBMISSION_NUMERIC_COLS, SUBMISSION_STRING_COLS)
+
+
+def convert_csv_to_columnar(csv_path: Path, out_dir: Path, chunksize: int = DEFAULT_CHUNKSIZE) -> tuple[int, int]:
+    """Write the columnar layout for a mixed CSV; returns (n_students, n_assignments)."""
+    result = read_csv_chunked(csv_shards(Path(csv_path)), chunksize=chunksize)
+    students, assignments = ingested_tables(result)
+    students.save(out_dir / "students")
+    assignments.save(out_dir / "assignments")
+    submissions = submission_table(result)
+    if submissions is not None:
+        submissions.save(out_dir / "submissions")
+    return len(students), len(assignments)
+
+
 @dataclass(frozen=True)
 class CourseDataRepo:
     data_path: Path
+    chunksize: int = DEFAULT_CHUNKSIZE
 
-    def load(self) -> pd.DataFrame:
+    def _check(self) -> None:
         if not self.data_path.exists():
             raise FileNotFoundError(
                 f"Data file not found: {self.data_path}. "
                 f"Generate it with scripts/generate_synthetic_data.py"
             )
+
+    def load(self) -> pd.DataFrame:
+        self._check()
         df = pd.read_csv(self.data_path)
         return df
+
+    def load_tables(self) -> tuple[ColumnarTable, ColumnarTable]:
+        """(students, assignments); memory-mapped when data_path is a columnar directory."""
+        return self.load_dataset()[:2]
+
+    def load_dataset(self) -> tuple[ColumnarTable, ColumnarTable, ColumnarTable | None]:
+        """(students, assignments, submissions or None if the data has none)."""
+        self._check()
+        if (self.data_path / "students" / "meta.json").exists():
+            submissions = self.data_path / "submissions"
+            return (
+                ColumnarTable.load(self.data_path / "students"),
+                ColumnarTable.load(self.data_path / "assignments"),
+                ColumnarTable.load(submissions) if (submissions / "meta.json").exists() else None,
+            )
+        result = read_csv_chunked(csv_shards(self.data_path), chunksize=self.chunksize)
+        return (*ingested_tables(result), submission_table(result))
@@ -0,0 +1,273 @@
+"""
+Offline dense retrieval: hashed n-gram embeddings + vectorized / IVF top-k search.
+
+No model download:
+- HashingEmbedder maps word unigrams and character 3-5-grams into a fixed number of
+  signed buckets (crc32, stable across processes), weights them with sublinear tf x idf
+  and L2-normalizes, so paraphrases that share word stems ("attend", "attendance")
+  still land close together.
+- DenseIndex keeps every embedding in one float32 matrix. Below IVF_MIN_ROWS a query
+  batch is a single matmul + argpartition (exact). Above it, rows are clustered with
+  spherical k-means into `nlist` inverted lists stored contiguously; a query scores the
+  centroids, then only the rows of its `nprobe` best lists (approximate).
+- HybridRetriever fuses BM25 and dense rankings with reciprocal rank fusion, which
+  only needs ranks, so the two score scales never have to be calibrated.
+
+Dense indexes are derived from the (persisted) BM25 documents when a snapshot is built.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+import zlib
+import numpy as np
+
+from .rag import Bm25Retriever, CourseRetriever, terms
+
+
+RETRIEVAL_MODES = ("keyword", "dense", "hybrid")
+
+
+@lru_cache(maxsize=200_000)
+def _bucket(feature: str, dim: int) -> int:
+    """Signed bucket: +/-(index + 1), so 0 never collides with a sign."""
+    h = zlib.crc32(feature.encode("utf-8"))
+    idx = h % dim + 1
+    return idx if h & 0x80000000 else -idx
+
+
+def _features(text: str, ngrams: tuple[int, int]) -> Counter:
+    feats: Counter = Counter()
+    for t in terms(text):
+        feats["w:" + t] += 2  # whole words weigh more than any single n-gram
+        padded = f"<{t}>"
+        for n in range(ngrams[0], ngrams[1] + 1):
+            for i in range(len(padded) - n + 1):
+                feats[padded[i:i + n]] += 1
+    return feats
+
+
+@dataclass
+class HashingEmbedder:
+    dim: int = 256
+    ngrams: tuple[int, int] = (3, 5)
+    idf: np.ndarray | None = None  # per bucket, set by fit()
+
+    def _sparse(self, texts: List[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        rows, buckets, tfs = [], [], []
+        for r, text in enumerate(texts):
+            feats = _features(text, self.ngrams)
+            rows.extend([r] * len(feats))
+            buckets.extend(_bucket(f, self.dim) for f in feats)
+            tfs.extend(feats.values())
+        buckets = np.asarray(buckets, dtype=np.int64)
+        vals = (1.0 + np.log(np.asarray(tfs, dtype=np.float32))) * np.sign(buckets)
+        return np.asarray(rows, dtype=np.int64), np.abs(buckets) - 1, vals.astype(np.float32)
+
+    def fit(self, texts: List[str]) -> "HashingEmbedder":
+        rows, cols, _ = self._sparse(texts)
+        df = np.zeros(self.dim, dtype=np.float64)
+        # Count each (doc, bucket) once
+        pairs = np.unique(rows * self.dim + cols)
+        np.add.at(df, pairs % self.dim, 1.0)
+        self.idf = np.log((1 + len(texts)) / (1 + df)).astype(np.float32) + 1.0
+        return self
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) float32, rows L2-normalized (all-zero rows stay zero)."""
+        rows, cols, vals = self._sparse(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(out, (rows, cols), vals)
+        if self.idf is not None:
+            out *= self.idf
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+def _top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-k of a (m, n) score matrix, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((len(scores), 0), dtype=scores.dtype), np.zeros((len(scores), 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part_scores, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+class DenseIndex:
+    """
+    Inner-product top-k over L2-normalized float32 rows (i.e. cosine similarity).
+    Exact below IVF_MIN_ROWS, IVF (inverted file over k-means lists) above it.
+    """
+
+    IVF_MIN_ROWS = 20_000
+    # Corpus rows scored per matmul in exact search; bounds the (m, block) score buffer
+    BLOCK_ROWS = 65_536
+
+    def __init__(self, vectors: np.ndarray, nlist: int | None = None, nprobe: int = 16,
+                 ivf: bool | None = None, seed: int = 0):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        self.nprobe = nprobe
+        self.ivf = n >= self.IVF_MIN_ROWS if ivf is None else ivf
+        if not self.ivf:
+            self.vectors = vectors
+            self.ids = np.arange(n, dtype=np.int64)
+            self.centroids = None
+            self.list_ptr = None
+            return
+
+        self.nlist = nlist or max(1, int(np.sqrt(n)))
+        self.centroids = _spherical_kmeans(vectors, self.nlist, seed=seed)
+        assign = self._assign(vectors)
+        # Store rows grouped by list so each probe is one contiguous slice
+        order = np.argsort(assign, kind="stable")
+        self.vectors = vectors[order]
+        self.ids = order.astype(np.int64)
+        self.list_ptr = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        out = np.empty(len(vectors), dtype=np.int64)
+        for lo in range(0, len(vectors), self.BLOCK_ROWS):
+            out[lo:lo + self.BLOCK_ROWS] = np.argmax(vectors[lo:lo + self.BLOCK_ROWS] @ self.centroids.T, axis=1)
+        return out
+
+    def search_exact(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """(scores, ids), each (m, k); ids are positions in the original input order."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        best_s = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_i = np.zeros((len(queries), 0), dtype=np.int64)
+        for lo in range(0, len(self.vectors), self.BLOCK_ROWS):
+            s = queries @ self.vectors[lo:lo + self.BLOCK_ROWS].T
+            s, i = _top_k(s, k)
+            best_s, idx = _top_k(np.hstack([best_s, s]), k)
+            best_i = np.take_along_axis(np.hstack([best_i, i + lo]), idx, axis=1)
+        return best_s, self.ids[best_i]
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """(scores, ids), each (m, k); approximate when the IVF index is active."""
+        if not self.ivf:
+            return self.search_exact(queries, k)
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probes = _top_k(queries @ self.centroids.T, nprobe)[1]
+
+        out_s = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        out_i = np.full((len(queries), k), -1, dtype=np.int64)
+        for q, lists in enumerate(probes):
+            rows = np.concatenate([np.arange(self.list_ptr[l], self.list_ptr[l + 1]) for l in lists])
+            s, i = _top_k((self.vectors[rows] @ queries[q])[None, :], k)
+            out_s[q, :s.shape[1]] = s[0]
+            out_i[q, :i.shape[1]] = self.ids[rows[i[0]]]
+        return out_s, out_i
+
+
+def _spherical_kmeans(vectors: np.ndarray, k: int, iters: int = 10, sample: int = 256, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids trained on a sample of at most k * sample rows."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    train = vectors[rng.choice(n, size=min(n, k * sample), replace=False)]
+    centroids = train[rng.choice(len(train), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, train)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Re-seed empty lists from random training rows
+        sums[empty] = train[rng.choice(len(train), size=int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+class DenseRetriever:
+    """Same `retrieve(query, k)` interface as the keyword retrievers."""
+
+    # Cosine below this is noise for hashed n-grams; such hits are dropped
+    MIN_SCORE = 0.1
+
+    def __init__(self, docs: Iterable[Tuple[str, str]], dim: int = 256, ivf: bool | None = None):
+        self.docs = list(docs)
+        texts = [text for _, text in self.docs]
+        self.embedder = HashingEmbedder(dim=dim).fit(texts)
+        self.index = DenseIndex(self.embedder.embed(texts), ivf=ivf)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[float, int]]:
+        """(score, doc position) pairs, best first."""
+        if not self.docs:
+            return []
+        scores, ids = self.index.search(self.embedder.embed([query]), k)
+        return [(float(s), int(i)) for s, i in zip(scores[0], ids[0]) if i >= 0 and s >= self.MIN_SCORE]
+
+    def retrieve(self, query: str, k: int = 3) -> List[Tuple[str, str]]:
+        return [self.docs[i] for _, i in self.search(query, k)]
+
+
+@dataclass(frozen=True)
+class HybridRetriever:
+    """Reciprocal rank fusion of BM25 and dense rankings: score = sum 1 / (rrf_k + rank)."""
+
+    keyword: Bm25Retriever
+    dense: DenseRetriever
+    rrf_k: int = 60
+    depth: int = 20  # candidates taken from each ranking
+
+    def retrieve(self, query: str, k: int = 3) -> List[Tuple[str, str]]:
+        fused: dict[str, float] = {}
+        texts: dict[str, str] = {}
+        for ranking in (self.keyword.retrieve(query, self.depth), self.dense.retrieve(query, self.depth)):
+            for rank, (doc_id, text) in enumerate(ranking):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                texts.setdefault(doc_id, text)
+        # Stable sort: on equal fused score the keyword ranking's order wins
+        best = sorted(fused, key=fused.get, reverse=True)[:k]
+        return [(doc_id, texts[doc_id]) for doc_id in best]
+
+
+@dataclass(frozen=True)
+class DenseCourseRetriever:
+    """Per-course dense (or hybrid) retrievers built over a CourseRetriever's documents."""
+
+    keyword: CourseRetriever
+    mode: str
+    shared: DenseRetriever | HybridRetriever
+    by_course: dict[str, DenseRetriever | HybridRetriever]
+
+    @staticmethod
+    def build(keyword: CourseRetriever, mode: str = "hybrid") -> "DenseCourseRetriever":
+        if mode not in ("dense", "hybrid"):
+            raise ValueError(f"Unknown dense retrieval mode {mode!r}; expected 'dense' or 'hybrid'.")
+
+        def wrap(index: Bm25Retriever) -> DenseRetriever | HybridRetriever:
+            dense = DenseRetriever(index.documents())
+            return dense if mode == "dense" else HybridRetriever(keyword=index, dense=dense)
+
+        return DenseCourseRetriever(
+            keyword=keyword,
+            mode=mode,
+            shared=wrap(keyword.shared),
+            by_course={c: wrap(index) for c, index in keyword.by_course.items()},
+        )
+
+    def for_course(self, course_id: str) -> DenseRetriever | HybridRetriever:
+        return self.by_course.get(course_id, self.shared)
+
+    def retrieve(self, query: str, k: int = 3) -> List[Tuple[str, str]]:
+        return self.shared.retrieve(query, k)
+
+
+def with_retrieval_mode(keyword: CourseRetriever, mode: str) -> CourseRetriever | DenseCourseRetriever:
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode {mode!r}; expected one of {RETRIEVAL_MODES}.")
+    return keyword if mode == "keyword" else DenseCourseRetriever.build(keyword, mode)
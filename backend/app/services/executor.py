@@ -0,0 +1,120 @@
+"""
+Bounded executor for CPU-heavy request work (prediction, retrieval, course aggregations).
+
+Async handlers hand their work to a dedicated pool instead of Starlette's shared
+default threadpool:
+- fixed worker count ("thread" pool, or "process" pool for GIL-bound work)
+- a cap on in-flight + queued tasks; past it callers get `Overloaded` (-> 503 + Retry-After)
+  instead of unbounded queueing latency
+
+Task functions take the DataSnapshot as their first argument. In process mode the
+snapshot is not pickled per call: each worker builds its own copy from disk (sharing
+memory-mapped columnar pages) and rebuilds when the parent's snapshot version moves on.
+In-place row updates made in the parent after a build would not be visible to process
+workers, so the API rejects them in process mode.
+"""
+
+from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+import asyncio
+
+from .snapshot import DataSnapshot
+
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server busy; retry in {retry_after}s.")
+        self.retry_after = retry_after
+
+
+# --- process-pool worker side -------------------------------------------------
+
+_worker_build: Callable[[int], DataSnapshot] | None = None
+_worker_snapshot: DataSnapshot | None = None
+
+
+def _init_worker(build: Callable[[int], DataSnapshot]) -> None:
+    global _worker_build
+    _worker_build = build
+
+
+def _call_in_worker(version: int, fn: Callable, args: tuple) -> Any:
+    global _worker_snapshot
+    if _worker_snapshot is None or _worker_snapshot.version != version:
+        _worker_snapshot = _worker_build(version)
+    return fn(_worker_snapshot, *args)
+
+
+# --- parent side ---------------------------------------------------------------
+
+class CpuExecutor:
+    def __init__(
+        self,
+        kind: str = "thread",
+        workers: int = 4,
+        max_pending: int = 64,
+        retry_after: int = 1,
+        build: Callable[[int], DataSnapshot] | None = None,
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind {kind!r}; expected one of {EXECUTOR_KINDS}.")
+        if kind == "process" and build is None:
+            raise ValueError("Process executor needs a picklable snapshot `build` function.")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self.retry_after = retry_after
+        self._build = build
+        self._pool: Executor | None = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _ensure_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker, initargs=(self._build,)
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cpu")
+        return self._pool
+
+    async def run(self, fn: Callable, snap: DataSnapshot, *args: Any) -> Any:
+        """Run fn(snap, *args) on the pool; raises Overloaded when the queue is full."""
+        # Only touched from the event loop thread, so no lock needed
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded(self.retry_after)
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            if self.kind == "process":
+                call = partial(_call_in_worker, snap.version, fn, args)
+            else:
+                call = partial(fn, snap, *args)
+            result = await loop.run_in_executor(self._ensure_pool(), call)
+            self.completed += 1
+            return result
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,219 @@
+"""
+Flat inference engine for the grade forest.
+
+The trained RandomForestRegressor is flattened into packed NumPy node arrays
+(feature, threshold, children, value) and rows are pushed through every tree
+at once with vectorized traversal. No per-call sklearn validation and no
+joblib thread dispatch, which dominate single-row latency.
+
+Results match `model.predict` within float tolerance: inputs are compared as
+float32 (like sklearn) and NaNs follow each node's missing-value direction.
+
+Compact export (`compact` + `save` / `load`): one .npy per array in a directory,
+memory-mapped on load so every worker process shares the same page cache.
+- thresholds as float32, rounded down (x32 <= t  <=>  x32 <= t32 for float32 x): exact
+- feature ids as uint8, leaf values as float32 or uint16 (linear quantization)
+- optional pruning: a split whose two leaves differ by <= tol becomes a leaf with
+  the parent's own value (the mean of its samples)
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from pathlib import Path
+import json
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+
+# Rows traversed per block; keeps the (rows x trees) working set cache-sized
+BLOCK_ROWS = 1024
+
+FORMAT_VERSION = 1
+ARRAYS = ("feature", "threshold", "children", "missing_left", "value", "roots")
+LEAF_DTYPES = ("float64", "float32", "uint16")
+
+
+@dataclass(frozen=True)
+class FlatForest:
+    feature: np.ndarray      # (n_nodes,) int32 (uint8 when compact), 0 for leaves
+    threshold: np.ndarray    # (n_nodes,) float64 (float32 when compact)
+    children: np.ndarray     # (n_nodes, 2) int32 absolute [left, right]; leaves point at themselves
+    missing_left: np.ndarray  # (n_nodes,) bool, where NaN goes
+    value: np.ndarray        # (n_nodes,) leaf/node prediction; stored * value_scale + value_offset
+    roots: np.ndarray        # (n_trees,) int32
+    max_depth: int
+    value_scale: float = 1.0
+    value_offset: float = 0.0
+
+    @staticmethod
+    def from_sklearn(model: RandomForestRegressor) -> "FlatForest":
+        feature, threshold, children, missing_left, value, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in model.estimators_:
+            t = est.tree_
+            n = t.node_count
+            ids = np.arange(n)
+            leaf = t.children_left < 0
+            left = np.where(leaf, ids, t.children_left) + offset
+            right = np.where(leaf, ids, t.children_right) + offset
+
+            feature.append(np.where(leaf, 0, t.feature))
+            threshold.append(np.where(leaf, 0.0, t.threshold))
+            children.append(np.stack([left, right], axis=1))
+            mgl = getattr(t, "missing_go_to_left", None)
+            missing_left.append(np.zeros(n, dtype=bool) if mgl is None else np.asarray(mgl, dtype=bool))
+            value.append(t.value[:, 0, 0])
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, t.max_depth)
+
+        return FlatForest(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            children=np.ascontiguousarray(np.concatenate(children), dtype=np.int32),
+            missing_left=np.concatenate(missing_left),
+            value=np.concatenate(value).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=int(max_depth),
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+    def compact(self, leaf_dtype: str = "float32", prune_tol: float = 0.0) -> "FlatForest":
+        """Narrow dtypes (float32 thresholds are exact), optionally pruned and with quantized leaves."""
+        if leaf_dtype not in LEAF_DTYPES:
+            raise ValueError(f"Unknown leaf dtype {leaf_dtype!r}; expected one of {LEAF_DTYPES}.")
+        forest = self._pruned(prune_tol) if prune_tol > 0 else self
+        values = forest.value * forest.value_scale + forest.value_offset
+
+        t = np.asarray(forest.threshold, dtype=np.float64)
+        t32 = t.astype(np.float32)
+        up = t32.astype(np.float64) > t
+        t32[up] = np.nextafter(t32[up], np.float32(-np.inf))
+
+        scale, offset = 1.0, 0.0
+        if leaf_dtype == "uint16":
+            lo, hi = float(values.min()), float(values.max())
+            scale, offset = (hi - lo) / 65535 or 1.0, lo
+            value = np.round((values - lo) / scale).astype(np.uint16)
+        else:
+            value = values.astype(leaf_dtype)
+
+        n_features = int(forest.feature.max()) + 1 if len(forest.feature) else 1
+        return FlatForest(
+            feature=forest.feature.astype(np.uint8 if n_features <= 256 else np.int32),
+            threshold=t32,
+            children=forest.children.astype(np.int32),
+            missing_left=forest.missing_left.astype(bool),
+            value=value,
+            roots=forest.roots.astype(np.int32),
+            max_depth=forest.max_depth,
+            value_scale=scale,
+            value_offset=offset,
+        )
+
+    def _pruned(self, tol: float) -> "FlatForest":
+        children = np.array(self.children, dtype=np.int64)
+        ids = np.arange(len(children))
+        value = np.asarray(self.value, dtype=np.float64)
+        # Collapse bottom-up until no split has two near-equal leaves
+        while True:
+            leaf = children[:, 0] == ids
+            left, right = children[:, 0], children[:, 1]
+            merge = ~leaf & leaf[left] & leaf[right] & (np.abs(value[left] - value[right]) * self.value_scale <= tol)
+            if not merge.any():
+                break
+            children[merge] = ids[merge, None]
+
+        # Drop unreachable nodes and renumber; depth of the pruned trees on the way
+        keep = np.zeros(len(children), dtype=bool)
+        frontier = np.asarray(self.roots, dtype=np.int64)
+        depth = -1
+        while frontier.size:
+            keep[frontier] = True
+            depth += 1
+            nxt = children[frontier][children[frontier, 0] != frontier].reshape(-1)
+            frontier = nxt
+        new_id = np.cumsum(keep) - 1
+        return replace(
+            self,
+            feature=self.feature[keep],
+            threshold=self.threshold[keep],
+            children=new_id[children[keep]].astype(np.int32),
+            missing_left=self.missing_left[keep],
+            value=self.value[keep],
+            roots=new_id[self.roots].astype(np.int32),
+            max_depth=depth,
+        )
+
+    def save(self, path: Path, **meta) -> None:
+        """One .npy per array plus forest.json (extra `meta` is stored alongside)."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(path / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        (path / "forest.json").write_text(json.dumps({
+            "format": FORMAT_VERSION,
+            "max_depth": self.max_depth,
+            "value_scale": self.value_scale,
+            "value_offset": self.value_offset,
+            **meta,
+        }))
+
+    @staticmethod
+    def load(path: Path, mmap: bool = True) -> tuple["FlatForest", dict]:
+        """(forest, forest.json contents); arrays are read-only memory maps unless mmap=False."""
+        path = Path(path)
+        meta = json.loads((path / "forest.json").read_text())
+        if meta["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported forest format {meta['format']} in {path}.")
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None) for name in ARRAYS}
+        forest = FlatForest(
+            **arrays,
+            max_depth=meta["max_depth"],
+            value_scale=meta["value_scale"],
+            value_offset=meta["value_offset"],
+        )
+        return forest, meta
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index per (row, tree)."""
+        # sklearn compares float32 inputs against float64 thresholds; compact thresholds
+        # are float32 already (rounded so the comparison is unchanged)
+        X = np.asarray(X, dtype=np.float32).astype(self.threshold.dtype)
+        out = np.empty((X.shape[0], self.n_trees), dtype=np.int32)
+        for start in range(0, X.shape[0], BLOCK_ROWS):
+            out[start:start + BLOCK_ROWS] = self._apply_block(X[start:start + BLOCK_ROWS])
+        return out
+
+    def _apply_block(self, X: np.ndarray) -> np.ndarray:
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        flat = self.children.reshape(-1)
+        r = np.arange(X.shape[0])[:, None]
+        for _ in range(self.max_depth):
+            x = X[r, self.feature[node]]
+            go_right = ~(x <= self.threshold[node])
+            nan = np.isnan(x)
+            if nan.any():
+                go_right[nan] = ~self.missing_left[node[nan]]
+            nxt = flat[node * 2 + go_right]
+            if np.array_equal(nxt, node):
+                break
+            node = nxt
+        return node
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if X.shape[0] == 0:
+            return np.empty(0)
+        pred = self.value[self.apply(X)].mean(axis=1, dtype=np.float64)
+        if self.value_scale != 1.0 or self.value_offset != 0.0:
+            pred = pred * self.value_scale + self.value_offset
+        return pred
@@ -0,0 +1,287 @@
+"""
+Table-driven intent router: one compiled pattern, one pass over the message.
+
+- Every keyword of every rule (factored into a character trie) plus the entity patterns
+  (student IDs, assignment IDs, thresholds / "N or more" counts / ranges, each tied to
+  the nearest field word, and "bottom N" ranks) are folded into one capturing
+  lookahead, so a single `findall` reports every (overlapping) occurrence. Per-message
+  cost tracks the number of hits, not the number of rules.
+- Keywords keep the old substring semantics: case-insensitive (the scan runs over the
+  lowercased message), any run of whitespace matches a space, and they may sit inside
+  longer words ("hard" in "hardest"). The longest keyword at a position wins and also
+  marks every keyword it contains ("failing" implies "fail"), so none are lost.
+- Rules are plain data, checked in order with bitmasks; the first rule whose `all`
+  keywords are all present and (if given) one of whose `any` keywords is present wins:
+
+    [{"intent": "grade_drivers", "all": ["pulling", "grade"]}, ...]
+
+  `IntentRouter.from_json(path)` loads the same table from a file.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+import json
+import re
+
+
+DEFAULT_RULES: list[dict] = [
+    {"intent": "student_status", "all": ["how is", "doing"]},
+    {"intent": "grade_drivers", "all": ["pulling", "grade"]},
+    {"intent": "struggling_students", "all": ["which students"], "any": ["struggling", "failing"]},
+    {"intent": "hard_assignments", "all": ["key assignments"], "any": ["struggled", "hard"]},
+    {"intent": "predict_outcome", "all": ["by the end"]},
+    {"intent": "predict_outcome", "all": ["will"], "any": ["pass", "fail", "final"]},
+    {"intent": "prescribe", "all": ["recommendation"]},
+    {"intent": "prescribe", "all": ["given", "failing"]},
+]
+FALLBACK = "fallback"
+
+# Entity alternatives, matched on the lowercased message. IDs must be uppercase in the
+# original text (like the old extract_student_id); word boundaries are checked in parse().
+_NUM = r"\d+(?:\.\d+)?"
+ENTITY_PATTERNS = {
+    "student_id": r"s\d{6,}",
+    "assignment_id": r"a\d+\b|assignment\s+\d+\b",
+    "threshold": rf"(?:below|under|less\s+than|above|over|more\s+than|greater\s+than|at\s+least|at\s+most)\s+{_NUM}"
+                 rf"|(?:<=?|>=?)\s*{_NUM}",
+    "count": rf"{_NUM}\s*%?\s*(?:or\s+more|or\s+fewer|or\s+less|\+)",
+    "range": rf"between\s+{_NUM}\s*%?\s+and\s+{_NUM}",
+    "rank": r"(?:bottom|lowest|top|highest)\s+\d+\b",
+}
+_ENTITY = re.compile("|".join(f"(?P<{kind}>{pat})" for kind, pat in ENTITY_PATTERNS.items()))
+_NUMBER = re.compile(_NUM)
+_OPS = {
+    "below": "<", "under": "<", "less": "<", "<": "<", "<=": "<=", "at most": "<=",
+    "above": ">", "over": ">", "more": ">", "greater": ">", ">": ">", ">=": ">=", "at least": ">=",
+    "or more": ">=", "+": ">=", "or fewer": "<=", "or less": "<=",
+}
+_OP_WORD = re.compile(r"at\s+least|at\s+most|or\s+more|or\s+fewer|or\s+less|<=|>=|[<>+]|[a-z]+")
+# Words that say which column a threshold/range applies to; the nearest one wins
+FIELD_WORDS = r"grade|score|attendance|attend|absen|missing|late|login|activity|exam|quiz|homework|hw"
+_FIELD = re.compile(FIELD_WORDS)
+FIELD_WINDOW = 40  # chars searched on each side of a condition
+_WS = re.compile(r"\s+")
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex for a set of words, factored as a character trie so each position tries one
+    branch per distinct next character. Greedy optionals make the longest word win;
+    spaces match any run of whitespace.
+    """
+    root: dict = {}
+    for w in words:
+        node = root
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        alts = [(r"\s+" if ch == " " else re.escape(ch)) + emit(child)
+                for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(root)
+
+
+def normalize(text: str) -> str:
+    return _WS.sub(" ", text.strip().lower())
+
+
+@dataclass(frozen=True)
+class Condition:
+    field: str | None  # nearest FIELD_WORDS match, None if the message names no field
+    op: str            # "<", "<=", ">", ">=", or "between"
+    value: float
+    upper: float | None = None  # for "between"
+
+
+@dataclass(frozen=True)
+class ParsedMessage:
+    intent: str
+    student_ids: list[str] = field(default_factory=list)
+    assignment_ids: list[str] = field(default_factory=list)
+    conditions: list[Condition] = field(default_factory=list)
+    rank: tuple[str, int] | None = None  # ("bottom" | "top", n)
+    keyword_mask: int = 0  # bit i set = router.keywords[i] occurs in the message
+
+    @property
+    def student_id(self) -> str | None:
+        return self.student_ids[0] if self.student_ids else None
+
+    @property
+    def thresholds(self) -> list[float]:
+        """Upper bounds ("below N") in message order."""
+        return [c.value for c in self.conditions if c.op == "<"]
+
+    @property
+    def threshold(self) -> float | None:
+        """First grade ceiling ("below N", on the grade or no named field)."""
+        for c in self.conditions:
+            if c.op == "<" and c.field in (None, "grade", "score"):
+                return c.value
+        return None
+
+
+@dataclass(frozen=True)
+class _Rule:
+    intent: str
+    all_mask: int
+    any_mask: int
+
+
+def _condition(kind: str, text: str, low: str, pos: int) -> Condition:
+    nums = [float(n) for n in _NUMBER.findall(text)]
+    if kind == "range":
+        op = "between"
+    else:
+        words = _OP_WORD.findall(text)
+        key = words[-1] if kind == "count" else words[0]
+        op = _OPS[_WS.sub(" ", key)]
+
+    # Nearest field word before or after the condition
+    end = pos + len(text)
+    before = _FIELD.findall(low, max(0, pos - FIELD_WINDOW), pos)
+    after = _FIELD.search(low, end, end + FIELD_WINDOW)
+    field_word = None
+    if before:
+        field_word = before[-1]
+        gap = pos - (low.rfind(field_word, 0, pos) + len(field_word))
+        if after is not None and after.start() - end < gap:
+            field_word = after.group(0)
+    elif after is not None:
+        field_word = after.group(0)
+    return Condition(field=field_word, op=op, value=min(nums), upper=max(nums) if kind == "range" else None)
+
+
+class IntentRouter:
+    def __init__(self, rules: Iterable[dict] = DEFAULT_RULES, fallback: str = FALLBACK):
+        rules = list(rules)
+        keywords: list[str] = []
+        for rule in rules:
+            for kw in list(rule.get("all", [])) + list(rule.get("any", [])):
+                kw = normalize(kw)
+                if not kw:
+                    raise ValueError(f"Empty keyword in rule for intent {rule.get('intent')!r}.")
+                if kw not in keywords:
+                    keywords.append(kw)
+        self.keywords = keywords
+        self.fallback = fallback
+        bit = {kw: 1 << i for i, kw in enumerate(keywords)}
+
+        def mask(kws: Iterable[str]) -> int:
+            m = 0
+            for kw in kws:
+                m |= bit[normalize(kw)]
+            return m
+
+        self.rules = [_Rule(r["intent"], mask(r.get("all", [])), mask(r.get("any", []))) for r in rules]
+        # A keyword occurrence implies every keyword it contains
+        self._closure = {kw: mask(k for k in keywords if k in kw) for kw in keywords}
+        # Each rule is filed under keywords it cannot fire without (its first `all` keyword,
+        # else each `any` keyword), so matching only visits rules whose keywords occurred
+        self._anchored: dict[int, list[int]] = {}
+        self._always: list[int] = []
+        for i, rule in enumerate(self.rules):
+            anchors = rule.all_mask & -rule.all_mask or rule.any_mask
+            if not anchors:
+                self._always.append(i)
+            while anchors:
+                low = anchors & -anchors
+                anchors ^= low
+                self._anchored.setdefault(low.bit_length() - 1, []).append(i)
+
+        self._keyword = re.compile(_trie_pattern(keywords)) if keywords else re.compile(r"(?!)")
+        # One capturing lookahead: findall reports every overlapping hit in a single C-level
+        # scan. Case-sensitive over the lowercased text (IGNORECASE defeats re's literal checks).
+        self._scan = re.compile(f"(?=({'|'.join(ENTITY_PATTERNS.values())}|{self._keyword.pattern}))")
+
+    @staticmethod
+    def from_json(path: Path) -> "IntentRouter":
+        data = json.loads(Path(path).read_text())
+        if isinstance(data, dict):
+            return IntentRouter(data["rules"], fallback=data.get("fallback", FALLBACK))
+        return IntentRouter(data)
+
+    def parse(self, message: str) -> ParsedMessage:
+        found = 0
+        sids: list[str] = []
+        aids: list[str] = []
+        conditions: list[Condition] = []
+        rank = None
+        closure = self._closure
+        low = message.lower()
+        if len(low) != len(message):
+            # A few characters change length when lowercased; map them away so offsets line up
+            message = "".join(c if len(c.lower()) == 1 else "?" for c in message)
+            low = message.lower()
+
+        pos = -1
+        for text in self._scan.findall(low):
+            bits = closure.get(text)
+            if bits is None:
+                bits = closure.get(_WS.sub(" ", text))
+            if bits is not None:
+                found |= bits
+                continue
+            # Entity hits are rare: locate them (in order) to check case and word boundaries
+            pos = low.find(text, pos + 1)
+            kind = _ENTITY.fullmatch(text).lastgroup
+            bounded = pos == 0 or not (low[pos - 1].isalnum() or low[pos - 1] == "_")
+            if kind == "student_id":
+                if message[pos] == "S":
+                    sids.append(message[pos:pos + len(text)])
+            elif kind == "assignment_id":
+                if bounded and (message[pos] == "A" or text.startswith("assignment")):
+                    aids.append("A" + _NUMBER.search(text).group(0))
+            elif kind == "rank":
+                if bounded and rank is None:
+                    word, n = text.split()
+                    rank = ("bottom" if word in ("bottom", "lowest") else "top", int(n))
+            elif bounded or not text[0].isalpha():
+                # The overlapping scan also reports "2 or fewer" inside "12 or fewer"
+                # and "5 or more" inside "0.5 or more"; only whole numbers count
+                if not (text[0].isdigit() and pos and (low[pos - 1].isdigit() or low[pos - 1] == ".")):
+                    conditions.append(_condition(kind, text, low, pos))
+            # The entity won this position; a keyword may start here too
+            k = self._keyword.match(low, pos)
+            if k is not None:
+                found |= closure[_WS.sub(" ", k.group(0))]
+
+        return ParsedMessage(
+            intent=self._first_rule(found),
+            student_ids=list(dict.fromkeys(sids)) if len(sids) > 1 else sids,
+            assignment_ids=list(dict.fromkeys(aids)) if len(aids) > 1 else aids,
+            conditions=conditions,
+            rank=rank,
+            keyword_mask=found,
+        )
+
+    def _first_rule(self, found: int) -> str:
+        """Intent of the first rule (in table order) satisfied by the keyword bitmask."""
+        rules = self.rules
+        best = self._always[0] if self._always else len(rules)
+        rest = found
+        while rest:
+            low = rest & -rest
+            rest ^= low
+            for i in self._anchored.get(low.bit_length() - 1, ()):
+                if i >= best:
+                    break  # anchored lists are in table order
+                rule = rules[i]
+                if found & rule.all_mask == rule.all_mask and (not rule.any_mask or found & rule.any_mask):
+                    best = i
+                    break
+        return rules[best].intent if best < len(rules) else self.fallback
+
+    def route(self, message: str) -> str:
+        return self.parse(message).intent
+
+
+DEFAULT_ROUTER = IntentRouter()
+
@@ -0,0 +1,130 @@
+"""
+Course-wide intervention report, streamed.
+
+- `rank_course` scores every student in a course with one batched (cached) model
+  call, orders them (highest fail risk first, or lowest grade first) and slices
+  one page. Only row indices and two float arrays are kept.
+- `stream_report` turns a ranked page into NDJSON lines or CSV text, CHUNK_ROWS
+  students at a time: drivers and recommendations come from the rule tables per
+  chunk, so memory is bounded by the chunk rather than the course.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterator
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from .analytics import evaluate_drivers
+from .cohort import COUNT_COLUMNS, SNAPSHOT_COLUMNS
+from .predictive import GradePredictor
+from .prescriptive import RECOMMENDATION_RULES, evaluate_recommendations
+from .store import StudentStore
+
+
+REPORT_SORTS = ("risk", "grade")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_ROWS = 500
+PASS_CUTOFF = 60.0
+
+
+@dataclass(frozen=True)
+class RankedPage:
+    course_id: str
+    total: int              # students matching before pagination
+    offset: int
+    rows: np.ndarray        # store rows of this page, in report order
+    predicted: np.ndarray   # predicted final grade, same order
+    risk: np.ndarray        # probability of failing, same order
+
+    @property
+    def next_offset(self) -> int | None:
+        end = self.offset + len(self.rows)
+        return end if end < self.total else None
+
+
+def rank_course(
+    store: StudentStore,
+    predictor: GradePredictor,
+    course_id: str,
+    sort: str = "risk",
+    min_risk: float = 0.0,
+    offset: int = 0,
+    limit: int | None = None,
+) -> RankedPage:
+    if sort not in REPORT_SORTS:
+        raise ValueError(f"Unknown sort {sort!r}; expected one of {REPORT_SORTS}.")
+    rows = store.course_rows(course_id)  # lowest grade first
+    pred = predictor.cached_predict(store, rows)
+    risk = predictor.risk_rows(store, rows, pred, pass_cutoff=PASS_CUTOFF)
+
+    keep = risk >= min_risk
+    rows, pred, risk = rows[keep], pred[keep], risk[keep]
+    if sort == "risk":
+        # Stable, so equal risk keeps lowest grade first
+        order = np.argsort(-risk, kind="stable")
+        rows, pred, risk = rows[order], pred[order], risk[order]
+
+    page = slice(offset, None if limit is None else offset + limit)
+    return RankedPage(
+        course_id=course_id,
+        total=len(rows),
+        offset=offset,
+        rows=rows[page],
+        predicted=pred[page],
+        risk=risk[page],
+    )
+
+
+def _number(x: float, count: bool) -> float | int | None:
+    if math.isnan(x):
+        return None
+    return int(round(x)) if count else x
+
+
+def _ndjson(store: StudentStore, page: RankedPage, start: int, rows: np.ndarray) -> str:
+    drivers = evaluate_drivers(store, rows).lists()
+    recs = evaluate_recommendations({f: store.column(f)[rows] for f in RECOMMENDATION_RULES.features}).lists()
+    snapshot = {c: store.column(c)[rows].tolist() for c in SNAPSHOT_COLUMNS}
+    pred = page.predicted[start:start + len(rows)].tolist()
+    risk = page.risk[start:start + len(rows)].tolist()
+
+    lines = []
+    for i, sid in enumerate(store.student_ids(rows).tolist()):
+        record = {"rank": page.offset + start + i + 1, "student_id": sid}
+        record.update((c, _number(snapshot[c][i], c in COUNT_COLUMNS)) for c in SNAPSHOT_COLUMNS)
+        record["predicted_final_grade"] = pred[i]
+        record["risk_of_failing"] = risk[i]
+        record["drivers"] = drivers[i]
+        record["recommendations"] = recs[i]
+        lines.append(json.dumps(record))
+    return "\n".join(lines) + "\n"
+
+
+def _csv(store: StudentStore, page: RankedPage, start: int, rows: np.ndarray) -> str:
+    recs = evaluate_recommendations({f: store.column(f)[rows] for f in RECOMMENDATION_RULES.features})
+    table = pd.DataFrame({"rank": np.arange(len(rows)) + page.offset + start + 1, "student_id": store.student_ids(rows)})
+    for c in SNAPSHOT_COLUMNS:
+        x = store.column(c)[rows]
+        table[c] = pd.Series(x).round().astype("Int64") if c in COUNT_COLUMNS else x
+    table["predicted_final_grade"] = page.predicted[start:start + len(rows)]
+    table["risk_of_failing"] = page.risk[start:start + len(rows)]
+    table["drivers"] = evaluate_drivers(store, rows).names()
+    table["top_action"] = recs.first()
+    table["actions"] = recs.names()
+    return table.to_csv(index=False, header=start == 0)
+
+
+def stream_report(store: StudentStore, page: RankedPage, fmt: str = "ndjson") -> Iterator[str]:
+    """Yield the page CHUNK_ROWS students at a time (CSV header only in the first chunk)."""
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {tuple(MEDIA_TYPES)}.")
+    render = _ndjson if fmt == "ndjson" else _csv
+    if fmt == "csv" and not len(page.rows):
+        yield _csv(store, page, 0, page.rows)
+        return
+    for start in range(0, len(page.rows), CHUNK_ROWS):
+        yield render(store, page, start, page.rows[start:start + CHUNK_ROWS])
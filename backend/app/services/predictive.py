@@ -5,17 +5,43 @@ Predictive analytics:
 
 Model strategy (portfolio-friendly):
 - train a simple regression model for final_grade
-- convert to pass/fail probability using a calibrated rule
+- probability of failing from a calibrated classifier on the `label` column
+  (services/risk.py) when the data has one, else a logistic curve around the
+  predicted grade
+
+Predictions are cached per student, keyed by (course_id, student_id, feature hash,
+model version), so repeat questions don't re-run the forest.
+
+Full models are trained offline (services/training.py, scripts/train_models.py),
+optionally with per-course sub-models; `baseline` is a small forest the API can fit
+in well under a second when no trained artifact exists yet.
 """
 
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterable, Mapping
+import copy
+import hashlib
+import threading
+import uuid
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 
+from .forest_engine import FlatForest
+from .risk import FailClassifier
+from .store import StudentStore
+
+
+# "sklearn": model.predict; "flat": packed-array traversal (services/forest_engine.py);
+# "auto": flat for small batches (request path), sklearn's compiled loop for bulk scoring.
+ENGINES = ("sklearn", "flat", "auto")
+AUTO_FLAT_MAX_ROWS = 128
+
+BASELINE_TREES = 20
+BASELINE_MAX_DEPTH = 8
 
 FEATURES = [
     "current_grade",
@@ -29,12 +55,105 @@ FEATURES = [
 ]
 
 
+def feature_hashes(X: np.ndarray) -> list[bytes]:
+    """Stable 8-byte digest of each feature row."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    return [hashlib.blake2b(x.tobytes(), digest_size=8).digest() for x in X]
+
+
+class PredictionCache:
+    """
+    Predicted final grades keyed by (course_id, student_id, feature_hash, model_version).
+
+    One slot per student: a lookup with a different feature hash or model version
+    is a miss, and the fresh value replaces the stale one.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple[str, str], tuple[bytes, str, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, course_id: str, student_id: str, fhash: bytes, version: str) -> float | None:
+        with self._lock:
+            e = self._entries.get((course_id, student_id))
+            if e is not None and e[0] == fhash and e[1] == version:
+                self.hits += 1
+                return e[2]
+            self.misses += 1
+            return None
+
+    def put(self, course_id: str, student_id: str, fhash: bytes, version: str, pred: float) -> None:
+        with self._lock:
+            self._entries[(course_id, student_id)] = (fhash, version, pred)
+
+    def invalidate(self, course_id: str, student_id: str) -> None:
+        with self._lock:
+            if self._entries.pop((course_id, student_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses, entries, invalidations = self.hits, self.misses, len(self._entries), self.invalidations
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "invalidations": invalidations,
+        }
+
+
 @dataclass
 class GradePredictor:
-    model: RandomForestRegressor
+    model: RandomForestRegressor | None  # None when loaded from a compact artifact (flat engine only)
+    medians: np.ndarray | None = None  # per-feature training medians, used to impute NaNs
+    version: str = "unversioned"
+    engine: str = "sklearn"
+    cache: PredictionCache = field(default_factory=PredictionCache, repr=False, compare=False)
+    flat: FlatForest | None = field(default=None, repr=False, compare=False)
+    # Per-course models; rows of other courses use this predictor's own model
+    courses: dict[str, "GradePredictor"] = field(default_factory=dict, repr=False, compare=False)
+    baseline: bool = False
+    classifier: FailClassifier | None = field(default=None, repr=False, compare=False)
+
+    def __getstate__(self) -> dict:
+        # Cache is per process; the flattened forest is derivable unless it is the only model
+        state = self.__dict__.copy()
+        state.pop("cache", None)
+        if self.model is not None:
+            state.pop("flat", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        state.setdefault("courses", {})  # artifacts from before per-course models
+        state.setdefault("flat", None)
+        state.setdefault("classifier", None)
+        self.__dict__.update(state)
+        self.cache = PredictionCache()
+
+    def use_engine(self, engine: str) -> "GradePredictor":
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown inference engine {engine!r}; expected one of {ENGINES}.")
+        if engine in ("flat", "auto") and self.flat is None:
+            self.flat = FlatForest.from_sklearn(self.model)
+        self.engine = engine if self.model is not None else "flat"
+        for sub in self.courses.values():
+            sub.use_engine(engine)
+        return self
 
     @staticmethod
-    def train(df: pd.DataFrame) -> "GradePredictor":
+    def training_data(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
         X = df[FEATURES].copy()
         y = df["final_grade"].astype(float)
 
@@ -42,32 +161,163 @@ class GradePredictor:
         for c in FEATURES:
             X[c] = pd.to_numeric(X[c], errors="coerce")
         X = X.fillna(X.median(numeric_only=True))
+        return X, y
 
+    @staticmethod
+    def train(df: pd.DataFrame, n_estimators: int = 400, n_jobs: int = -1, oob_score: bool = False) -> "GradePredictor":
+        X, y = GradePredictor.training_data(df)
         model = RandomForestRegressor(
-            n_estimators=400,
+            n_estimators=n_estimators,
             random_state=42,
-            n_jobs=-1,
+            n_jobs=n_jobs,
+            oob_score=oob_score,
         )
         model.fit(X, y)
-        return GradePredictor(model=model)
+        return GradePredictor(
+            model=model,
+            medians=X.median().to_numpy(dtype=np.float64),
+            version=uuid.uuid4().hex[:12],
+        )
 
-    def predict_final_grade(self, row: pd.Series) -> float:
-        X = row[FEATURES].to_frame().T.copy()
-        for c in FEATURES:
-            X[c] = pd.to_numeric(X[c], errors="coerce")
-        X = X.fillna(X.median(numeric_only=True))
-        pred = float(self.model.predict(X)[0])
-        return float(np.clip(pred, 0, 100))
+    def extend(self, df: pd.DataFrame, add_trees: int, n_jobs: int = -1) -> "GradePredictor":
+        """
+        Warm start: keep the existing trees and fit `add_trees` new ones on `df`
+        (e.g. data including a new term). Returns a new predictor; self is untouched.
+        """
+        if self.model is None:
+            raise ValueError("Warm start needs the sklearn model; load the pickle artifact, not the compact export.")
+        X, y = GradePredictor.training_data(df)
+        model = copy.deepcopy(self.model)
+        # OOB estimates would mix in trees fit on other data
+        model.set_params(warm_start=True, oob_score=False, n_jobs=n_jobs,
+                         n_estimators=len(model.estimators_) + add_trees)
+        model.fit(X, y)
+        return GradePredictor(
+            model=model,
+            medians=X.median().to_numpy(dtype=np.float64),
+            version=uuid.uuid4().hex[:12],
+        )
 
-    def prob_fail(self, predicted_final: float, pass_cutoff: float = 60.0) -> float:
+    @staticmethod
+    def fit_baseline(df: pd.DataFrame) -> "GradePredictor":
+        """Small, shallow forest; stands in while the full model trains. Deterministic per dataset."""
+        X, y = GradePredictor.training_data(df)
+        model = RandomForestRegressor(
+            n_estimators=BASELINE_TREES,
+            max_depth=BASELINE_MAX_DEPTH,
+            random_state=42,
+            n_jobs=1,
+        )
+        model.fit(X, y)
+        digest = hashlib.blake2b(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes(), digest_size=6)
+        return GradePredictor(
+            model=model,
+            medians=X.median().to_numpy(dtype=np.float64),
+            version=f"baseline-{digest.hexdigest()}",
+            baseline=True,
+            classifier=FailClassifier.train(df, FEATURES),  # a few logistic fits; cheap
+        )
+
+    def predict_many(self, X: np.ndarray) -> np.ndarray:
+        """
+        Vectorized final-grade prediction for an (n_rows, len(FEATURES)) matrix.
+        One model call for the whole batch; NaNs are imputed with training medians.
+        """
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.medians is not None:
+            nan = np.isnan(X)
+            if nan.any():
+                X[nan] = np.broadcast_to(self.medians, X.shape)[nan]
+        if X.shape[0] == 0:
+            return np.empty(0)
+        if self.model is None or self.engine == "flat" or (self.engine == "auto" and X.shape[0] <= AUTO_FLAT_MAX_ROWS):
+            pred = self.flat.predict(X)
+        else:
+            pred = self.model.predict(pd.DataFrame(X, columns=FEATURES))
+        return np.clip(pred, 0, 100)
+
+    def predict_rows(self, store: StudentStore, rows: Iterable[int] | np.ndarray) -> np.ndarray:
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        return self._predict_routed(store, rows, store.features(rows, FEATURES))
+
+    def _predict_routed(self, store: StudentStore, rows: np.ndarray, X: np.ndarray) -> np.ndarray:
+        """predict_many, sending rows of courses that have their own model to it."""
+        if not self.courses:
+            return self.predict_many(X)
+        out = np.empty(len(rows))
+        cids = store.courses[store.course_codes[rows]]
+        rest = np.ones(len(rows), dtype=bool)
+        for cid, sub in self.courses.items():
+            mask = cids == cid
+            if mask.any():
+                out[mask] = sub.predict_many(X[mask])
+                rest &= ~mask
+        if rest.any():
+            out[rest] = self.predict_many(X[rest])
+        return out
+
+    def cached_predict(self, store: StudentStore, rows: Iterable[int] | np.ndarray) -> np.ndarray:
+        """Like predict_rows, but served from the cache; misses are predicted in one batch."""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        X = store.features(rows, FEATURES)
+        hashes = feature_hashes(X)
+        cids = store.courses[store.course_codes[rows]]
+        sids = store.student_ids(rows)
+
+        out = np.empty(len(rows))
+        miss = []
+        for i, (cid, sid, h) in enumerate(zip(cids, sids, hashes)):
+            v = self.cache.get(cid, sid, h, self.version)
+            if v is None:
+                miss.append(i)
+            else:
+                out[i] = v
+        if miss:
+            out[miss] = self._predict_routed(store, rows[miss], X[miss])
+            for i in miss:
+                self.cache.put(cids[i], sids[i], hashes[i], self.version, float(out[i]))
+        return out
+
+    def warm_cache(self, store: StudentStore) -> None:
+        """Bulk-fill the cache for every row in the store (startup / after retraining)."""
+        rows = np.arange(len(store))
+        X = store.features(rows, FEATURES)
+        preds = self._predict_routed(store, rows, X)
+        cids = store.courses[store.course_codes]
+        sids = store.student_ids(rows)
+        for cid, sid, h, pred in zip(cids, sids, feature_hashes(X), preds.tolist()):
+            self.cache.put(cid, sid, h, self.version, pred)
+
+    def predict_final_grade(self, row: Mapping) -> float:
+        # Row may be a pd.Series or a StudentStore record
+        model = self.courses.get(row.get("course_id"), self)
+        return float(model.predict_many([[float(row[c]) for c in FEATURES]])[0])
+
+    def risk_rows(
+        self,
+        store: StudentStore,
+        rows: Iterable[int] | np.ndarray,
+        predicted_final: np.ndarray,
+        pass_cutoff: float = 60.0,
+    ) -> np.ndarray:
         """
-        Simple probability curve around the cutoff.
-        Replace later with a classifier + calibration if you want.
+        P(fail) per row: the calibrated classifier when this model has one, else the
+        fallback curve over `predicted_final` (the only place `pass_cutoff` applies).
         """
+        if self.classifier is None:
+            return self.prob_fail_many(predicted_final, pass_cutoff)
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        return self.classifier.predict_proba(store.features(rows, self.classifier.features))
+
+    def prob_fail(self, predicted_final: float, pass_cutoff: float = 60.0) -> float:
+        """Fallback probability curve around the cutoff (models without a classifier)."""
+        return float(self.prob_fail_many(np.array([predicted_final]), pass_cutoff)[0])
+
+    def prob_fail_many(self, predicted_final: np.ndarray, pass_cutoff: float = 60.0) -> np.ndarray:
         # Logistic-ish mapping: 60 => ~0.5 probability failing
-        x = (pass_cutoff - predicted_final) / 6.0
+        x = (pass_cutoff - np.asarray(predicted_final, dtype=np.float64)) / 6.0
         p = 1 / (1 + np.exp(-x))
-        return float(np.clip(p, 0, 1))
+        return np.clip(p, 0, 1)
 
 
 def save_predictor(p: GradePredictor, artifact_dir: Path) -> None:
@@ -77,3 +327,45 @@ def save_predictor(p: GradePredictor, artifact_dir: Path) -> None:
 
 def load_predictor(artifact_dir: Path) -> GradePredictor:
     return joblib.load(artifact_dir / "grade_predictor.pkl")
+
+
+def save_compact(p: GradePredictor, path: Path, leaf_dtype: str = "float32", prune_tol: float = 0.0) -> int:
+    """
+    Export for serving: the forest as memory-mappable arrays (see forest_engine.py),
+    per-course models under courses/<course_id>/. No sklearn objects; returns bytes written.
+    """
+    flat = p.flat if p.flat is not None else FlatForest.from_sklearn(p.model)
+    forest = flat.compact(leaf_dtype=leaf_dtype, prune_tol=prune_tol)
+    forest.save(
+        path,
+        version=p.version,
+        features=FEATURES,
+        medians=p.medians.tolist() if p.medians is not None else None,
+        baseline=p.baseline,
+        classifier=p.classifier.to_dict() if p.classifier is not None else None,
+        leaf_dtype=leaf_dtype,
+        prune_tol=prune_tol,
+    )
+    size = forest.nbytes
+    for cid, sub in p.courses.items():
+        size += save_compact(sub, Path(path) / "courses" / cid, leaf_dtype, prune_tol)
+    return size
+
+
+def load_compact(path: Path, mmap: bool = True) -> GradePredictor:
+    """Inverse of save_compact; arrays stay memory-mapped, shared by every process that loads them."""
+    forest, meta = FlatForest.load(path, mmap=mmap)
+    if meta["features"] != FEATURES:
+        raise ValueError(f"Artifact {path} was trained on features {meta['features']}, expected {FEATURES}.")
+    courses_dir = Path(path) / "courses"
+    courses = {d.name: load_compact(d, mmap) for d in sorted(courses_dir.iterdir())} if courses_dir.exists() else {}
+    return GradePredictor(
+        model=None,
+        medians=np.asarray(meta["medians"], dtype=np.float64) if meta["medians"] is not None else None,
+        version=meta["version"],
+        engine="flat",
+        flat=forest,
+        courses=courses,
+        baseline=meta["baseline"],
+        classifier=FailClassifier.from_dict(meta["classifier"]) if meta.get("classifier") else None,
+    )
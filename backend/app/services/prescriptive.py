@@ -10,66 +10,50 @@ Later: you can augment with an LLM to make the phrasing more natural.
 """
 
 from __future__ import annotations
-import pandas as pd
-
-
-def recommendations(student_row: pd.Series) -> list[dict]:
-    recs = []
-
-    attendance = float(student_row["attendance_rate"])
-    missing = int(student_row["missing_assignments"])
-    late = int(student_row["late_submissions"])
-    exam = float(student_row["avg_exam_score"])
-    hw = float(student_row["avg_hw_score"])
-    quiz = float(student_row["avg_quiz_score"])
-    logins = int(student_row["logins_last_7d"])
-
-    # High-impact, common levers first
-    if missing >= 3:
-        recs.append({
-            "priority": "high",
-            "action": "Missing work recovery plan",
-            "details": "Create a 7-day plan to complete missing assignments. Offer partial credit and office hours."
-        })
-    if attendance < 0.9:
-        recs.append({
-            "priority": "high",
-            "action": "Attendance intervention",
-            "details": "Identify pattern (days/times). Contact guardian/counselor. Set attendance goal + check-ins."
-        })
-    if exam < 70:
-        recs.append({
-            "priority": "high",
-            "action": "Exam prep + reteach plan",
-            "details": "Assign targeted practice on weak standards; retake opportunities; short daily retrieval practice."
-        })
-    if hw < 75 or quiz < 75:
-        recs.append({
-            "priority": "medium",
-            "action": "Practice scaffolding",
-            "details": "Shorten assignments, provide exemplars, and use spaced practice. Add 2 quick formative checks weekly."
-        })
-    if late >= 3:
-        recs.append({
-            "priority": "medium",
-            "action": "Time management supports",
-            "details": "Break tasks into milestones with due dates; allow structured extensions; teach planning routines."
-        })
-    if logins < 2:
-        recs.append({
-            "priority": "medium",
-            "action": "Engagement nudge",
-            "details": "Set a weekly platform routine; send reminders; assign a short mandatory check-in activity."
-        })
-
-    if not recs:
-        recs.append({
-            "priority": "low",
-            "action": "General support",
-            "details": "Schedule a student conference and set two measurable goals for the next 2 weeks."
-        })
-
-    # Sort: high first
-    order = {"high": 0, "medium": 1, "low": 2}
-    recs.sort(key=lambda r: order[r["priority"]])
-    return recs
+from typing import Mapping
+import numpy as np
+
+from .rules import Rule, RuleHits, RuleTable
+
+
+RECOMMENDATION_RULES = RuleTable(
+    [
+        # High-impact, common levers first
+        Rule.of("Missing work recovery plan", "high",
+                "Create a 7-day plan to complete missing assignments. Offer partial credit and office hours.",
+                ("missing_assignments", ">=", 3)),
+        Rule.of("Attendance intervention", "high",
+                "Identify pattern (days/times). Contact guardian/counselor. Set attendance goal + check-ins.",
+                ("attendance_rate", "<", 0.9)),
+        Rule.of("Exam prep + reteach plan", "high",
+                "Assign targeted practice on weak standards; retake opportunities; short daily retrieval practice.",
+                ("avg_exam_score", "<", 70)),
+        Rule.of("Practice scaffolding", "medium",
+                "Shorten assignments, provide exemplars, and use spaced practice. Add 2 quick formative checks weekly.",
+                ("avg_hw_score", "<", 75), ("avg_quiz_score", "<", 75)),
+        Rule.of("Time management supports", "medium",
+                "Break tasks into milestones with due dates; allow structured extensions; teach planning routines.",
+                ("late_submissions", ">=", 3)),
+        Rule.of("Engagement nudge", "medium",
+                "Set a weekly platform routine; send reminders; assign a short mandatory check-in activity.",
+                ("logins_last_7d", "<", 2)),
+    ],
+    keys={"priority": "level", "action": "name", "details": "message"},
+    fallback=Rule.of("General support", "low",
+                     "Schedule a student conference and set two measurable goals for the next 2 weeks."),
+)
+
+
+def recommendations(student_row: Mapping) -> list[dict]:
+    """Interventions for one student, high priority first (RECOMMENDATION_RULES on a single row)."""
+    return RECOMMENDATION_RULES.evaluate_row(student_row)
+
+
+def evaluate_recommendations(cols: Mapping[str, np.ndarray]) -> RuleHits:
+    """RECOMMENDATION_RULES over many students; `cols` maps field names to equal-length arrays."""
+    return RECOMMENDATION_RULES.evaluate(cols)
+
+
+def top_recommendations(cols: Mapping[str, np.ndarray]) -> np.ndarray:
+    """First action `recommendations` would list, for many students at once."""
+    return evaluate_recommendations(cols).first()
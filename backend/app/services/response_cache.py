@@ -0,0 +1,211 @@
+"""
+Response-level cache for /chat and course insights.
+
+Entries are keyed by (data tag, course_id, course revision, query key):
+- data tag: identifies the loaded files + model (DataSnapshot.data_tag), so a reload
+  of changed data or a new model never serves old answers
+- course revision: bumped by in-place student updates (PATCH) for that course
+- query key: intent + extracted entities for chat (`chat_key`), so paraphrases of the
+  same question share an entry; fallback (course notes) questions key on the
+  normalized text since retrieval depends on every word
+
+Local tier: LRU over pickled values with a byte budget and a TTL. Optional shared
+tier (Redis, `redis_url`) lets several API workers reuse each other's answers; it is
+only consulted for courses without local in-place updates, whose data every worker
+loaded identically from the same files.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import hashlib
+import logging
+import pickle
+import threading
+import time
+
+from .intent_router import FALLBACK, ParsedMessage, normalize
+
+try:  # optional: shared tier
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - depends on environment
+    aioredis = None
+
+
+log = logging.getLogger(__name__)
+
+# Per-entry bookkeeping counted against the byte budget on top of the value itself
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def chat_key(parsed: ParsedMessage, message: str) -> tuple:
+    """Everything `answer` depends on besides the data: intent and entities."""
+    key = (
+        "chat",
+        parsed.intent,
+        tuple(parsed.student_ids),
+        tuple(parsed.assignment_ids),
+        tuple((c.field, c.op, c.value, c.upper) for c in parsed.conditions),
+        parsed.rank,
+    )
+    if parsed.intent == FALLBACK:
+        key += (normalize(message),)
+    return key
+
+
+class RedisBackend:
+    """Shared tier. Errors are logged and treated as misses; the local tier keeps working."""
+
+    def __init__(self, url: str, prefix: str = "tpa:response:"):
+        if aioredis is None:
+            raise RuntimeError("redis_url is set but the 'redis' package is not installed (pip install redis).")
+        self._client = aioredis.from_url(url)
+        self.prefix = prefix
+        self.errors = 0
+
+    def _name(self, key: tuple) -> str:
+        return self.prefix + hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    async def get(self, key: tuple) -> bytes | None:
+        try:
+            return await self._client.get(self._name(key))
+        except Exception as e:
+            self.errors += 1
+            log.warning("Shared response cache get failed: %s", e)
+            return None
+
+    async def set(self, key: tuple, blob: bytes, ttl_seconds: float) -> None:
+        try:
+            await self._client.set(self._name(key), blob, px=max(1, int(ttl_seconds * 1000)))
+        except Exception as e:
+            self.errors += 1
+            log.warning("Shared response cache set failed: %s", e)
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 300.0,
+        shared: RedisBackend | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._clock = clock
+        # key -> (expires_at, size, pickled value); oldest use first
+        self._entries: OrderedDict[tuple, tuple[float, int, bytes]] = OrderedDict()
+        self._revisions: dict[str, int] = {}
+        self._patched: set[str] = set()  # courses updated in place since the last swap
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def key(self, data_tag: str, course_id: str, query_key: Hashable) -> tuple:
+        """Take the key before computing, so an update racing the computation can't be cached as fresh."""
+        return (data_tag, course_id, self._revisions.get(course_id, 0), query_key)
+
+    async def get(self, full: tuple) -> Any | None:
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            e = self._entries.get(full)
+            if e is not None and e[0] <= now:
+                self._drop(full)
+                self.expirations += 1
+                e = None
+            if e is not None:
+                self._entries.move_to_end(full)
+                self.hits += 1
+                return pickle.loads(e[2])
+
+        if self._share(full):
+            blob = await self.shared.get(self._shared_key(full))
+            if blob is not None:
+                self.shared_hits += 1
+                self._store(full, blob)
+                return pickle.loads(blob)
+        self.misses += 1
+        return None
+
+    async def put(self, full: tuple, value: Any) -> None:
+        if not self.enabled:
+            return
+        if full[2] != self._revisions.get(full[1], 0):
+            return  # the course was updated while this answer was computed
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._store(full, blob)
+        if self._share(full):
+            await self.shared.set(self._shared_key(full), blob, self.ttl_seconds)
+
+    def _share(self, full: tuple) -> bool:
+        return self.shared is not None and full[1] not in self._patched
+
+    @staticmethod
+    def _shared_key(full: tuple) -> tuple:
+        # Revisions are per process; unpatched data is identical across workers with the same tag
+        data_tag, course_id, _, query_key = full
+        return (data_tag, course_id, query_key)
+
+    def _store(self, full: tuple, blob: bytes) -> None:
+        size = len(blob) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if full in self._entries:
+                self._drop(full)
+            while self.bytes + size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[full] = (self._clock() + self.ttl_seconds, size, blob)
+            self.bytes += size
+
+    def _drop(self, full: tuple) -> None:
+        self.bytes -= self._entries.pop(full)[1]
+
+    def invalidate_course(self, course_id: str) -> None:
+        """After an in-place update: that course's entries become unreachable and are dropped."""
+        with self._lock:
+            self._revisions[course_id] = self._revisions.get(course_id, 0) + 1
+            self._patched.add(course_id)
+            for full in [k for k in self._entries if k[1] == course_id]:
+                self._drop(full)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """On snapshot swap. The new data matches its files again, so sharing resumes."""
+        with self._lock:
+            self._entries.clear()
+            self._patched.clear()
+            self.bytes = 0
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "shared": "redis" if self.shared is not None else None,
+            "shared_errors": self.shared.errors if self.shared is not None else 0,
+        }
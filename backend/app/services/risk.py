@@ -0,0 +1,118 @@
+"""
+Calibrated fail-probability classifier, served alongside the grade regressor.
+
+- logistic regression on the grade features, trained on the dataset's `label`
+  column (1 = failed / at risk)
+- isotonic calibration fitted on out-of-fold scores, so a predicted 30% matches an
+  observed ~30% fail rate rather than the logistic's own curve
+- serving is one matrix-vector product, a sigmoid and `np.interp` over the
+  calibration knots: vectorized, no sklearn call per request, and small enough to
+  store in the compact artifact's JSON
+
+Without a classifier (no label column, older artifacts) GradePredictor falls back
+to its logistic curve around the predicted grade.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+CALIBRATION_FOLDS = 5
+# Below this many labelled rows per class the calibration map is mostly noise
+MIN_ROWS_PER_CLASS = 20
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-z))
+
+
+def brier(p: np.ndarray, y: np.ndarray) -> float:
+    return float(np.mean((np.asarray(p, dtype=np.float64) - y) ** 2))
+
+
+@dataclass(frozen=True)
+class FailClassifier:
+    features: list[str]
+    weights: np.ndarray    # logistic coefficients on raw features (standardization folded in)
+    intercept: float
+    medians: np.ndarray    # NaN imputation
+    knots_x: np.ndarray    # isotonic map: raw probability -> calibrated probability
+    knots_y: np.ndarray
+    metrics: dict = field(default_factory=dict, compare=False)
+
+    @staticmethod
+    def train(df: pd.DataFrame, features: list[str], seed: int = 42) -> "FailClassifier | None":
+        """None if `df` has no usable label column (missing, or too few of either class)."""
+        if "label" not in df:
+            return None
+        labelled = df[df["label"].notna()]
+        y = labelled["label"].to_numpy(dtype=np.int64)
+        if min(np.count_nonzero(y), np.count_nonzero(y == 0)) < MIN_ROWS_PER_CLASS:
+            return None
+        X = labelled[features].apply(pd.to_numeric, errors="coerce").astype(np.float64)
+        medians = X.median().to_numpy(dtype=np.float64)
+        X = X.fillna(dict(zip(features, medians))).to_numpy()
+
+        pipeline = make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))
+        folds = StratifiedKFold(CALIBRATION_FOLDS, shuffle=True, random_state=seed)
+        raw = cross_val_predict(pipeline, X, y, cv=folds, method="predict_proba")[:, 1]
+        iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(raw, y)
+        pipeline.fit(X, y)
+
+        scaler, lr = pipeline[0], pipeline[-1]
+        weights = lr.coef_[0] / scaler.scale_
+        return FailClassifier(
+            features=list(features),
+            weights=weights,
+            intercept=float(lr.intercept_[0] - scaler.mean_ @ weights),
+            medians=medians,
+            knots_x=iso.X_thresholds_.astype(np.float64),
+            knots_y=iso.y_thresholds_.astype(np.float64),
+            metrics={
+                "rows": len(y),
+                "fail_rate": float(y.mean()),
+                # Out-of-fold scores; the calibrated figure reuses them to fit the map
+                "brier_raw": brier(raw, y),
+                "brier_calibrated": brier(iso.predict(raw), y),
+            },
+        )
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Calibrated P(fail) for an (n_rows, len(features)) matrix."""
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if X.shape[0] == 0:
+            return np.empty(0)
+        nan = np.isnan(X)
+        if nan.any():
+            X[nan] = np.broadcast_to(self.medians, X.shape)[nan]
+        return np.interp(_sigmoid(X @ self.weights + self.intercept), self.knots_x, self.knots_y)
+
+    def to_dict(self) -> dict:
+        return {
+            "features": self.features,
+            "weights": self.weights.tolist(),
+            "intercept": self.intercept,
+            "medians": self.medians.tolist(),
+            "knots_x": self.knots_x.tolist(),
+            "knots_y": self.knots_y.tolist(),
+            "metrics": self.metrics,
+        }
+
+    @staticmethod
+    def from_dict(d: dict) -> "FailClassifier":
+        return FailClassifier(
+            features=list(d["features"]),
+            weights=np.asarray(d["weights"], dtype=np.float64),
+            intercept=float(d["intercept"]),
+            medians=np.asarray(d["medians"], dtype=np.float64),
+            knots_x=np.asarray(d["knots_x"], dtype=np.float64),
+            knots_y=np.asarray(d["knots_y"], dtype=np.float64),
+            metrics=d.get("metrics", {}),
+        )
@@ -0,0 +1,171 @@
+"""
+Declarative rule tables evaluated as boolean masks.
+
+A rule is (name, level, conditions, message template); it fires when any of its
+(feature, comparator, threshold) conditions holds. `RuleTable.evaluate` compares
+whole feature columns at once, producing one (n_rows, n_rules) mask for a course
+(or a single student), with rules pre-ordered by level so every row's hits come
+out highest level first, ties in table order.
+
+RuleHits keeps the masks and inputs, and only formats messages for the rows asked
+for: `for_row(i)` -> list of dicts, `names()` -> ";"-joined rule names per row,
+`first()` -> top rule name per row.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from string import Formatter
+from typing import Iterable, Mapping
+import numpy as np
+
+
+COMPARATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+LEVELS = {"high": 0, "medium": 1, "low": 2}
+
+
+@dataclass(frozen=True)
+class Condition:
+    feature: str
+    comparator: str
+    threshold: float
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    level: str
+    when: tuple[Condition, ...]  # fires if any condition holds
+    message: str                 # str.format template over the row's features
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        """Features the message template refers to."""
+        return tuple(dict.fromkeys(f for _, f, _, _ in Formatter().parse(self.message) if f))
+
+    @staticmethod
+    def of(name: str, level: str, message: str, *conditions: tuple[str, str, float]) -> "Rule":
+        for feature, comparator, threshold in conditions:
+            if comparator not in COMPARATORS:
+                raise ValueError(f"Unknown comparator {comparator!r} in rule {name!r}.")
+        if level not in LEVELS:
+            raise ValueError(f"Unknown level {level!r} in rule {name!r}.")
+        return Rule(name, level, tuple(Condition(*c) for c in conditions), message)
+
+
+class RuleTable:
+    """
+    Ordered rules plus the output shape of one hit: output key -> "name" | "level" | "message", e.g.
+    keys={"factor": "name", "severity": "level", "detail": "message"}.
+    `fallback` is reported for rows where no rule fires.
+    """
+
+    def __init__(self, rules: Iterable[Rule], keys: Mapping[str, str], fallback: Rule | None = None):
+        rules = list(rules)
+        # Stable: within a level, table order is kept
+        self.rules = sorted(rules, key=lambda r: LEVELS[r.level])
+        if sorted(keys.values()) != ["level", "message", "name"]:
+            raise ValueError(f"keys must map to name, level and message, got {dict(keys)!r}.")
+        self.keys = dict(keys)
+        self.fallback = fallback
+        self.features = list(dict.fromkeys(c.feature for r in rules for c in r.when))
+
+    def masks(self, cols: Mapping[str, np.ndarray]) -> np.ndarray:
+        """(n_rows, n_rules) bool; NaN features never fire a condition."""
+        n = len(next(iter(cols.values()))) if cols else 0
+        out = np.zeros((n, len(self.rules)), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for j, rule in enumerate(self.rules):
+                for c in rule.when:
+                    out[:, j] |= COMPARATORS[c.comparator](cols[c.feature], c.threshold)
+        return out
+
+    def evaluate(self, cols: Mapping[str, np.ndarray]) -> "RuleHits":
+        cols = {f: np.asarray(cols[f], dtype=np.float64) for f in self.features}
+        return RuleHits(table=self, cols=cols, masks=self.masks(cols))
+
+    def evaluate_row(self, row: Mapping) -> list[dict]:
+        """Hits for one student given as a mapping of feature -> value."""
+        return self.evaluate({f: [float(row[f])] for f in self.features}).for_row(0)
+
+    def hit(self, rule: Rule, values: Mapping[str, float]) -> dict:
+        return self._shape(rule)(rule.message.format(**values))
+
+    def hits(self, rule: Rule, cols: Mapping[str, np.ndarray], rows: np.ndarray) -> list[dict]:
+        """`hit` for many rows; only the template's features are read."""
+        shape, fields, fmt = self._shape(rule), rule.fields, rule.message.format
+        if not fields:
+            return [shape(rule.message) for _ in range(len(rows))]
+        values = zip(*(cols[f][rows].tolist() for f in fields))
+        return [shape(fmt(**dict(zip(fields, v)))) for v in values]
+
+    def _shape(self, rule: Rule):
+        """message -> hit dict, keys in table order."""
+        out = tuple(self.keys)
+        parts = [None if a == "message" else getattr(rule, a) for a in self.keys.values()]
+        at = list(self.keys.values()).index("message")
+
+        def shape(message: str) -> dict:
+            parts[at] = message
+            return dict(zip(out, parts))
+        return shape
+
+
+@dataclass(frozen=True)
+class RuleHits:
+    table: RuleTable
+    cols: dict[str, np.ndarray]
+    masks: np.ndarray
+
+    def __len__(self) -> int:
+        return self.masks.shape[0]
+
+    def for_row(self, i: int) -> list[dict]:
+        values = {f: float(x[i]) for f, x in self.cols.items()}
+        rules = self.table.rules
+        hits = [self.table.hit(rules[j], values) for j in np.flatnonzero(self.masks[i])]
+        if not hits and self.table.fallback is not None:
+            hits = [self.table.hit(self.table.fallback, values)]
+        return hits
+
+    def lists(self) -> list[list[dict]]:
+        """`for_row` for every row, built rule by rule."""
+        out: list[list[dict]] = [[] for _ in range(len(self))]
+        for j, rule in enumerate(self.table.rules):
+            rows = np.flatnonzero(self.masks[:, j])
+            for i, h in zip(rows.tolist(), self.table.hits(rule, self.cols, rows)):
+                out[i].append(h)
+        if self.table.fallback is not None:
+            rows = np.flatnonzero(~self.masks.any(axis=1))
+            for i, h in zip(rows.tolist(), self.table.hits(self.table.fallback, self.cols, rows)):
+                out[i].append(h)
+        return out
+
+    def names(self, sep: str = ";") -> np.ndarray:
+        """Per row, the names of the rules that fired, joined in output order."""
+        # Label each distinct hit pattern once, then broadcast
+        codes, inverse = np.unique(self.codes(), return_inverse=True)
+        rules = self.table.rules
+        labels = [sep.join(r.name for j, r in enumerate(rules) if int(c) >> j & 1) for c in codes]
+        return np.array(labels, dtype=object)[inverse.reshape(-1)]
+
+    def codes(self) -> np.ndarray:
+        """Per row, the hit pattern as a bit set (bit j = rule j fired); Python ints past 63 rules."""
+        k = self.masks.shape[1]
+        if k < 64:
+            return self.masks.astype(np.int64) @ (np.int64(1) << np.arange(k, dtype=np.int64))
+        return np.array([sum(1 << int(j) for j in np.flatnonzero(m)) for m in self.masks], dtype=object)
+
+    def first(self) -> np.ndarray:
+        """Per row, the top rule's name (the fallback's, or "", when none fired)."""
+        default = self.table.fallback.name if self.table.fallback is not None else ""
+        names = np.array([r.name for r in self.table.rules] + [default], dtype=object)
+        any_hit = self.masks.any(axis=1)
+        idx = np.where(any_hit, self.masks.argmax(axis=1), len(self.table.rules))
+        return names[idx]
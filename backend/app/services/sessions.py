@@ -0,0 +1,224 @@
+"""
+Server-side chat sessions: who/what the conversation is about, so follow-ups don't
+have to repeat it and clients don't have to resend the transcript.
+
+- keyed by (teacher_id, session_id); the API issues a session_id on the first turn
+  and clients send only that token afterwards
+- each session holds the resolved entities (course, current student, current
+  assignment) and its most recent answers, pickled and keyed like the response
+  cache (data tag + course revision + query key), so a follow-up that comes back to
+  an earlier question reuses that result even after the shared cache evicted it
+- bounded: LRU over sessions within a byte budget, idle sessions expire after a TTL
+- `ChatRequest.history` seeds a session the server doesn't know (new, expired or
+  evicted) and is ignored otherwise
+
+Follow-ups are resolved before the response-cache key is taken: "what can we do to
+help them?" after a question about S100100 becomes the same query (and cache key) as
+"give recommendations to help S100100 pass". Only messages that name no student and
+no cohort, and refer back to someone ("they", "her", "this student"), are resolved.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Iterable
+import pickle
+import re
+import secrets
+import threading
+import time
+
+from .chat_orchestrator import STUDENT_INTENTS
+from .cohort import CohortQuery
+from .intent_router import IntentRouter, ParsedMessage
+
+
+# Per-session bookkeeping counted against the byte budget on top of stored results
+SESSION_OVERHEAD_BYTES = 500
+
+# Questions about "them" that the main rules leave to the fallback (keywords only, first match wins)
+FOLLOWUP_RULES: list[dict] = [
+    {"intent": "prescribe", "any": ["help", "support", "what can we do", "what should"]},
+    {"intent": "grade_drivers", "any": ["why", "pulling", "holding", "struggling", "behind"]},
+    {"intent": "predict_outcome", "any": ["pass", "fail", "final", "by the end"]},
+    {"intent": "student_status", "any": ["doing", "status", "update"]},
+]
+FOLLOWUP_ROUTER = IntentRouter(FOLLOWUP_RULES)
+
+STUDENT_REFERENCE = re.compile(r"\b(?:they|them|their|he|him|his|she|her|(?:this|that|the) student)\b", re.I)
+ASSIGNMENT_REFERENCE = re.compile(r"\b(?:it|that one|(?:this|that|the) assignment)\b", re.I)
+
+
+@dataclass
+class SessionContext:
+    teacher_id: str
+    session_id: str
+    course_id: str
+    student_id: str | None = None
+    assignment_id: str | None = None
+    turns: int = 0
+    # response-cache key -> pickled (answer, cited, followups); oldest first
+    results: OrderedDict[tuple, bytes] = field(default_factory=OrderedDict)
+    expires_at: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return SESSION_OVERHEAD_BYTES + sum(len(b) for b in self.results.values())
+
+    def observe(self, parsed: ParsedMessage) -> None:
+        """Remember the entities a (resolved) message was about."""
+        if len(parsed.student_ids) == 1:
+            self.student_id = parsed.student_ids[0]
+        elif parsed.student_ids:
+            self.student_id = None  # several students: "them" is ambiguous
+        if parsed.assignment_ids:
+            self.assignment_id = parsed.assignment_ids[0]
+        self.turns += 1
+
+
+def resolve_followup(parsed: ParsedMessage, message: str, context: SessionContext | None) -> ParsedMessage:
+    """Fill in the student / assignment a follow-up refers back to; anything else is returned as is."""
+    if context is None:
+        return parsed
+    if (context.student_id and not parsed.student_ids and CohortQuery.from_parsed(parsed, message) is None
+            and STUDENT_REFERENCE.search(message)):
+        intent = parsed.intent
+        if intent not in STUDENT_INTENTS:
+            intent = FOLLOWUP_ROUTER.route(message)
+        if intent in STUDENT_INTENTS:
+            return replace(parsed, intent=intent, student_ids=[context.student_id])
+    if context.assignment_id and not parsed.assignment_ids and ASSIGNMENT_REFERENCE.search(message):
+        return replace(parsed, assignment_ids=[context.assignment_id])
+    return parsed
+
+
+class SessionStore:
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 1800.0,
+        max_results: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_results = max_results
+        self._clock = clock
+        # (teacher_id, session_id) -> context; least recently used first
+        self._sessions: OrderedDict[tuple[str, str], SessionContext] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.created = 0
+        self.resumed = 0
+        self.seeded = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.result_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def open(
+        self,
+        teacher_id: str,
+        session_id: str | None,
+        course_id: str,
+        history: Iterable[str] = (),
+        router: IntentRouter | None = None,
+    ) -> SessionContext:
+        """
+        The session for this token, or a new one (a fresh token if none was sent).
+        A new session replays `history` (earlier user messages, oldest first) through
+        `router` to recover its entities. Switching course starts the entities over.
+        """
+        now = self._clock()
+        key = (teacher_id, session_id or "")
+        with self._lock:
+            ctx = self._sessions.get(key) if session_id else None
+            if ctx is not None and ctx.expires_at <= now:
+                self._drop(key)
+                self.expirations += 1
+                ctx = None
+            if ctx is not None:
+                self._sessions.move_to_end(key)
+                self.resumed += 1
+                if ctx.course_id != course_id:
+                    ctx.course_id, ctx.student_id, ctx.assignment_id = course_id, None, None
+                ctx.expires_at = now + self.ttl_seconds
+                return ctx
+
+        ctx = SessionContext(teacher_id, session_id or secrets.token_urlsafe(16), course_id,
+                             expires_at=now + self.ttl_seconds)
+        history = list(history)
+        if history and router is not None:
+            for message in history:
+                ctx.observe(resolve_followup(router.parse(message), message, ctx))
+            self.seeded += 1
+        self.created += 1
+        if self.enabled:
+            with self._lock:
+                self._sessions[(teacher_id, ctx.session_id)] = ctx
+                self.bytes += ctx.size
+                self._evict(now)
+        return ctx
+
+    def result(self, ctx: SessionContext, key: tuple) -> Any | None:
+        with self._lock:
+            blob = ctx.results.get(key)
+            if blob is None:
+                return None
+            ctx.results.move_to_end(key)
+            self.result_hits += 1
+        return pickle.loads(blob)
+
+    def record(self, ctx: SessionContext, parsed: ParsedMessage, key: tuple | None = None, value: Any = None) -> None:
+        """After answering: remember the entities and (optionally) the answer under its cache key."""
+        with self._lock:
+            tracked = self._sessions.get((ctx.teacher_id, ctx.session_id)) is ctx
+            before = ctx.size
+            ctx.observe(parsed)
+            if key is not None and self.max_results > 0:
+                ctx.results.pop(key, None)
+                ctx.results[key] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                while len(ctx.results) > self.max_results:
+                    ctx.results.popitem(last=False)
+            if tracked:
+                self._sessions.move_to_end((ctx.teacher_id, ctx.session_id))
+                self.bytes += ctx.size - before
+                self._evict(self._clock())
+
+    def _evict(self, now: float) -> None:
+        # Least recently used first, so expired sessions are all at the front
+        while self._sessions and next(iter(self._sessions.values())).expires_at <= now:
+            self._drop(next(iter(self._sessions)))
+            self.expirations += 1
+        # The session just used is last; it goes only if it alone exceeds the budget
+        while self.bytes > self.max_bytes and self._sessions:
+            self._drop(next(iter(self._sessions)))
+            self.evictions += 1
+
+    def _drop(self, key: tuple[str, str]) -> None:
+        self.bytes -= self._sessions.pop(key).size
+
+    def clear_results(self) -> None:
+        """On snapshot swap: old results can't match the new data tag; entities are kept."""
+        with self._lock:
+            for ctx in self._sessions.values():
+                ctx.results.clear()
+            self.bytes = SESSION_OVERHEAD_BYTES * len(self._sessions)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sessions": len(self._sessions),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "created": self.created,
+            "resumed": self.resumed,
+            "seeded_from_history": self.seeded,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "result_hits": self.result_hits,
+        }
@@ -0,0 +1,243 @@
+"""
+Versioned data/model snapshots with hot reload.
+
+Everything a request needs (stores, predictor, retriever) lives in one immutable
+DataSnapshot. Handlers grab `manager.current` once and use it to the end, so a
+reload that swaps in a new snapshot never changes data under an in-flight request.
+
+Reloads are built off the request path (background thread) and triggered either
+explicitly or by a poller that watches the data file and artifact directory.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+import hashlib
+import logging
+import threading
+import time
+
+from .data_repo import CourseDataRepo
+from .dense import DenseCourseRetriever, with_retrieval_mode
+from .intent_router import DEFAULT_ROUTER, IntentRouter
+from .predictive import GradePredictor, load_predictor
+from .rag import COURSE_NOTES, CourseRetriever
+from .store import AssignmentStore, StudentStore, SubmissionStore
+from .training import ModelRegistry
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    version: int
+    students: StudentStore
+    assignments: AssignmentStore
+    predictor: GradePredictor
+    retriever: CourseRetriever | DenseCourseRetriever
+    router: IntentRouter
+    loaded_at: float
+    load_seconds: float
+    data_tag: str = ""  # same files + model -> same tag, in every process
+    submissions: SubmissionStore | None = None  # student x assignment results, if the data has them
+
+
+def build_snapshot(
+    version: int,
+    data_path: Path,
+    artifacts_dir: Path,
+    inference_engine: str = "auto",
+    retrieval_index_dir: Path | None = None,
+    retrieval_mode: str = "keyword",
+    intent_rules_path: Path | None = None,
+) -> DataSnapshot:
+    """Load tables, build indexes, load (or train) the model and warm its cache."""
+    t0 = time.perf_counter()
+    # Taken before reading, so a file changed mid-build gets a new tag on the next reload
+    files = fingerprint([p for p in (data_path, artifacts_dir, intent_rules_path) if p is not None])
+
+    # students table (one row per student per course), assignments aggregated table
+    # (one row per assignment per course) and, if present, submissions (student x assignment)
+    students_table, assignments_table, submissions_table = CourseDataRepo(data_path=Path(data_path)).load_dataset()
+
+    # Indexed, per-course partitioned views used by request handlers. With per-student
+    # submissions, assignment aggregates are computed from them once, here
+    student_store = StudentStore.from_table(students_table)
+    if submissions_table is not None:
+        submission_store = SubmissionStore.from_table(submissions_table, student_store)
+        assignment_store = AssignmentStore.from_submissions(assignments_table, submission_store)
+    else:
+        submission_store = None
+        assignment_store = AssignmentStore.from_table(assignments_table)
+
+    # Latest trained artifact (scripts/train_models.py), else a pre-registry pickle,
+    # else a cheap baseline; full training never runs in the serving process
+    artifacts = Path(artifacts_dir)
+    predictor = ModelRegistry(artifacts).load()
+    if predictor is None and (artifacts / "grade_predictor.pkl").exists():
+        predictor = load_predictor(artifacts)
+    if predictor is None:
+        predictor = GradePredictor.fit_baseline(students_table.to_frame())
+
+    predictor.use_engine(inference_engine)
+
+    # Predictions only change with features or model, so score everyone once up front
+    predictor.warm_cache(student_store)
+
+    # Persisted (memory-mapped) retrieval index if one was built, else the built-in notes
+    if retrieval_index_dir is not None and (Path(retrieval_index_dir) / "_shared" / "manifest.json").exists():
+        retriever = CourseRetriever.load(Path(retrieval_index_dir))
+    else:
+        retriever = CourseRetriever.build(COURSE_NOTES)
+    # Dense embeddings are derived from the same documents at load time
+    retriever = with_retrieval_mode(retriever, retrieval_mode)
+
+    # Chat routing table; the built-in rules unless a JSON table is configured
+    if intent_rules_path is not None and Path(intent_rules_path).exists():
+        router = IntentRouter.from_json(Path(intent_rules_path))
+    else:
+        router = DEFAULT_ROUTER
+
+    return DataSnapshot(
+        version=version,
+        students=student_store,
+        assignments=assignment_store,
+        submissions=submission_store,
+        predictor=predictor,
+        retriever=retriever,
+        router=router,
+        loaded_at=time.time(),
+        load_seconds=time.perf_counter() - t0,
+        data_tag=hashlib.blake2b(repr((files, predictor.version)).encode(), digest_size=8).hexdigest(),
+    )
+
+
+def fingerprint(paths: list[Path]) -> tuple:
+    """(path, mtime, size) of every watched file; directories are walked."""
+    items = []
+    for p in paths:
+        if not p.exists():
+            items.append((str(p), None, None))
+            continue
+        files = sorted(f for f in p.rglob("*") if f.is_file()) if p.is_dir() else [p]
+        for f in files:
+            st = f.stat()
+            items.append((str(f), st.st_mtime_ns, st.st_size))
+    return tuple(items)
+
+
+class SnapshotManager:
+    """
+    Holds the current snapshot and swaps in new ones atomically.
+    `build(version)` does the heavy lifting (load tables, load/train model, warm caches).
+    """
+
+    def __init__(
+        self,
+        build: Callable[[int], DataSnapshot],
+        watch_paths: list[Path],
+        poll_seconds: float = 0.0,
+    ):
+        self._build = build
+        self._watch_paths = watch_paths
+        self._poll_seconds = poll_seconds
+        self._current: DataSnapshot | None = None
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._fingerprint: tuple = ()
+        self._listeners: list[Callable[[DataSnapshot], None]] = []
+        self.reloads = 0
+        self.last_error: str | None = None
+        self.reloading = False
+
+    @property
+    def current(self) -> DataSnapshot:
+        snap = self._current
+        if snap is None:
+            raise RuntimeError("No data snapshot loaded yet.")
+        return snap
+
+    @property
+    def ready(self) -> bool:
+        return self._current is not None
+
+    def on_swap(self, fn: Callable[[DataSnapshot], None]) -> None:
+        """Register a callback run after every swap (e.g. to drop derived caches)."""
+        self._listeners.append(fn)
+
+    def reload(self) -> DataSnapshot:
+        """Build a new snapshot and swap it in. Concurrent callers wait for the running build."""
+        with self._build_lock:
+            # Taken before building, so files changed mid-build trigger another reload
+            files = fingerprint(self._watch_paths)
+            self.reloading = True
+            try:
+                version = self._current.version + 1 if self._current else 1
+                snap = self._build(version)
+                self._fingerprint = files
+                self._current = snap
+                self.reloads += 1
+                self.last_error = None
+            except Exception as e:
+                # Don't retry the same broken files on every poll
+                self._fingerprint = files
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self.reloading = False
+        for fn in self._listeners:
+            fn(snap)
+        log.info("Loaded snapshot v%d in %.2fs", snap.version, snap.load_seconds)
+        return snap
+
+    def reload_in_background(self) -> bool:
+        """Start a reload thread unless one is already running. Returns True if started."""
+        if self.reloading:
+            return False
+        threading.Thread(target=self._safe_reload, name="snapshot-reload", daemon=True).start()
+        return True
+
+    def _safe_reload(self) -> None:
+        try:
+            self.reload()
+        except Exception:
+            log.exception("Snapshot reload failed; keeping v%s", self._current.version if self._current else None)
+
+    def changed(self) -> bool:
+        return fingerprint(self._watch_paths) != self._fingerprint
+
+    def start_watching(self) -> None:
+        if self._poll_seconds <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="snapshot-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self._poll_seconds + 1)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self._poll_seconds):
+            if not self.reloading and self.changed():
+                self._safe_reload()
+
+    def stats(self) -> dict:
+        snap = self._current
+        return {
+            "version": snap.version if snap else None,
+            "model_version": snap.predictor.version if snap else None,
+            "loaded_at": snap.loaded_at if snap else None,
+            "load_seconds": snap.load_seconds if snap else None,
+            "age_seconds": time.time() - snap.loaded_at if snap else None,
+            "students": len(snap.students) if snap else 0,
+            "reloads": self.reloads,
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+            "watching": self._watcher is not None,
+        }
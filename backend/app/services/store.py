@@ -0,0 +1,347 @@
+"""
+In-memory student and assignment stores.
+
+Built once at startup from the students/assignments tables so request handlers
+never scan the full roster:
+- O(1) lookup of a student row by (course_id, student_id)
+- numeric columns kept in one float64 matrix, column-major so each column is contiguous
+- course_id / student_id dictionary-encoded as int32 codes
+- per-course partitions pre-sorted by current_grade (students) and avg_score (assignments),
+  so threshold queries are a binary search and top-N is a slice
+- submissions (student x assignment) indexed by (course_id, assignment_id), weakest
+  first, and by student row, in due order; per-assignment aggregates and per-student
+  score trends are vectorized group-bys computed once per snapshot
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+import numpy as np
+import pandas as pd
+
+from .data_repo import ColumnarTable, STUDENT_NUMERIC_COLS, STUDENT_STRING_COLS, SUBMISSION_NUMERIC_COLS
+
+
+# Numeric columns kept in the store (target/label columns are optional)
+NUMERIC_COLS = STUDENT_NUMERIC_COLS
+
+
+ASSIGNMENT_COLS = ["assignment_id", "assignment_name", "avg_score", "submission_rate"]
+SUBMISSION_STATS_COLS = ["course_id", "assignment_id", "avg_score", "submission_rate", "late_rate", "students"]
+
+
+@dataclass(frozen=True)
+class CoursePartition:
+    rows: np.ndarray    # store rows for one course, ascending current_grade (NaN last)
+    grades: np.ndarray  # current_grade of those rows, same order
+
+
+def _partition(course_codes: np.ndarray, courses: np.ndarray, grade: np.ndarray) -> dict[str, CoursePartition]:
+    order = np.lexsort((grade, course_codes))
+    sorted_codes = course_codes[order]
+    bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+    parts = {}
+    for rows in np.split(order, bounds):
+        if rows.size:
+            parts[courses[course_codes[rows[0]]]] = CoursePartition(rows=rows, grades=grade[rows])
+    return parts
+
+
+@dataclass(frozen=True)
+class StudentStore:
+    columns: tuple[str, ...]
+    values: np.ndarray          # (n_rows, n_cols) float64, Fortran-ordered
+    course_codes: np.ndarray    # (n_rows,) int32 -> courses
+    student_codes: np.ndarray   # (n_rows,) int32 -> students
+    courses: np.ndarray         # dictionary of course_id strings
+    students: np.ndarray        # dictionary of student_id strings
+    index: dict[tuple[str, str], int]
+    partitions: dict[str, CoursePartition]
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame) -> "StudentStore":
+        return StudentStore.from_table(ColumnarTable.from_frame(df, NUMERIC_COLS, STUDENT_STRING_COLS))
+
+    @staticmethod
+    def from_table(table: ColumnarTable) -> "StudentStore":
+        """Wrap a (possibly memory-mapped) students table without copying its columns."""
+        columns = table.numeric_columns
+        values = table.values
+        course_codes = np.asarray(table.codes["course_id"], dtype=np.int32)
+        student_codes = np.asarray(table.codes["student_id"], dtype=np.int32)
+        courses = table.dictionaries["course_id"]
+        students = table.dictionaries["student_id"]
+
+        # First occurrence wins, matching the old `row.iloc[0]` behaviour
+        index: dict[tuple[str, str], int] = {}
+        for i, key in enumerate(zip(courses[course_codes].tolist(), students[student_codes].tolist())):
+            index.setdefault(key, i)
+
+        grade = values[:, columns.index("current_grade")] if "current_grade" in columns else np.full(len(table), np.nan)
+
+        return StudentStore(
+            columns=columns,
+            values=values,
+            course_codes=course_codes,
+            student_codes=student_codes,
+            courses=courses,
+            students=students,
+            index=index,
+            partitions=_partition(course_codes, courses, grade),
+        )
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def find(self, course_id: str, student_id: str) -> int | None:
+        return self.index.get((course_id, student_id))
+
+    def locate(self, course_id: str, student_id: str) -> int:
+        row = self.index.get((course_id, student_id))
+        if row is None:
+            raise ValueError(f"Student {student_id} not found in course {course_id}.")
+        return row
+
+    def course_rows(self, course_id: str) -> np.ndarray:
+        """All rows of a course, ascending current_grade. A view, not a copy."""
+        part = self.partitions.get(course_id)
+        return part.rows if part is not None else np.empty(0, dtype=np.intp)
+
+    def below(self, course_id: str, threshold: float) -> np.ndarray:
+        """Rows of a course with current_grade < threshold, lowest first (binary search + slice)."""
+        part = self.partitions.get(course_id)
+        if part is None:
+            return np.empty(0, dtype=np.intp)
+        return part.rows[: np.searchsorted(part.grades, threshold, side="left")]
+
+    def update(self, course_id: str, student_id: str, changes: Mapping[str, float]) -> int:
+        """
+        Overwrite numeric fields of one student in place and return the row.
+        The course partition is re-sorted only when current_grade changes.
+        """
+        row = self.locate(course_id, student_id)
+        unknown = set(changes) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown student fields: {', '.join(sorted(unknown))}.")
+        for name, value in changes.items():
+            self.values[row, self.columns.index(name)] = float(value)
+
+        if "current_grade" in changes:
+            rows = self.partitions[course_id].rows
+            grade = self.column("current_grade")[rows]
+            order = np.argsort(grade, kind="stable")
+            self.partitions[course_id] = CoursePartition(rows=rows[order], grades=grade[order])
+        return row
+
+    def column(self, name: str) -> np.ndarray:
+        """Contiguous view of one numeric column (NaN-filled if the column is absent)."""
+        if name not in self.columns:
+            return np.full(len(self), np.nan)
+        return self.values[:, self.columns.index(name)]
+
+    def features(self, rows: int | Iterable[int] | np.ndarray, names: Iterable[str]) -> np.ndarray:
+        """Return a C-contiguous (n_rows, n_features) matrix for the given rows."""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        names = list(names)
+        out = np.empty((len(rows), len(names)), dtype=np.float64)
+        for j, c in enumerate(names):
+            out[:, j] = self.column(c)[rows]
+        return out
+
+    def student_ids(self, rows: np.ndarray) -> np.ndarray:
+        return self.students[self.student_codes[rows]]
+
+    def record(self, row: int) -> dict:
+        """One student row as a plain dict (ids + numeric columns)."""
+        r = {
+            "course_id": self.courses[self.course_codes[row]],
+            "student_id": self.students[self.student_codes[row]],
+        }
+        r.update(zip(self.columns, self.values[row].tolist()))
+        return r
+
+
+@dataclass(frozen=True)
+class AssignmentStore:
+    by_course: dict[str, list[dict]]   # course_id -> records, ascending avg_score
+    scores: dict[str, np.ndarray]      # course_id -> avg_score, same order
+
+    @staticmethod
+    def from_table(table: ColumnarTable) -> "AssignmentStore":
+        return AssignmentStore.from_frame(table.to_frame())
+
+    @staticmethod
+    def from_submissions(table: ColumnarTable, submissions: "SubmissionStore") -> "AssignmentStore":
+        """Names from the assignments table; avg_score / submission_rate recomputed from submissions."""
+        names = table.to_frame()[["course_id", "assignment_id", "assignment_name"]].astype(str)
+        stats = submissions.stats.merge(names, on=["course_id", "assignment_id"], how="left")
+        stats["assignment_name"] = stats["assignment_name"].fillna(stats["assignment_id"])
+        return AssignmentStore.from_frame(stats)
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame) -> "AssignmentStore":
+        df = df.assign(avg_score=pd.to_numeric(df["avg_score"], errors="coerce").astype(float))
+        by_course: dict[str, list[dict]] = {}
+        scores: dict[str, np.ndarray] = {}
+        for course_id, sub in df.groupby(df["course_id"].astype(str), sort=False):
+            sub = sub.sort_values("avg_score", kind="stable")
+            by_course[course_id] = sub[ASSIGNMENT_COLS].to_dict(orient="records")
+            scores[course_id] = sub["avg_score"].to_numpy(dtype=np.float64)
+        return AssignmentStore(by_course=by_course, scores=scores)
+
+    def hardest(self, course_id: str, top_n: int = 5) -> list[dict]:
+        return self.by_course.get(course_id, [])[:top_n]
+
+    def below(self, course_id: str, threshold: float) -> list[dict]:
+        scores = self.scores.get(course_id)
+        if scores is None:
+            return []
+        return self.by_course[course_id][: np.searchsorted(scores, threshold, side="left")]
+
+
+def _segments(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(distinct keys, start offsets + end) of a sorted key array."""
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.intp)
+    return keys[starts], np.r_[starts, len(keys)]
+
+
+@dataclass(frozen=True)
+class SubmissionStore:
+    score: np.ndarray            # (n,) float64, NaN = not submitted
+    submitted_at: np.ndarray     # (n,) float64 epoch seconds, NaN = not submitted
+    late: np.ndarray             # (n,) bool
+    student_row: np.ndarray      # (n,) StudentStore row, -1 if the student isn't in the roster
+    position: np.ndarray         # (n,) assignment's place in its course's due order (0 = first)
+    assignment_codes: np.ndarray  # (n,) int32 -> assignments
+    assignments: np.ndarray      # dictionary of assignment_id strings
+    # Drill-down index: rows grouped by assignment, not submitted (-inf) first, then by score
+    weakest_order: np.ndarray
+    weakest_score: np.ndarray
+    by_assignment: dict[tuple[str, str], tuple[int, int]]  # (course_id, assignment_id) -> span of weakest_order
+    student_order: np.ndarray    # rows grouped by student_row, each student's in due order
+    student_offsets: np.ndarray  # (n_student_rows + 1,) into student_order
+    stats: pd.DataFrame          # per assignment: SUBMISSION_STATS_COLS
+    trend: np.ndarray            # (n_student_rows,) score change per assignment, NaN under 2 scores
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame, students: StudentStore) -> "SubmissionStore":
+        table = ColumnarTable.from_frame(df, SUBMISSION_NUMERIC_COLS, ["course_id", "student_id", "assignment_id"])
+        return SubmissionStore.from_table(table, students)
+
+    @staticmethod
+    def from_table(table: ColumnarTable, students: StudentStore) -> "SubmissionStore":
+        cols = table.numeric_columns
+        score = np.asarray(table.values[:, cols.index("score")], dtype=np.float64)
+        submitted_at = np.asarray(table.values[:, cols.index("submitted_at")], dtype=np.float64)
+        late = np.asarray(table.values[:, cols.index("late")]) == 1
+        submitted = ~np.isnan(score)
+        course_code = np.asarray(table.codes["course_id"], dtype=np.int64)
+        courses = table.dictionaries["course_id"]
+        aids = table.dictionaries["assignment_id"]
+        akey = course_code * len(aids) + np.asarray(table.codes["assignment_id"], dtype=np.int64)
+
+        # Roster row per submission: translate the table's dictionaries into the store's
+        # and look (course, student) keys up in the store's sorted keys
+        c = pd.Index(students.courses).get_indexer(courses)[course_code]
+        st = pd.Index(students.students).get_indexer(table.dictionaries["student_id"])[table.codes["student_id"]]
+        width = max(len(students.students), 1)
+        store_keys, first = np.unique(students.course_codes.astype(np.int64) * width + students.student_codes,
+                                      return_index=True)
+        keys = c.astype(np.int64) * width + st
+        student_row = np.full(len(keys), -1, dtype=np.intp)
+        if len(store_keys):
+            pos = np.minimum(np.searchsorted(store_keys, keys), len(store_keys) - 1)
+            hit = (c >= 0) & (st >= 0) & (store_keys[pos] == keys)
+            student_row[hit] = first[pos[hit]]
+
+        # Per-assignment aggregates in one pass each
+        n_keys = len(courses) * len(aids)
+        enrolled = np.bincount(akey, minlength=n_keys)
+        n_sub = np.bincount(akey, weights=submitted, minlength=n_keys)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg = np.bincount(akey, weights=np.where(submitted, score, 0.0), minlength=n_keys) / n_sub
+            late_rate = np.bincount(akey, weights=late & submitted, minlength=n_keys) / n_sub
+            when = np.bincount(akey, weights=np.where(submitted, submitted_at, 0.0), minlength=n_keys) / n_sub
+        present = np.flatnonzero(enrolled)
+        stats = pd.DataFrame({
+            "course_id": courses[present // len(aids)].astype(str),
+            "assignment_id": aids[present % len(aids)].astype(str),
+            "avg_score": avg[present],
+            "submission_rate": n_sub[present] / enrolled[present],
+            "late_rate": late_rate[present],
+            "students": enrolled[present],
+        }, columns=SUBMISSION_STATS_COLS)
+        # Due order proxy: when the class handed it in, on average
+        due_rank = pd.Series(when[present]).groupby(stats["course_id"].to_numpy()).rank(method="first")
+        rank = np.zeros(n_keys, dtype=np.int64)
+        rank[present] = due_rank.fillna(len(aids)).to_numpy(dtype=np.int64) - 1
+        position = rank[akey]
+
+        # Drill-down index: per assignment, not submitted first, then ascending score
+        ranked = np.where(submitted, score, -np.inf)
+        weakest = np.lexsort((ranked, akey))
+        keys_sorted, bounds = _segments(akey[weakest])
+        by_assignment = {
+            (str(courses[k // len(aids)]), str(aids[k % len(aids)])): (a, b)
+            for k, a, b in zip(keys_sorted.tolist(), bounds[:-1].tolist(), bounds[1:].tolist())
+        }
+
+        # Per-student index (CSR over store rows) and least-squares score trend
+        n_rows = len(students)
+        by_student = np.lexsort((position, student_row))
+        by_student = by_student[student_row[by_student] >= 0]
+        offsets = np.searchsorted(student_row[by_student], np.arange(n_rows + 1))
+        g = np.where(submitted & (student_row >= 0), student_row, n_rows)
+        x = position.astype(np.float64)
+        y = np.where(submitted, score, 0.0)
+        n = np.bincount(g, minlength=n_rows + 1)[:n_rows].astype(np.float64)
+        sx = np.bincount(g, weights=x, minlength=n_rows + 1)[:n_rows]
+        sy = np.bincount(g, weights=y, minlength=n_rows + 1)[:n_rows]
+        sxx = np.bincount(g, weights=x * x, minlength=n_rows + 1)[:n_rows]
+        sxy = np.bincount(g, weights=x * y, minlength=n_rows + 1)[:n_rows]
+        denom = n * sxx - sx * sx
+        with np.errstate(invalid="ignore", divide="ignore"):
+            trend = np.where((n >= 2) & (denom > 0), (n * sxy - sx * sy) / denom, np.nan)
+
+        return SubmissionStore(
+            score=score,
+            submitted_at=submitted_at,
+            late=late,
+            student_row=student_row,
+            position=position,
+            assignment_codes=np.asarray(table.codes["assignment_id"], dtype=np.int32),
+            assignments=aids,
+            weakest_order=weakest,
+            weakest_score=ranked[weakest],
+            by_assignment=by_assignment,
+            student_order=by_student,
+            student_offsets=offsets,
+            stats=stats,
+            trend=trend,
+        )
+
+    def __len__(self) -> int:
+        return len(self.score)
+
+    def has_assignment(self, course_id: str, assignment_id: str) -> bool:
+        return (course_id, assignment_id) in self.by_assignment
+
+    def missing(self, course_id: str, assignment_id: str) -> np.ndarray:
+        """Rows of one assignment that were never submitted (binary search + slice)."""
+        a, b = self.by_assignment.get((course_id, assignment_id), (0, 0))
+        return self.weakest_order[a:a + np.searchsorted(self.weakest_score[a:b], -np.inf, side="right")]
+
+    def weakest(self, course_id: str, assignment_id: str, threshold: float | None = None) -> np.ndarray:
+        """Submitted rows of one assignment, lowest score first; with a threshold, only those below it."""
+        a, b = self.by_assignment.get((course_id, assignment_id), (0, 0))
+        scores = self.weakest_score[a:b]
+        lo = np.searchsorted(scores, -np.inf, side="right")
+        hi = len(scores) if threshold is None else np.searchsorted(scores, threshold, side="left")
+        return self.weakest_order[a + lo:a + max(lo, hi)]
+
+    def student_rows(self, student_row: int) -> np.ndarray:
+        """One student's submission rows, in due order."""
+        return self.student_order[self.student_offsets[student_row]:self.student_offsets[student_row + 1]]
+
+    def assignment_ids(self, rows: np.ndarray) -> np.ndarray:
+        return self.assignments[self.assignment_codes[rows]]
@@ -0,0 +1,66 @@
+"""
+CPU-bound request work, packaged as plain functions of (snapshot, *args).
+
+Kept free of FastAPI so the same functions run on a thread pool or inside
+process-pool workers (see executor.py); they must stay top-level and picklable.
+"""
+
+from __future__ import annotations
+from typing import Dict, Tuple
+
+from .analytics import hardest_assignments, struggling_students
+from .chat_orchestrator import answer
+from .intent_router import ParsedMessage
+from .interventions import RankedPage, rank_course
+from .snapshot import DataSnapshot
+
+
+def chat_task(
+    snap: DataSnapshot, course_id: str, message: str, parsed: ParsedMessage | None = None
+) -> Tuple[str, Dict[str, str], list[str]]:
+    return answer(
+        students=snap.students,
+        assignments=snap.assignments,
+        course_id=course_id,
+        message=message,
+        predictor=snap.predictor,
+        retriever=snap.retriever.for_course(course_id),
+        router=snap.router,
+        submissions=snap.submissions,
+        parsed=parsed,
+    )
+
+
+def insights_task(snap: DataSnapshot, course_id: str) -> dict:
+    rows = struggling_students(snap.students, course_id, threshold=70.0)[:10]
+    hard = hardest_assignments(snap.assignments, course_id, top_n=5)
+
+    # One batched (cached) model call for the whole list
+    predicted = snap.predictor.cached_predict(snap.students, rows)
+    risk = snap.predictor.risk_rows(snap.students, rows, predicted, pass_cutoff=60.0)
+
+    struggling_list = []
+    for row, pred, p_fail in zip(rows, predicted, risk):
+        r = snap.students.record(row)
+        struggling_list.append(
+            {
+                "student_id": r["student_id"],
+                "current_grade": float(r["current_grade"]),
+                "attendance_rate": float(r["attendance_rate"]),
+                "missing_assignments": int(r["missing_assignments"]),
+                "predicted_final_grade": float(pred),
+                "risk_of_failing": float(p_fail),
+            }
+        )
+
+    return {
+        "course_id": course_id,
+        "struggling_students": struggling_list,
+        "hardest_assignments": hard,
+    }
+
+
+def interventions_task(
+    snap: DataSnapshot, course_id: str, sort: str, min_risk: float, offset: int, limit: int | None
+) -> RankedPage:
+    return rank_course(snap.students, snap.predictor, course_id, sort=sort, min_risk=min_risk, offset=offset, limit=limit)
@@ -0,0 +1,237 @@
+"""
+Offline model training pipeline and versioned artifact registry.
+
+- `run_pipeline` trains a global model and/or one model per course, in parallel
+  across processes, and publishes them as one versioned artifact.
+- `warm_start` keeps the latest artifact's trees and adds `add_trees` fitted on
+  the current data (e.g. after a new term arrives) instead of retraining.
+- Unchanged data (same data hash, scope and settings as the latest artifact) is
+  skipped unless forced.
+
+Layout under artifacts_dir:
+    models/<version>/forest/               compact serving export (memory-mapped by the API)
+    models/<version>/grade_predictor.pkl   sklearn models, kept for warm starts
+    models/<version>/metadata.json         features, data hash, timings, metrics, export sizes
+    models/LATEST                          version the API loads
+
+A version directory is written under a temporary name and renamed, and LATEST is
+replaced last, so readers never see a half-written artifact.
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .data_repo import CourseDataRepo
+from .predictive import FEATURES, GradePredictor, load_compact, save_compact
+from .risk import FailClassifier
+
+
+SCOPES = ("global", "course", "both")
+MODELS_DIR = "models"
+LATEST = "LATEST"
+GLOBAL = "_global"
+
+
+def data_hash(df: pd.DataFrame) -> str:
+    """Digest of the training inputs (course, student, features, targets)."""
+    cols = ["course_id", "student_id", *FEATURES, "final_grade", *(["label"] if "label" in df else [])]
+    h = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    return hashlib.blake2b(h.tobytes(), digest_size=12).hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, artifacts_dir: Path):
+        self.root = Path(artifacts_dir) / MODELS_DIR
+
+    def latest_version(self) -> str | None:
+        try:
+            version = (self.root / LATEST).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version if (self.root / version / "grade_predictor.pkl").exists() else None
+
+    def versions(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+    def metadata(self, version: str) -> dict:
+        return json.loads((self.root / version / "metadata.json").read_text())
+
+    def load(self, version: str | None = None, compact: bool = True) -> GradePredictor | None:
+        """The compact export when there is one (fast, memory-mapped), else the pickle."""
+        version = version or self.latest_version()
+        if version is None:
+            return None
+        forest = self.root / version / "forest"
+        if compact and (forest / "forest.json").exists():
+            return load_compact(forest)
+        return joblib.load(self.root / version / "grade_predictor.pkl")
+
+    def publish(self, predictor: GradePredictor, metadata: dict, leaf_dtype: str = "float32",
+                prune_tol: float = 0.0) -> Path:
+        version = predictor.version
+        tmp = self.root / f".tmp-{version}"
+        tmp.mkdir(parents=True, exist_ok=True)
+        joblib.dump(predictor, tmp / "grade_predictor.pkl")
+        compact_bytes = save_compact(predictor, tmp / "forest", leaf_dtype=leaf_dtype, prune_tol=prune_tol)
+        metadata = {**metadata, "export": {
+            "leaf_dtype": leaf_dtype,
+            "prune_tol": prune_tol,
+            "compact_bytes": compact_bytes,
+            "pickle_bytes": (tmp / "grade_predictor.pkl").stat().st_size,
+        }}
+        (tmp / "metadata.json").write_text(json.dumps(metadata, indent=2))
+        final = self.root / version
+        if final.exists():
+            shutil.rmtree(final)
+        tmp.rename(final)
+
+        pointer = self.root / f".{LATEST}.tmp"
+        pointer.write_text(version)
+        os.replace(pointer, self.root / LATEST)
+        return final
+
+
+def new_version() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "-" + uuid.uuid4().hex[:6]
+
+
+def train_one(
+    name: str,
+    df: pd.DataFrame,
+    trees: int,
+    parent: GradePredictor | None,
+    add_trees: int,
+    n_jobs: int,
+) -> tuple[str, GradePredictor, dict]:
+    """Fit (or warm-start) one model. Top-level so process pools can run it."""
+    t0 = time.perf_counter()
+    if parent is not None:
+        model = parent.extend(df, add_trees=add_trees, n_jobs=n_jobs)
+        X, y = GradePredictor.training_data(df)
+        pred = model.model.predict(X)
+        metrics = {"train_mae": float(np.mean(np.abs(pred - y)))}
+    else:
+        model = GradePredictor.train(df, n_estimators=trees, n_jobs=n_jobs, oob_score=True)
+        _, y = GradePredictor.training_data(df)
+        oob = model.model.oob_prediction_
+        metrics = {
+            "oob_mae": float(np.mean(np.abs(oob - y))),
+            "oob_r2": float(model.model.oob_score_),
+        }
+    return name, model, {
+        "rows": len(df),
+        "trees": len(model.model.estimators_),
+        "warm_started": parent is not None,
+        "seconds": round(time.perf_counter() - t0, 3),
+        **metrics,
+    }
+
+
+def run_pipeline(
+    data_path: Path,
+    artifacts_dir: Path,
+    scope: str = "global",
+    courses: list[str] | None = None,
+    trees: int = 400,
+    warm_start: bool = False,
+    add_trees: int = 50,
+    jobs: int = 1,
+    force: bool = False,
+    leaf_dtype: str = "float32",
+    prune_tol: float = 0.0,
+) -> dict:
+    """Train, publish and return the new artifact's metadata (or the latest one's, if up to date)."""
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown scope {scope!r}; expected one of {SCOPES}.")
+    t0 = time.perf_counter()
+    registry = ModelRegistry(artifacts_dir)
+    students, _ = CourseDataRepo(data_path=Path(data_path)).load_tables()
+    df = students.to_frame()
+    digest = data_hash(df)
+    settings = {"scope": scope, "courses": courses, "trees": trees}
+
+    parent_version = registry.latest_version()
+    if parent_version is not None and not force:
+        meta = registry.metadata(parent_version)
+        if meta["data_hash"] == digest and meta["settings"] == settings:
+            return {**meta, "skipped": True}
+    parent = registry.load(parent_version, compact=False) if warm_start and parent_version is not None else None
+
+    # (name, rows, parent model) per model to fit
+    work: list[tuple[str, pd.DataFrame, GradePredictor | None]] = []
+    if scope in ("global", "both"):
+        work.append((GLOBAL, df, parent if parent is not None and not parent.baseline else None))
+    if scope in ("course", "both"):
+        for cid in courses or sorted(df["course_id"].unique()):
+            sub = df[df["course_id"] == cid]
+            if len(sub):
+                work.append((cid, sub, parent.courses.get(cid) if parent is not None else None))
+
+    # One process per model; each forest single-threaded so workers don't oversubscribe
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(train_one, name, part, trees, prev, add_trees, 1) for name, part, prev in work]
+            results = [f.result() for f in futures]
+    else:
+        results = [train_one(name, part, trees, prev, add_trees, -1) for name, part, prev in work]
+
+    fitted = {name: model for name, model, _ in results}
+    # Course-only scope still needs a model for unseen courses: reuse the parent's, else a baseline
+    top = fitted.pop(GLOBAL, None) or (parent if parent is not None else GradePredictor.fit_baseline(df))
+    t_clf = time.perf_counter()
+    classifier = FailClassifier.train(df, FEATURES)
+    clf_seconds = round(time.perf_counter() - t_clf, 3)
+    version = new_version()
+    predictor = GradePredictor(
+        model=top.model,
+        medians=top.medians,
+        version=version,
+        courses=fitted,
+        baseline=top.baseline and not fitted,
+        classifier=classifier,
+    )
+
+    meta = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "parent_version": parent_version if parent is not None else None,
+        "features": FEATURES,
+        "target": "final_grade",
+        "data_path": str(data_path),
+        "data_hash": digest,
+        "rows": len(df),
+        "settings": settings,
+        "jobs": jobs,
+        "models": {name: m for name, _, m in results},
+        "classifier": {**classifier.metrics, "seconds": clf_seconds} if classifier is not None else None,
+        "total_seconds": round(time.perf_counter() - t0, 3),
+    }
+    path = registry.publish(predictor, meta, leaf_dtype=leaf_dtype, prune_tol=prune_tol)
+    return registry.metadata(path.name)
+
+
+def start_background_training(data_path: Path, artifacts_dir: Path, jobs: int = 1) -> subprocess.Popen:
+    """Run scripts/train_models.py in a child process, off the API's request-serving one."""
+    script = Path(__file__).resolve().parents[3] / "scripts" / "train_models.py"
+    return subprocess.Popen([
+        sys.executable, str(script),
+        "--data", str(data_path),
+        "--artifacts", str(artifacts_dir),
+        "--jobs", str(jobs),
+    ])
@@ -14,12 +14,54 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
-    # Paths (relative to repo root when running)
+    # Paths (relative to repo root when running).
+    # data_path may also be a columnar directory (scripts/convert_to_columnar.py)
     data_path: str = "data/synthetic_course_data.csv"
     artifacts_dir: str = "artifacts"
+    retrieval_index_dir: str = "artifacts/retrieval_index"  # scripts/build_retrieval_index.py
+
+    # Course-notes retrieval: "keyword" (BM25), "dense" (hashed n-gram embeddings),
+    # or "hybrid" (rank fusion of both); dense modes run offline on CPU
+    retrieval_mode: str = "keyword"
+
+    # Grade model inference: "flat" (packed NumPy trees), "sklearn" (model.predict),
+    # or "auto" (flat for small request-path batches, sklearn for bulk scoring)
+    inference_engine: str = "auto"
+
+    # Models are trained offline (scripts/train_models.py) into artifacts_dir/models/.
+    # Without one the API serves a small baseline forest and, if enabled, starts the
+    # training pipeline in a separate process; the reload watcher picks up the result.
+    train_in_background: bool = True
+
+    # Hot reload: poll data_path/artifacts_dir every N seconds (0 disables the watcher)
+    reload_poll_seconds: float = 30.0
+
+    # CPU-heavy request work (prediction, retrieval, aggregations) runs on a bounded pool.
+    # "process" sidesteps the GIL; each worker loads its own snapshot from disk, so
+    # PATCH student updates are rejected (409) in that mode.
+    executor_kind: str = "thread"
+    executor_workers: int = 4
+    executor_max_pending: int = 64  # in-flight + queued; beyond this -> 503 + Retry-After
+    executor_retry_after_seconds: int = 1
+
+    # Response cache for /chat and course insights (LRU + TTL within a memory budget;
+    # 0 disables). redis_url adds a shared tier so API workers reuse each other's answers
+    # (needs the optional `redis` package).
+    response_cache_mb: float = 64.0
+    response_cache_ttl_seconds: float = 300.0
+    redis_url: str = ""
 
     # Chat behavior
-    max_context_turns: int = 8
+    # Optional JSON intent table ([{"intent": ..., "all": [...], "any": [...]}, ...]);
+    # empty uses the built-in rules in services/intent_router.py
+    intent_rules_path: str = ""
+    max_context_turns: int = 8  # user turns of ChatRequest.history replayed into a new session
+
+    # Chat sessions: resolved entities (current student/assignment) and recent answers per
+    # (teacher_id, session_id), LRU within a memory budget, expiring when idle (0 disables)
+    session_store_mb: float = 16.0
+    session_ttl_seconds: float = 1800.0
+    session_max_results: int = 8
 
 
 settings = Settings()
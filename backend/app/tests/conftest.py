@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_students(n=60, seed=0, courses=("C1",)):
+    """Synthetic student rows; with several courses each row gets a random one."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "course_id": courses[0] if len(courses) == 1 else rng.choice(list(courses), n),
+        "student_id": [f"S{100000 + i}" for i in range(n)],
+        "current_grade": rng.uniform(40, 100, n),
+        "attendance_rate": rng.uniform(0.6, 1.0, n),
+        "missing_assignments": rng.integers(0, 8, n),
+        "late_submissions": rng.integers(0, 6, n),
+        "avg_quiz_score": rng.uniform(40, 100, n),
+        "avg_hw_score": rng.uniform(40, 100, n),
+        "avg_exam_score": rng.uniform(40, 100, n),
+        "logins_last_7d": rng.integers(0, 10, n),
+    })
+    df["final_grade"] = df["current_grade"] - 0.8 * df["missing_assignments"]
+    return df
+
+
+@pytest.fixture
+def students():
+    """make_students(n=60, seed=0, courses=("C1",))"""
+    return make_students
@@ -1,5 +1,6 @@
 import pandas as pd
 from backend.app.services.analytics import student_snapshot, grade_drivers
+from backend.app.services.store import StudentStore
 
 
 def test_student_snapshot():
@@ -17,7 +18,7 @@ def test_student_snapshot():
             "logins_last_7d": 1,
         }
     ])
-    s = student_snapshot(df, "C1", "S100001")
+    s = student_snapshot(StudentStore.from_frame(df), "C1", "S100001")
     assert s["student_id"] == "S100001"
     assert s["current_grade"] == 65.0
 
@@ -37,5 +38,5 @@ def test_grade_drivers_has_drivers():
             "logins_last_7d": 1,
         }
     ])
-    d = grade_drivers(df, "C1", "S100001")
+    d = grade_drivers(StudentStore.from_frame(df), "C1", "S100001")
     assert len(d["drivers"]) > 0
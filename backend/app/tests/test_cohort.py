@@ -0,0 +1,144 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services.analytics import grade_drivers
+from backend.app.services.chat_orchestrator import answer
+from backend.app.services.cohort import CohortQuery, cohort_table, select
+from backend.app.services.data_repo import ASSIGNMENT_NUMERIC_COLS, ASSIGNMENT_STRING_COLS, ColumnarTable
+from backend.app.services.intent_router import DEFAULT_ROUTER
+from backend.app.services.predictive import GradePredictor
+from backend.app.services.prescriptive import recommendations
+from backend.app.services.rag import Bm25Retriever, COURSE_NOTES
+from backend.app.services.store import AssignmentStore, StudentStore, SubmissionStore
+
+
+def _query(message):
+    return CohortQuery.from_parsed(DEFAULT_ROUTER.parse(message), message)
+
+
+def test_only_cohort_messages_become_queries():
+    assert _query("How is student S100001 doing?") is None
+    assert _query("what is the late work policy") is None
+    assert _query("compare S100001 and S100002").student_ids == ["S100001", "S100002"]
+    q = _query("students with attendance below 80% and 3 or more missing assignments")
+    assert [(c.column, c.op, c.value) for c in q.conditions] == [
+        ("attendance_rate", "<", 0.8),
+        ("missing_assignments", ">=", 3),
+    ]
+    assert _query("Which students have more than 3 late submissions?").conditions[0].column == "late_submissions"
+
+
+def test_policy_questions_with_numbers_stay_fallback(students):
+    for message in ("What is the penalty for work more than 2 days late?",
+                    "Can students resubmit if they score below 50?"):
+        assert DEFAULT_ROUTER.parse(message).intent == "fallback"
+        assert _query(message) is None
+
+    df = students(n=12)
+    store = StudentStore.from_frame(df)
+    assignments = pd.DataFrame([{"course_id": "C1", "assignment_id": "A1", "assignment_name": "Assignment 1",
+                                 "avg_score": 70.0, "submission_rate": 0.9}])
+    _, cited, _ = answer(
+        store, AssignmentStore.from_frame(assignments), "C1", "What is the penalty for work more than 2 days late?",
+        GradePredictor.train(df), Bm25Retriever(COURSE_NOTES),
+    )
+    assert "cohort" not in cited
+    assert "[course_policy]" in cited["retrieved_notes"]
+
+
+def test_select_masks_and_ranks(students):
+    df = students(n=80)
+    store = StudentStore.from_frame(df)
+
+    rows, _ = select(store, "C1", _query("students with attendance below 80% and 3 or more missing assignments"))
+    expected = df[(df["attendance_rate"] < 0.8) & (df["missing_assignments"] >= 3)]
+    assert sorted(store.student_ids(rows)) == sorted(expected["student_id"])
+
+    rows, _ = select(store, "C1", _query("how are my bottom 5 doing"))
+    assert list(store.student_ids(rows)) == df.nsmallest(5, "current_grade")["student_id"].tolist()
+
+    rows, _ = select(store, "C1", _query("top 3 students with grades between 50 and 80"))
+    band = df[df["current_grade"].between(50, 80)]
+    assert list(store.student_ids(rows)) == band.nlargest(3, "current_grade")["student_id"].tolist()
+
+    # Multi-digit counts: "12 or fewer" must not also match as "2 or fewer"
+    rows, _ = select(store, "C1", _query("Which students have 12 or fewer missing assignments?"))
+    assert len(rows) == len(df)
+    rows, _ = select(store, "C1", _query("Which students have 5+ missing assignments?"))
+    assert sorted(store.student_ids(rows)) == sorted(df.loc[df["missing_assignments"] >= 5, "student_id"])
+
+    rows, missing = select(store, "C1", _query("compare S100005, S100001 and S999999"))
+    assert list(store.student_ids(rows)) == ["S100005", "S100001"]
+    assert missing == ["S999999"]
+
+
+def test_table_matches_per_student_functions(students):
+    df = students(n=80)
+    store = StudentStore.from_frame(df)
+    predictor = GradePredictor.train(df)
+    rows = store.course_rows("C1")
+    table = cohort_table(store, predictor, rows)
+
+    np.testing.assert_allclose(table["predicted_final_grade"], predictor.predict_rows(store, rows))
+    for sid, drivers, action in zip(table["student_id"], table["drivers"], table["top_action"]):
+        assert (drivers.split(";") if drivers else []) == [d["factor"] for d in grade_drivers(store, "C1", sid)["drivers"]]
+        assert action == recommendations(store.record(store.locate("C1", sid)))[0]["action"]
+
+
+def test_chat_answers_cohort_with_compact_table(students):
+    df = students(n=80)
+    store = StudentStore.from_frame(df)
+    predictor = GradePredictor.train(df)
+    assignments = pd.DataFrame([{"course_id": "C1", "assignment_id": "A1", "assignment_name": "Assignment 1",
+                                 "avg_score": 70.0, "submission_rate": 0.9}])
+    text, cited, _ = answer(
+        store, AssignmentStore.from_frame(assignments), "C1", "how are my bottom 10 doing?",
+        predictor, Bm25Retriever(COURSE_NOTES),
+    )
+    assert text.startswith("10 students (bottom 10 by grade)")
+    table = pd.read_csv(io.StringIO(cited["cohort"]))
+    assert len(table) == 10
+    assert {"student_id", "predicted_final_grade", "risk_of_failing", "drivers", "top_action"} <= set(table.columns)
+
+
+def test_chat_drills_into_one_assignment(students):
+    df = students(n=12)
+    store = StudentStore.from_frame(df)
+    predictor = GradePredictor.train(df)
+    ids = df["student_id"].tolist()
+    subs = pd.DataFrame({
+        "course_id": "C1",
+        "student_id": ids,
+        "assignment_id": "A3",
+        "score": [np.nan, np.nan] + [40.0 + 5 * i for i in range(10)],
+        "submitted_at": [np.nan, np.nan] + [86400.0] * 10,
+        "late": [0, 0, 1] + [0] * 9,
+    })
+    submissions = SubmissionStore.from_frame(subs, store)
+    assignments = AssignmentStore.from_submissions(
+        ColumnarTable.from_frame(pd.DataFrame({"course_id": ["C1"], "assignment_id": ["A3"], "assignment_name": ["Essay"],
+                                               "avg_score": [0.0], "submission_rate": [0.0]}),
+                                 ASSIGNMENT_NUMERIC_COLS, ASSIGNMENT_STRING_COLS),
+        submissions,
+    )
+    args = (predictor, Bm25Retriever(COURSE_NOTES))
+
+    text, cited, followups = answer(store, assignments, "C1", "Which students struggled the most on assignment A3?",
+                                    *args, submissions=submissions)
+    assert text.startswith("Students who struggled most on Essay (A3)")
+    assert f"Not submitted (2): {ids[0]}, {ids[1]}" in text
+    lowest = pd.read_csv(io.StringIO(cited["assignment_lowest_scores"]))
+    assert lowest["student_id"].iloc[0] == ids[2] and lowest["late"].iloc[0]
+    assert followups[0] == f"What is pulling {ids[2]}'s grade down?"
+
+    text, _, _ = answer(store, assignments, "C1", "Which students scored below 50 on A3?", *args, submissions=submissions)
+    assert text.startswith("Students who struggled most below 50")
+    text, _, _ = answer(store, assignments, "C1", "Which students struggled on A9?", *args, submissions=submissions)
+    assert text == "I can't find assignment A9 in course C1."
+    # Without per-student data only the average is available; plain questions are unchanged
+    text, _, _ = answer(store, assignments, "C1", "Which students struggled the most on assignment A3?", *args)
+    assert text.startswith("Per-student results for A3 aren't loaded")
+    text, _, _ = answer(store, assignments, "C1", "Which students are struggling?", *args, submissions=submissions)
+    assert not text.startswith("Students who struggled most")
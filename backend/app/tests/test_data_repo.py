@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+from backend.app.services.data_repo import CourseDataRepo, convert_csv_to_columnar
+from backend.app.services.store import AssignmentStore, StudentStore
+
+
+def _write_csv(path):
+    pd.DataFrame([
+        {"record_type": "assignment", "course_id": "C1", "assignment_id": "A1", "assignment_name": "Assignment 1",
+         "avg_score": 71.5, "submission_rate": 0.9},
+        {"record_type": "student", "course_id": "C1", "student_id": "S100001", "attendance_rate": 0.85,
+         "missing_assignments": 4, "late_submissions": 2, "avg_quiz_score": 70, "avg_hw_score": 72,
+         "avg_exam_score": 60, "logins_last_7d": 1, "current_grade": 65, "final_grade": 61, "label": 1},
+        {"record_type": "student", "course_id": "C1", "student_id": "S100002", "attendance_rate": 0.97,
+         "missing_assignments": 0, "late_submissions": 0, "avg_quiz_score": 90, "avg_hw_score": 92,
+         "avg_exam_score": 88, "logins_last_7d": 5, "current_grade": 90, "final_grade": 91, "label": 0},
+    ]).to_csv(path, index=False)
+
+
+def test_columnar_roundtrip_is_memory_mapped(tmp_path):
+    csv = tmp_path / "data.csv"
+    _write_csv(csv)
+    assert convert_csv_to_columnar(csv, tmp_path / "columnar") == (2, 1)
+
+    students, assignments = CourseDataRepo(data_path=tmp_path / "columnar").load_tables()
+    assert isinstance(students.values, np.memmap)
+    assert students.values.flags["F_CONTIGUOUS"]
+
+    from_csv, _ = CourseDataRepo(data_path=csv).load_tables()
+    np.testing.assert_array_equal(students.values, from_csv.values)
+    assert students.strings("student_id").tolist() == ["S100001", "S100002"]
+
+    store = StudentStore.from_table(students)
+    assert store.record(store.locate("C1", "S100002"))["current_grade"] == 90.0
+    # Copy-on-write: in-place updates never touch the file
+    store.update("C1", "S100001", {"current_grade": 50.0})
+    reloaded, _ = CourseDataRepo(data_path=tmp_path / "columnar").load_tables()
+    assert reloaded.values[0, reloaded.numeric_columns.index("current_grade")] == 65.0
+
+    assert AssignmentStore.from_table(assignments).hardest("C1")[0]["assignment_id"] == "A1"
+
+
+def test_rule_boundaries_survive_csv_ingestion(tmp_path):
+    from backend.app.services.analytics import grade_drivers
+    from backend.app.services.prescriptive import recommendations
+
+    csv = tmp_path / "data.csv"
+    pd.DataFrame([
+        {"record_type": "student", "course_id": "C1", "student_id": "S100001", "attendance_rate": 0.9,
+         "missing_assignments": 0, "late_submissions": 0, "avg_quiz_score": 75.0, "avg_hw_score": 75.0,
+         "avg_exam_score": 80, "logins_last_7d": 5, "current_grade": 76.95, "final_grade": 77, "label": 0},
+    ]).to_csv(csv, index=False)
+    students, _ = CourseDataRepo(data_path=csv).load_tables()
+    store = StudentStore.from_table(students)
+    record = store.record(store.locate("C1", "S100001"))
+
+    assert (record["attendance_rate"], record["avg_hw_score"], record["current_grade"]) == (0.9, 75.0, 76.95)
+    # "< 0.9" and "< 75" don't fire exactly on the boundary, as with the plain CSV read
+    assert grade_drivers(store, "C1", "S100001")["drivers"] == []
+    assert [r["action"] for r in recommendations(record)] == [
+        r["action"] for r in recommendations(pd.read_csv(csv).iloc[0].to_dict())]
+
+
+def test_chunked_ingestion_pins_dtypes_and_routes_rows(tmp_path):
+    from backend.app.services.data_repo import read_csv_chunked
+
+    csv = tmp_path / "data.csv"
+    _write_csv(csv)
+    result = read_csv_chunked(csv, chunksize=1, track_memory=True)
+
+    assert result.chunks == 3 and result.rows_read == 3
+    assert len(result.students) == 2 and len(result.assignments) == 1
+    assert result.students["current_grade"].dtype == np.float64
+    assert str(result.students["missing_assignments"].dtype) == "Int16"
+    # IDs share one dictionary across chunks
+    assert isinstance(result.students["course_id"].dtype, pd.CategoricalDtype)
+    assert result.students["student_id"].tolist() == ["S100001", "S100002"]
+    # Traced through building the final tables, not just reading the chunks
+    assert result.peak_bytes >= result.students.memory_usage(index=False).sum()
+
+
+def test_sharded_csv_and_preallocated_columnar_tables(tmp_path):
+    from backend.app.services.data_repo import STUDENT_NUMERIC_COLS, ColumnarTable
+
+    _write_csv(tmp_path / "data.csv")
+    df = pd.read_csv(tmp_path / "data.csv")
+    shards = tmp_path / "shards"
+    shards.mkdir()
+    df.iloc[:2].to_csv(shards / "part-00000.csv", index=False)
+    df.iloc[2:].to_csv(shards / "part-00001.csv", index=False)
+    students, assignments = CourseDataRepo(data_path=shards).load_tables()
+    whole, _ = CourseDataRepo(data_path=tmp_path / "data.csv").load_tables()
+    np.testing.assert_array_equal(students.values, whole.values)
+    assert len(assignments) == 1
+
+    # Row ranges filled independently (e.g. by parallel writers) load like a saved table
+    out = tmp_path / "columnar" / "students"
+    ColumnarTable.allocate(out, STUDENT_NUMERIC_COLS, 2, {"course_id": ["C1"], "student_id": ["S100001", "S100002"]})
+    for i in (1, 0):
+        row = {c: whole.values[i:i + 1, j] for j, c in enumerate(whole.numeric_columns)}
+        ColumnarTable.write_rows(out, i, {**row, "course_id": np.array([0]), "student_id": np.array([i])})
+    loaded = ColumnarTable.load(out)
+    np.testing.assert_array_equal(loaded.values, whole.values)
+    assert loaded.strings("student_id").tolist() == ["S100001", "S100002"]
+
+
+def test_submission_records_load_alongside_the_tables(tmp_path):
+    csv = tmp_path / "data.csv"
+    _write_csv(csv)
+    subs = pd.DataFrame([
+        {"record_type": "submission", "course_id": "C1", "student_id": "S100001", "assignment_id": "A1",
+         "score": 58.5, "submitted_at": "2025-09-08T10:00:00+00:00", "late": 1},
+        {"record_type": "submission", "course_id": "C1", "student_id": "S100002", "assignment_id": "A1"},
+    ])
+    pd.concat([pd.read_csv(csv), subs]).to_csv(csv, index=False)
+
+    students, _, submissions = CourseDataRepo(data_path=csv).load_dataset()
+    assert len(students) == 2 and len(submissions) == 2
+    values = dict(zip(submissions.numeric_columns, submissions.values[0]))
+    assert values["score"] == 58.5 and values["late"] == 1
+    assert values["submitted_at"] == pd.Timestamp("2025-09-08T10:00:00Z").timestamp()
+    assert np.isnan(submissions.values[1, :2]).all()  # not submitted: no score, no timestamp
+
+    convert_csv_to_columnar(csv, tmp_path / "columnar")
+    _, _, mapped = CourseDataRepo(data_path=tmp_path / "columnar").load_dataset()
+    np.testing.assert_array_equal(mapped.values, submissions.values)
+    assert CourseDataRepo(data_path=tmp_path / "columnar").load_tables()[0].strings("student_id").tolist() == [
+        "S100001", "S100002"]
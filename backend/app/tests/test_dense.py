@@ -0,0 +1,73 @@
+import numpy as np
+
+from backend.app.services.dense import (
+    DenseCourseRetriever,
+    DenseIndex,
+    DenseRetriever,
+    HashingEmbedder,
+    HybridRetriever,
+    with_retrieval_mode,
+)
+from backend.app.services.rag import COURSE_NOTES, Bm25Retriever, CourseRetriever
+
+
+def test_embedder_is_normalized_and_stable():
+    texts = [t for _, t in COURSE_NOTES]
+    a = HashingEmbedder(dim=64).fit(texts).embed(texts + ["zz"])
+    b = HashingEmbedder(dim=64).fit(texts).embed(texts + ["zz"])
+    assert a.dtype == np.float32 and a.shape == (4, 64)
+    np.testing.assert_allclose(np.linalg.norm(a[:3], axis=1), 1.0, rtol=1e-5)
+    assert not a[3].any()  # no tokens longer than 2 chars
+    np.testing.assert_array_equal(a, b)
+
+
+def test_dense_matches_paraphrases_keyword_search_misses():
+    query = "students who keep being absent need a plan"
+    assert Bm25Retriever(COURSE_NOTES).retrieve("keep absent", k=1) == []
+    dense = DenseRetriever(COURSE_NOTES + [("attendance", "Absences: call home after three absent days.")])
+    assert dense.retrieve(query, k=1)[0][0] == "attendance"
+    assert dense.retrieve("zzz qqq", k=3) == []
+
+
+def test_exact_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 16)).astype(np.float32)
+    Q = rng.normal(size=(4, 16)).astype(np.float32)
+    index = DenseIndex(X)
+    index.BLOCK_ROWS = 128  # exercise the cross-block merge
+    scores, ids = index.search_exact(Q, 5)
+    expected = np.argsort(-(Q @ X.T), axis=1)[:, :5]
+    np.testing.assert_array_equal(ids, expected)
+    np.testing.assert_allclose(scores, np.take_along_axis(Q @ X.T, expected, axis=1), rtol=1e-5)
+
+
+def test_ivf_recall_against_exact():
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(40, 32))
+    X = centers[rng.integers(0, 40, 5000)] + rng.normal(scale=0.3, size=(5000, 32))
+    X = (X / np.linalg.norm(X, axis=1, keepdims=True)).astype(np.float32)
+    index = DenseIndex(X, ivf=True, nprobe=8)
+    assert index.ivf and index.nlist == 70
+
+    Q = X[rng.choice(5000, 50, replace=False)]
+    _, exact = index.search_exact(Q, 10)
+    _, approx = index.search(Q, 10)
+    recall = np.mean([len(set(a) & set(e)) / 10 for a, e in zip(approx, exact)])
+    assert recall >= 0.9
+
+
+def test_hybrid_fuses_both_rankings():
+    docs = COURSE_NOTES + [("attendance", "Absences: call home after three absent days.")]
+    hybrid = HybridRetriever(keyword=Bm25Retriever(docs), dense=DenseRetriever(docs))
+    assert hybrid.retrieve("what is the late work penalty?", k=1)[0][0] == "course_policy"
+    assert "attendance" in [d for d, _ in hybrid.retrieve("kids keep being absent", k=2)]
+
+
+def test_course_modes():
+    keyword = CourseRetriever.build(COURSE_NOTES, {"C1": [("c1_syllabus", "Lab reports are due every Friday.")]})
+    assert with_retrieval_mode(keyword, "keyword") is keyword
+
+    dense = with_retrieval_mode(keyword, "dense")
+    assert isinstance(dense, DenseCourseRetriever)
+    assert dense.for_course("C1").retrieve("when is the laboratory report due", k=1)[0][0] == "c1_syllabus"
+    assert isinstance(with_retrieval_mode(keyword, "hybrid").for_course("C2"), HybridRetriever)
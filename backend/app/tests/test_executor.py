@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.app.services.executor import CpuExecutor, Overloaded
+
+
+class _Snap:
+    version = 1
+
+
+def test_runs_task_with_snapshot_first():
+    cpu = CpuExecutor(kind="thread", workers=2)
+    try:
+        assert asyncio.run(cpu.run(lambda snap, x: (snap.version, x * 2), _Snap(), 21)) == (1, 42)
+        assert cpu.stats()["completed"] == 1
+    finally:
+        cpu.shutdown()
+
+
+def test_rejects_when_queue_is_full():
+    gate = threading.Event()
+    cpu = CpuExecutor(kind="thread", workers=1, max_pending=2, retry_after=3)
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(cpu.run(lambda snap: gate.wait(5), _Snap())) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(Overloaded) as exc:
+            await cpu.run(lambda snap: None, _Snap())
+        assert exc.value.retry_after == 3
+        gate.set()
+        await asyncio.gather(*blocked)
+
+    try:
+        asyncio.run(scenario())
+        assert cpu.stats()["rejected"] == 1 and cpu.stats()["pending"] == 0
+    finally:
+        cpu.shutdown()
@@ -0,0 +1,100 @@
+import json
+import random
+import re
+
+from backend.app.services.intent_router import DEFAULT_ROUTER, IntentRouter, normalize
+
+
+GOLDEN = [
+    ("How is student S100100 doing in my course?", "student_status", "S100100"),
+    ("how   IS S100100\tdoing?", "student_status", "S100100"),
+    ("What is pulling student S100120's grade down?", "grade_drivers", "S100120"),
+    ("Which students are struggling?", "struggling_students", None),
+    ("Which students are failing right now?", "struggling_students", None),
+    ("What are key assignments students struggled with?", "hard_assignments", None),
+    ("Which key assignments were hardest?", "hard_assignments", None),
+    ("How will student S100100 do by the end of the course?", "predict_outcome", "S100100"),
+    ("Will S1234567 pass?", "predict_outcome", "S1234567"),
+    ("Given student S100120 is failing, what recommendations can help?", "prescribe", "S100120"),
+    ("Any recommendation for s100120?", "prescribe", None),
+    ("what is the late work policy", "fallback", None),
+    ("willing to give the final exam early", "predict_outcome", None),
+    ("", "fallback", None),
+]
+
+
+def _legacy_route_intent(message: str) -> str:
+    """The sequential substring router IntentRouter replaced; the golden reference for DEFAULT_RULES."""
+    m = normalize(message)
+    if "how is" in m and "doing" in m:
+        return "student_status"
+    if "pulling" in m and "grade" in m:
+        return "grade_drivers"
+    if "which students" in m and ("struggling" in m or "failing" in m):
+        return "struggling_students"
+    if "key assignments" in m and ("struggled" in m or "hard" in m):
+        return "hard_assignments"
+    if "by the end" in m or "will" in m and ("pass" in m or "fail" in m or "final" in m):
+        return "predict_outcome"
+    if "recommendation" in m or ("given" in m and "failing" in m):
+        return "prescribe"
+    return "fallback"
+
+
+def _legacy_student_id(message):
+    m = re.search(r"(S\d{6,})", message)
+    return m.group(1) if m else None
+
+
+def test_golden_set_matches_legacy_router():
+    for message, intent, sid in GOLDEN:
+        parsed = DEFAULT_ROUTER.parse(message)
+        assert (parsed.intent, parsed.student_id) == (intent, sid), message
+        assert (_legacy_route_intent(message), _legacy_student_id(message)) == (intent, sid), message
+
+
+def test_random_keyword_soup_matches_legacy_router():
+    words = ("how is doing pulling grade which students struggling failing key assignments struggled "
+             "hard by the end will pass fail final recommendation given hardest willing S1001234 A3 "
+             "below 50% the HOW IS WiLL\n").split(" ")
+    rng = random.Random(0)
+    for _ in range(5000):
+        message = " ".join(rng.choice(words) for _ in range(rng.randint(1, 10)))
+        parsed = DEFAULT_ROUTER.parse(message)
+        assert parsed.intent == _legacy_route_intent(message), message
+        assert parsed.student_id == _legacy_student_id(message), message
+
+
+def test_entities_in_one_pass():
+    parsed = DEFAULT_ROUTER.parse("Which students are failing below 65% on assignment 3, A4 and xA5? S1000001 s2000002")
+    assert parsed.intent == "struggling_students"
+    assert parsed.student_ids == ["S1000001"]
+    assert parsed.assignment_ids == ["A3", "A4"]
+    assert parsed.threshold == 65.0
+    assert DEFAULT_ROUTER.parse("grades < 59.5").thresholds == [59.5]
+
+
+def test_multi_digit_counts_are_one_condition():
+    def conditions(message):
+        return [(c.field, c.op, c.value) for c in DEFAULT_ROUTER.parse(message).conditions]
+
+    assert conditions("12 or fewer missing") == [("missing", "<=", 12.0)]
+    assert conditions("13 or more late") == [("late", ">=", 13.0)]
+    assert conditions("10+ late submissions") == [("late", ">=", 10.0)]
+    assert conditions("attendance 0.75 or more") == [("attendance", ">=", 0.75)]
+
+
+def test_rules_are_data(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "fallback": "notes",
+        "rules": [
+            {"intent": "attendance", "all": ["absent"], "any": ["often", "a lot"]},
+            {"intent": "failing", "any": ["failing", "fail"]},
+        ],
+    }))
+    router = IntentRouter.from_json(path)
+    assert router.route("She is ABSENT a   lot") == "attendance"
+    assert router.route("absent once") == "notes"
+    assert router.route("who is failing") == "failing"
+    assert router.route("FAILED the quiz") == "failing"
@@ -0,0 +1,61 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services import interventions
+from backend.app.services.analytics import grade_drivers
+from backend.app.services.interventions import rank_course, stream_report
+from backend.app.services.predictive import GradePredictor
+from backend.app.services.prescriptive import recommendations
+from backend.app.services.store import StudentStore
+
+
+def test_pages_are_sorted_by_risk_and_cover_the_course(students):
+    df = students(n=120, seed=1, courses=("C1", "C2"))
+    store = StudentStore.from_frame(df)
+    predictor = GradePredictor.train(df)
+
+    full = rank_course(store, predictor, "C1")
+    assert full.total == (df["course_id"] == "C1").sum()
+    assert np.all(np.diff(full.risk) <= 0)
+    assert full.next_offset is None
+
+    pages, offset = [], 0
+    while offset is not None:
+        page = rank_course(store, predictor, "C1", offset=offset, limit=7)
+        pages.append(page.rows)
+        offset = page.next_offset
+    np.testing.assert_array_equal(np.concatenate(pages), full.rows)
+
+    at_risk = rank_course(store, predictor, "C1", min_risk=0.5, sort="grade")
+    assert np.all(at_risk.risk >= 0.5)
+    assert np.all(np.diff(store.column("current_grade")[at_risk.rows]) >= 0)
+
+
+def test_streams_match_per_student_functions(students, monkeypatch):
+    monkeypatch.setattr(interventions, "CHUNK_ROWS", 16)
+    df = students(n=120, seed=1, courses=("C1", "C2"))
+    store = StudentStore.from_frame(df)
+    predictor = GradePredictor.train(df)
+    page = rank_course(store, predictor, "C2", offset=3, limit=40)
+
+    chunks = list(stream_report(store, page, "ndjson"))
+    assert len(chunks) == 3
+    records = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [r["rank"] for r in records] == list(range(4, 4 + len(page.rows)))
+    for r in records:
+        row = store.locate("C2", r["student_id"])
+        assert r["drivers"] == grade_drivers(store, "C2", r["student_id"])["drivers"]
+        assert r["recommendations"] == recommendations(store.record(row))
+        assert isinstance(r["missing_assignments"], int)
+
+    table = pd.read_csv(io.StringIO("".join(stream_report(store, page, "csv"))), keep_default_na=False)
+    assert table["student_id"].tolist() == [r["student_id"] for r in records]
+    assert table["top_action"].tolist() == [r["recommendations"][0]["action"] for r in records]
+    np.testing.assert_allclose(table["risk_of_failing"], [r["risk_of_failing"] for r in records])
+
+    empty = rank_course(store, predictor, "C2", offset=10_000)
+    assert list(stream_report(store, empty, "ndjson")) == []
+    assert "".join(stream_report(store, empty, "csv")).startswith("rank,student_id,")
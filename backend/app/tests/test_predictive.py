@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from backend.app.services.predictive import FEATURES, GradePredictor, load_compact, save_compact
+from backend.app.services.store import StudentStore
+
+
+def test_predict_many_matches_single_row(students):
+    df = students()
+    p = GradePredictor.train(df)
+    store = StudentStore.from_frame(df)
+    rows = store.course_rows("C1")[:5]
+    batch = p.predict_rows(store, rows)
+    single = [p.predict_final_grade(store.record(r)) for r in rows]
+    np.testing.assert_allclose(batch, single)
+    risk = p.prob_fail_many(batch)
+    assert risk.shape == (5,) and ((risk >= 0) & (risk <= 1)).all()
+
+
+def test_predict_many_imputes_nan_with_training_medians(students):
+    df = students()
+    p = GradePredictor.train(df)
+    X = df[FEATURES].to_numpy(dtype=float)[:3].copy()
+    X[0, 1] = np.nan
+    filled = X.copy()
+    filled[0, 1] = p.medians[1]
+    np.testing.assert_allclose(p.predict_many(X), p.predict_many(filled))
+
+
+def test_cache_hits_and_row_invalidation(students):
+    df = students()
+    p = GradePredictor.train(df)
+    store = StudentStore.from_frame(df)
+    p.warm_cache(store)
+    rows = store.course_rows("C1")[:3]
+
+    first = p.cached_predict(store, rows)
+    np.testing.assert_allclose(first, p.predict_rows(store, rows))
+    assert p.cache.stats()["hits"] == 3 and p.cache.stats()["misses"] == 0
+
+    # Changing a feature changes the hash, so the stale entry is never served
+    r = store.record(rows[0])
+    store.update("C1", r["student_id"], {"missing_assignments": r["missing_assignments"] + 5})
+    p.cache.invalidate("C1", r["student_id"])
+    again = p.cached_predict(store, rows)
+    assert p.cache.stats()["misses"] == 1
+    np.testing.assert_allclose(again, p.predict_rows(store, rows))
+
+
+def test_flat_engine_matches_sklearn(students):
+    df = students(n=200, seed=1)
+    p = GradePredictor.train(df)
+    X = df[FEATURES].to_numpy(dtype=float)
+    X[3, 2] = np.nan  # exercise the missing-value path without imputation
+    expected = p.model.predict(pd.DataFrame(X, columns=FEATURES))
+
+    flat = p.use_engine("flat").flat
+    np.testing.assert_allclose(flat.predict(X), expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(p.predict_many(X[:1]), np.clip(expected[:1], 0, 100))
+
+
+def test_compact_export_round_trips(students, tmp_path):
+    df = students(n=200, seed=2)
+    p = GradePredictor.train(df, n_estimators=50)
+    p.courses = {"C1": GradePredictor.train(df, n_estimators=10)}
+    X = df[FEATURES].to_numpy(dtype=float)
+    X[5, 1] = np.nan
+    expected = p.predict_many(X)
+
+    size = save_compact(p, tmp_path / "exact")
+    loaded = load_compact(tmp_path / "exact")
+    assert loaded.model is None and isinstance(loaded.flat.threshold, np.memmap)
+    assert loaded.flat.threshold.dtype == np.float32 and size < p.use_engine("flat").flat.nbytes
+    assert loaded.version == p.version and set(loaded.courses) == {"C1"}
+    np.testing.assert_allclose(loaded.predict_many(X), expected, atol=1e-4)
+
+    # Quantized leaves and pruning trade bounded error for size
+    small = save_compact(p, tmp_path / "small", leaf_dtype="uint16", prune_tol=0.5)
+    assert small < size
+    assert np.abs(load_compact(tmp_path / "small").predict_many(X) - expected).max() < 1.0
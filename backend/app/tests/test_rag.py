@@ -0,0 +1,59 @@
+import numpy as np
+
+from backend.app.services.rag import COURSE_NOTES, Bm25Retriever, CourseRetriever, MiniRetriever
+
+
+def test_bm25_keeps_retrieve_interface():
+    r = Bm25Retriever(COURSE_NOTES)
+    hits = r.retrieve("what is the late work penalty?", k=3)
+    assert hits[0][0] == "course_policy"
+    assert r.retrieve("zzz qqq", k=3) == []
+    assert hits[0] == MiniRetriever(docs=COURSE_NOTES).retrieve("what is the late work penalty?", k=1)[0]
+
+
+def test_bm25_prefers_rarer_terms_and_respects_k():
+    docs = [
+        ("a", "attendance plan attendance plan attendance"),
+        ("b", "attendance plan for exam retakes"),
+        ("c", "exam retakes allowed"),
+    ]
+    r = Bm25Retriever(docs)
+    assert [d for d, _ in r.retrieve("exam retakes", k=2)] == ["c", "b"]
+    assert len(r.retrieve("attendance exam", k=1)) == 1
+
+
+def test_course_partitions():
+    r = CourseRetriever.build(COURSE_NOTES, {"C1": [("c1_syllabus", "Lab reports are due every Friday.")]})
+    assert r.for_course("C1").retrieve("when are lab reports due", k=1)[0][0] == "c1_syllabus"
+    assert r.for_course("C2").retrieve("lab reports", k=1) == []
+    assert r.for_course("C1").retrieve("late work policy", k=1)[0][0] == "course_policy"
+
+
+def test_persisted_index_roundtrip_with_incremental_updates(tmp_path):
+    docs = [(f"d{i}", f"passage {i} about attendance plans") for i in range(5)] + [("exam", "exam retake policy")]
+    Bm25Retriever(docs).save(tmp_path / "idx")
+
+    idx = Bm25Retriever.load(tmp_path / "idx")
+    assert isinstance(idx.segments[0].post_docs, np.memmap)
+    assert idx.retrieve("retake", k=1) == [("exam", "exam retake policy")]
+
+    idx.add([("lab", "lab safety goggles required")])
+    assert idx.remove(["exam"]) == 1
+    idx.save(tmp_path / "idx")
+
+    again = Bm25Retriever.load(tmp_path / "idx")
+    assert again.retrieve("retake", k=1) == []
+    assert again.retrieve("goggles", k=1)[0][0] == "lab"
+    assert len(again) == 6
+
+    again.compact()
+    again.save(tmp_path / "idx")
+    final = Bm25Retriever.load(tmp_path / "idx")
+    assert len(final.segments) == 1 and len(final) == 6
+
+
+def test_course_retriever_save_load(tmp_path):
+    CourseRetriever.build(COURSE_NOTES, {"C1": [("c1_syllabus", "Lab reports are due every Friday.")]}).save(tmp_path)
+    r = CourseRetriever.load(tmp_path)
+    assert r.for_course("C1").retrieve("lab reports", k=1)[0][0] == "c1_syllabus"
+    assert r.for_course("C9").retrieve("late work", k=1)[0][0] == "course_policy"
@@ -0,0 +1,84 @@
+import asyncio
+
+from backend.app.services.intent_router import DEFAULT_ROUTER
+from backend.app.services.response_cache import ENTRY_OVERHEAD_BYTES, ResponseCache, chat_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DictBackend:
+    """In-memory stand-in for the shared tier (same get/set interface as RedisBackend)."""
+
+    def __init__(self):
+        self.data = {}
+        self.errors = 0
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, blob, ttl_seconds):
+        self.data[key] = blob
+
+
+def _key(message):
+    return chat_key(DEFAULT_ROUTER.parse(message), message)
+
+
+def test_paraphrases_share_a_key():
+    assert _key("How is student S100100 doing?") == _key("how is  S100100 doing in my course")
+    assert _key("How is student S100100 doing?") != _key("How is student S100101 doing?")
+    assert _key("students below 60%") != _key("students below 65%")
+    # Course-notes answers depend on every word
+    assert _key("what is the late work policy") != _key("what is the retake policy")
+
+
+def test_lru_ttl_and_budget():
+    async def run():
+        clock = Clock()
+        cache = ResponseCache(max_bytes=3 * (ENTRY_OVERHEAD_BYTES + 100), ttl_seconds=10, clock=clock)
+        keys = [cache.key("v1", "C1", i) for i in range(4)]
+        for k in keys[:3]:
+            await cache.put(k, "x" * 50)
+        assert await cache.get(keys[0]) == "x" * 50  # now most recently used
+        await cache.put(keys[3], "y" * 50)          # evicts keys[1]
+        assert await cache.get(keys[1]) is None
+        assert await cache.get(keys[2]) is not None
+        assert cache.stats()["evictions"] == 1
+
+        clock.now = 11
+        assert await cache.get(keys[0]) is None
+        stats = cache.stats()
+        assert stats["expirations"] == 1 and stats["hits"] == 2 and stats["misses"] == 2
+        assert stats["bytes"] <= cache.max_bytes
+    asyncio.run(run())
+
+
+def test_invalidation_and_shared_tier():
+    async def run():
+        shared = DictBackend()
+        a = ResponseCache(shared=shared)
+        b = ResponseCache(shared=shared)
+        await a.put(a.key("v1", "C1", "insights"), {"n": 1})
+        # Another worker with the same data tag reuses it
+        assert await b.get(b.key("v1", "C1", "insights")) == {"n": 1}
+        assert b.stats()["shared_hits"] == 1
+        assert await b.get(b.key("v2", "C1", "insights")) is None
+
+        # An in-place update hides the course from both tiers, and a racing put is dropped
+        stale = a.key("v1", "C1", "insights")
+        a.invalidate_course("C1")
+        await a.put(stale, {"n": 0})
+        assert await a.get(a.key("v1", "C1", "insights")) is None
+        await a.put(a.key("v1", "C1", "insights"), {"n": 2})
+        assert await a.get(a.key("v1", "C1", "insights")) == {"n": 2}
+        assert await b.get(b.key("v1", "C1", "insights")) == {"n": 1}
+
+        a.clear()
+        assert await a.get(a.key("v1", "C1", "insights")) == {"n": 1}
+    asyncio.run(run())
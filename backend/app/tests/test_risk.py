@@ -0,0 +1,66 @@
+import numpy as np
+
+from backend.app.services.predictive import FEATURES, GradePredictor, load_compact, save_compact
+from backend.app.services.risk import FailClassifier, brier
+from backend.app.services.store import StudentStore
+
+def _labelled(df, seed=0):
+    """Adds a 0/1 fail label drawn from a known probability; returns (df, that probability)."""
+    true_p = 1 / (1 + np.exp(-(0.12 * (65 - df["current_grade"]) + 0.3 * df["missing_assignments"] - 1.0)))
+    df["label"] = np.random.default_rng([seed, 1]).binomial(1, true_p)
+    return df, true_p.to_numpy()
+
+
+def test_classifier_is_calibrated_and_beats_the_fallback_curve(students):
+    df, true_p = _labelled(students(n=3000, courses=("C1", "C2")))
+    clf = FailClassifier.train(df, FEATURES)
+    assert clf.metrics["rows"] == len(df)
+    p = clf.predict_proba(df[FEATURES].to_numpy(dtype=float))
+    assert ((p >= 0) & (p <= 1)).all()
+    # Close to the generating probabilities, and within a few points per decile
+    assert np.abs(p - true_p).mean() < 0.06
+    y = df["label"].to_numpy()
+    for chunk in np.array_split(np.argsort(p), 10):
+        assert abs(p[chunk].mean() - y[chunk].mean()) < 0.08
+
+    predictor = GradePredictor.train(df, n_estimators=20)
+    fallback = predictor.prob_fail_many(predictor.predict_many(df[FEATURES].to_numpy(dtype=float)))
+    assert brier(p, y) < brier(fallback, y)
+
+    # Unlabelled data (or a single class) has nothing to train on
+    assert FailClassifier.train(df.drop(columns="label"), FEATURES) is None
+    assert FailClassifier.train(df.assign(label=0), FEATURES) is None
+
+
+def test_predictor_serves_classifier_risk_and_round_trips(students, tmp_path):
+    df, _ = _labelled(students(n=800, seed=1, courses=("C1", "C2")), seed=1)
+    store = StudentStore.from_frame(df)
+    rows = store.course_rows("C1")
+    p = GradePredictor.fit_baseline(df)
+    pred = p.predict_rows(store, rows)
+    risk = p.risk_rows(store, rows, pred)
+    np.testing.assert_allclose(risk, p.classifier.predict_proba(store.features(rows, FEATURES)))
+
+    save_compact(p, tmp_path / "forest")
+    np.testing.assert_allclose(load_compact(tmp_path / "forest").risk_rows(store, rows, pred), risk)
+
+    p.classifier = None
+    np.testing.assert_allclose(p.risk_rows(store, rows, pred), p.prob_fail_many(pred))
+
+
+def test_batch_scoring_is_bounded_monotonic_and_matches_rows(students):
+    # Latency is tracked by scripts/benchmark_suite.py (predictive.fail_classifier[10k])
+    df, _ = _labelled(students(n=2000, seed=2, courses=("C1", "C2")), seed=2)
+    clf = FailClassifier.train(df, FEATURES)
+    X = df[FEATURES].to_numpy(dtype=float)
+    X[::7, 0] = np.nan
+    p = clf.predict_proba(X)
+    assert ((p >= 0) & (p <= 1)).all() and not np.isnan(p).any()
+
+    # The calibration map never reverses the logistic ranking
+    assert np.all(np.diff(clf.knots_y) >= 0)
+    filled = np.where(np.isnan(X), clf.medians, X)
+    order = np.argsort(filled @ clf.weights + clf.intercept, kind="stable")
+    assert np.all(np.diff(p[order]) >= 0)
+
+    np.testing.assert_array_equal(p[:50], np.concatenate([clf.predict_proba(x) for x in X[:50]]))
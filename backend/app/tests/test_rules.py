@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.app.services.analytics import evaluate_drivers, grade_drivers
+from backend.app.services.prescriptive import recommendations
+from backend.app.services.rules import Rule, RuleTable
+from backend.app.services.store import StudentStore
+
+
+TABLE = RuleTable(
+    [
+        Rule.of("slow", "medium", "x is {x:.1f}.", ("x", "<", 5)),
+        Rule.of("big", "high", "y is {y:.0f}.", ("y", ">=", 10)),
+        Rule.of("either", "medium", "x {x:g} or y {y:g}.", ("x", "<", 1), ("y", ">", 100)),
+    ],
+    keys={"factor": "name", "severity": "level", "detail": "message"},
+    fallback=Rule.of("ok", "low", "Nothing to flag."),
+)
+
+
+def test_hits_are_ordered_by_level_then_table_order():
+    hits = TABLE.evaluate({"x": [0.5, 3.0, 7.0, np.nan], "y": [200, 12, 1, np.nan]})
+    assert hits.for_row(0) == [
+        {"factor": "big", "severity": "high", "detail": "y is 200."},
+        {"factor": "slow", "severity": "medium", "detail": "x is 0.5."},
+        {"factor": "either", "severity": "medium", "detail": "x 0.5 or y 200."},
+    ]
+    assert list(hits.names()) == ["big;slow;either", "big;slow", "", ""]
+    assert list(hits.first()) == ["big", "big", "ok", "ok"]
+    # NaN never fires a condition, so the last row gets the fallback
+    assert hits.for_row(3) == [{"factor": "ok", "severity": "low", "detail": "Nothing to flag."}]
+    assert hits.lists() == [hits.for_row(i) for i in range(4)]
+
+
+def test_rule_validation():
+    with pytest.raises(ValueError):
+        Rule.of("bad", "high", "", ("x", "=<", 1))
+    with pytest.raises(ValueError):
+        Rule.of("bad", "urgent", "", ("x", "<", 1))
+
+
+def test_tables_reproduce_hand_written_rules():
+    row = {"attendance_rate": 0.85, "missing_assignments": 4, "late_submissions": 1, "avg_quiz_score": 90.0,
+           "avg_hw_score": 72.0, "avg_exam_score": 65.25, "logins_last_7d": 1}
+    assert [r["action"] for r in recommendations(row)] == [
+        "Missing work recovery plan", "Attendance intervention", "Exam prep + reteach plan",
+        "Practice scaffolding", "Engagement nudge",
+    ]
+    fine = dict(row, attendance_rate=0.95, missing_assignments=0, avg_hw_score=90.0, avg_exam_score=90.0,
+                logins_last_7d=5)
+    assert recommendations(fine) == [{
+        "priority": "low", "action": "General support",
+        "details": "Schedule a student conference and set two measurable goals for the next 2 weeks.",
+    }]
+
+    store = StudentStore.from_frame(pd.DataFrame([dict(row, course_id="C1", student_id="S100001", current_grade=61.0)]))
+    assert grade_drivers(store, "C1", "S100001")["drivers"] == [
+        {"factor": "attendance", "severity": "high", "detail": "Attendance is 85%."},
+        {"factor": "missing_assignments", "severity": "high", "detail": "Missing 4 assignments."},
+        {"factor": "exam_performance", "severity": "high", "detail": "Average exam score 65.2."},
+        {"factor": "homework_performance", "severity": "medium", "detail": "Average HW score 72.0."},
+        {"factor": "low_platform_engagement", "severity": "medium", "detail": "Only 1 logins in last 7 days."},
+    ]
+
+
+def test_course_wide_hits_match_single_student():
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame({
+        "course_id": "C1",
+        "student_id": [f"S{100000 + i}" for i in range(n)],
+        "current_grade": rng.uniform(40, 100, n),
+        "attendance_rate": rng.uniform(0.6, 1.0, n),
+        "missing_assignments": rng.integers(0, 8, n),
+        "late_submissions": rng.integers(0, 6, n),
+        "avg_quiz_score": rng.uniform(40, 100, n),
+        "avg_hw_score": rng.uniform(40, 100, n),
+        "avg_exam_score": rng.uniform(40, 100, n),
+        "logins_last_7d": rng.integers(0, 10, n),
+    })
+    store = StudentStore.from_frame(df)
+    rows = store.course_rows("C1")
+    hits = evaluate_drivers(store, rows)
+    for sid, drivers in zip(store.student_ids(rows), hits.lists()):
+        assert drivers == grade_drivers(store, "C1", sid)["drivers"]
@@ -0,0 +1,82 @@
+from backend.app.services.intent_router import DEFAULT_ROUTER
+from backend.app.services.response_cache import chat_key
+from backend.app.services.sessions import SESSION_OVERHEAD_BYTES, SessionStore, resolve_followup
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _turn(store, ctx, message):
+    parsed = resolve_followup(DEFAULT_ROUTER.parse(message), message, ctx)
+    store.record(ctx, parsed)
+    return parsed
+
+
+def test_followups_resolve_to_the_current_student():
+    store = SessionStore()
+    ctx = store.open("T1", None, "C1")
+    assert ctx.session_id
+    _turn(store, ctx, "How is student S100100 doing?")
+
+    help_them = _turn(store, ctx, "What can we do to help them?")
+    assert (help_them.intent, help_them.student_ids) == ("prescribe", ["S100100"])
+    # Same query (and response-cache key) as naming the student
+    explicit = DEFAULT_ROUTER.parse("Give recommendations to help S100100 pass.")
+    assert chat_key(help_them, "What can we do to help them?") == chat_key(explicit, "")
+    assert _turn(store, ctx, "How will they do by the end of the course?").student_ids == ["S100100"]
+    assert _turn(store, ctx, "Why is she struggling?").intent == "grade_drivers"
+
+    # Cohorts and unrelated questions are left alone; several students make "them" ambiguous
+    assert _turn(store, ctx, "How are my bottom 10 doing?").student_ids == []
+    assert _turn(store, ctx, "What is the late work policy?").intent == "fallback"
+    _turn(store, ctx, "Compare S100100 and S100101")
+    assert _turn(store, ctx, "How are they doing?").student_ids == []
+
+    _turn(store, ctx, "Which students struggled the most on assignment A3?")
+    assert _turn(store, ctx, "Which students scored below 50 on it?").assignment_ids == ["A3"]
+
+
+def test_token_resumes_and_history_seeds_unknown_sessions():
+    store = SessionStore()
+    ctx = store.open("T1", None, "C1")
+    _turn(store, ctx, "How is student S100100 doing?")
+    assert store.open("T1", ctx.session_id, "C1") is ctx
+    # Tokens are per teacher; another course starts the entities over
+    assert store.open("T2", ctx.session_id, "C1") is not ctx
+    assert store.open("T1", ctx.session_id, "C2").student_id is None
+
+    seeded = store.open("T1", "lost-token", "C1", history=["How is S100120 doing?", "What is pulling their grade down?"],
+                        router=DEFAULT_ROUTER)
+    assert seeded.session_id == "lost-token" and seeded.student_id == "S100120"
+    assert store.stats()["seeded_from_history"] == 1
+
+
+def test_lru_ttl_and_budget():
+    clock = Clock()
+    store = SessionStore(max_bytes=3 * SESSION_OVERHEAD_BYTES + 400, ttl_seconds=10, max_results=2, clock=clock)
+    parsed = DEFAULT_ROUTER.parse("How is S100100 doing?")
+    a, b, c = (store.open("T1", None, "C1") for _ in range(3))
+
+    # Recent answers are kept per session, at most max_results of them
+    for i in range(3):
+        store.record(a, parsed, ("v1", "C1", 0, i), "x" * 100)
+    assert store.result(a, ("v1", "C1", 0, 0)) is None
+    assert store.result(a, ("v1", "C1", 0, 2)) == "x" * 100
+    assert store.bytes == sum(s.size for s in (a, b, c)) <= store.max_bytes
+
+    # Over budget: the least recently used session goes
+    store.open("T1", a.session_id, "C1")
+    store.record(b, parsed, ("v1", "C1", 0, 0), "y" * 300)
+    assert store.stats()["evictions"] == 1 and store.stats()["sessions"] == 2
+    assert store.open("T1", c.session_id, "C1") is not c
+
+    clock.now = 11
+    assert store.open("T1", a.session_id, "C1") is not a
+    assert store.stats()["expirations"] >= 1
+    store.clear_results()
+    assert store.bytes == SESSION_OVERHEAD_BYTES * store.stats()["sessions"]
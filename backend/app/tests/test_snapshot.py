@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from backend.app.services.snapshot import SnapshotManager
+
+
+class _Snap:
+    def __init__(self, version):
+        self.version = version
+        self.load_seconds = 0.0
+
+
+def test_reload_swaps_versions_and_keeps_old_reference(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a\n")
+    mgr = SnapshotManager(build=_Snap, watch_paths=[data])
+
+    first = mgr.reload()
+    held = mgr.current  # an in-flight request keeps this
+    assert not mgr.changed()
+
+    data.write_text("a\nb\n")
+    assert mgr.changed()
+    second = mgr.reload()
+    assert (first.version, second.version) == (1, 2)
+    assert held.version == 1 and mgr.current is second
+
+
+def test_file_changed_during_build_is_reloaded_again(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a\n")
+
+    def build(version):
+        if version == 1:
+            data.write_text("a\nb\n")  # lands while the build is reading
+        return _Snap(version)
+
+    mgr = SnapshotManager(build=build, watch_paths=[data])
+    mgr.reload()
+    assert mgr.changed()
+    mgr.reload()
+    assert not mgr.changed()
+
+
+def test_failed_reload_keeps_current_snapshot(tmp_path):
+    calls = []
+
+    def build(version):
+        calls.append(version)
+        if version == 2:
+            raise OSError("half-written file")
+        return _Snap(version)
+
+    mgr = SnapshotManager(build=build, watch_paths=[tmp_path])
+    mgr.reload()
+    with pytest.raises(OSError):
+        mgr.reload()
+    assert mgr.current.version == 1
+    assert "half-written" in mgr.last_error
+
+
+def test_watcher_reloads_on_change(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a\n")
+    mgr = SnapshotManager(build=_Snap, watch_paths=[data], poll_seconds=0.01)
+    mgr.reload()
+    mgr.start_watching()
+    try:
+        data.write_text("changed\n")
+        deadline = time.time() + 2
+        while mgr.current.version == 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert mgr.current.version == 2
+    finally:
+        mgr.stop_watching()
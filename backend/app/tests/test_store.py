@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.app.services.data_repo import ASSIGNMENT_NUMERIC_COLS, ASSIGNMENT_STRING_COLS, ColumnarTable
+from backend.app.services.store import AssignmentStore, StudentStore, SubmissionStore
+
+
+def _frame():
+    return pd.DataFrame([
+        {"course_id": "C1", "student_id": "S100001", "current_grade": 65, "attendance_rate": 0.85,
+         "missing_assignments": 4, "late_submissions": 2, "avg_quiz_score": 70, "avg_hw_score": 72,
+         "avg_exam_score": 60, "logins_last_7d": 1},
+        {"course_id": "C1", "student_id": "S100002", "current_grade": 91, "attendance_rate": 0.98,
+         "missing_assignments": 0, "late_submissions": 0, "avg_quiz_score": 92, "avg_hw_score": 95,
+         "avg_exam_score": 88, "logins_last_7d": 6},
+        {"course_id": "C2", "student_id": "S100001", "current_grade": 55, "attendance_rate": 0.80,
+         "missing_assignments": 6, "late_submissions": 3, "avg_quiz_score": 60, "avg_hw_score": 58,
+         "avg_exam_score": 50, "logins_last_7d": 0},
+    ])
+
+
+def test_locate_by_course_and_student():
+    store = StudentStore.from_frame(_frame())
+    row = store.locate("C2", "S100001")
+    assert store.record(row)["current_grade"] == 55.0
+    assert store.find("C3", "S100001") is None
+    with pytest.raises(ValueError):
+        store.locate("C1", "S999999")
+
+
+def test_columns_are_contiguous():
+    store = StudentStore.from_frame(_frame())
+    grade = store.column("current_grade")
+    assert grade.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(grade, [65.0, 91.0, 55.0])
+    X = store.features([0, 2], ["current_grade", "logins_last_7d"])
+    np.testing.assert_array_equal(X, [[65.0, 1.0], [55.0, 0.0]])
+
+
+def test_below_threshold_is_sorted_slice():
+    store = StudentStore.from_frame(_frame())
+    rows = store.below("C1", 70.0)
+    assert store.student_ids(rows).tolist() == ["S100001"]
+    assert store.student_ids(store.course_rows("C1")).tolist() == ["S100001", "S100002"]
+    assert store.below("C9", 70.0).size == 0
+
+
+def test_assignment_store_hardest_first():
+    df = pd.DataFrame([
+        {"course_id": "C1", "assignment_id": "A1", "assignment_name": "Assignment 1", "avg_score": 80.0, "submission_rate": 0.9},
+        {"course_id": "C1", "assignment_id": "A2", "assignment_name": "Assignment 2", "avg_score": 60.0, "submission_rate": 0.8},
+        {"course_id": "C1", "assignment_id": "A3", "assignment_name": "Assignment 3", "avg_score": 70.0, "submission_rate": 0.95},
+    ])
+    store = AssignmentStore.from_frame(df)
+    assert [a["assignment_id"] for a in store.hardest("C1", top_n=2)] == ["A2", "A3"]
+    assert [a["assignment_id"] for a in store.below("C1", 75.0)] == ["A2", "A3"]
+    assert store.hardest("C2") == []
+
+
+def test_submission_store_indexes_and_aggregates():
+    students = StudentStore.from_frame(_frame())
+    day = 86400.0
+    subs = pd.DataFrame([
+        # C1/A1 (due first): one missing, S100001 scored low and late
+        {"course_id": "C1", "student_id": "S100001", "assignment_id": "A1", "score": 55.0, "submitted_at": 1 * day, "late": 1},
+        {"course_id": "C1", "student_id": "S100002", "assignment_id": "A1", "score": 90.0, "submitted_at": 1 * day, "late": 0},
+        {"course_id": "C1", "student_id": "S999999", "assignment_id": "A1", "score": np.nan, "submitted_at": np.nan, "late": 0},
+        # C1/A2 (due second)
+        {"course_id": "C1", "student_id": "S100001", "assignment_id": "A2", "score": 65.0, "submitted_at": 8 * day, "late": 0},
+        {"course_id": "C1", "student_id": "S100002", "assignment_id": "A2", "score": np.nan, "submitted_at": np.nan, "late": 0},
+        {"course_id": "C2", "student_id": "S100001", "assignment_id": "A1", "score": 40.0, "submitted_at": 2 * day, "late": 0},
+    ])
+    store = SubmissionStore.from_frame(subs, students)
+    assert len(store) == 6
+
+    weakest = store.weakest("C1", "A1")
+    assert store.score[weakest].tolist() == [55.0, 90.0]
+    assert store.score[store.weakest("C1", "A1", threshold=60.0)].tolist() == [55.0]
+    # Not submitted, including a student missing from the roster (student_row -1)
+    assert store.student_row[store.missing("C1", "A1")].tolist() == [-1]
+    assert store.missing("C9", "A1").size == 0 and not store.has_assignment("C9", "A1")
+
+    stats = store.stats.set_index(["course_id", "assignment_id"])
+    assert stats.loc[("C1", "A1"), "avg_score"] == pytest.approx(72.5)
+    assert stats.loc[("C1", "A1"), "submission_rate"] == pytest.approx(2 / 3)
+    assert stats.loc[("C1", "A1"), "late_rate"] == pytest.approx(0.5)
+
+    # Per-student rows in due order, and the score trend across them
+    row = students.locate("C1", "S100001")
+    assert store.assignment_ids(store.student_rows(row)).tolist() == ["A1", "A2"]
+    assert store.trend[row] == pytest.approx(10.0)
+    assert np.isnan(store.trend[students.locate("C1", "S100002")])
+
+    names = pd.DataFrame([{"course_id": "C1", "assignment_id": "A1", "assignment_name": "Assignment 1",
+                           "avg_score": 0.0, "submission_rate": 0.0}])
+    table = ColumnarTable.from_frame(names, ASSIGNMENT_NUMERIC_COLS, ASSIGNMENT_STRING_COLS)
+    assignments = AssignmentStore.from_submissions(table, store)
+    assert [(a["assignment_id"], a["assignment_name"]) for a in assignments.hardest("C1")] == [
+        ("A2", "A2"), ("A1", "Assignment 1")]
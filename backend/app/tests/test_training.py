@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from backend.app.services.predictive import GradePredictor
+from backend.app.services.snapshot import build_snapshot
+from backend.app.services.store import StudentStore
+from backend.app.services.training import GLOBAL, ModelRegistry, run_pipeline
+
+
+def _csv(path, df):
+    """Write `df` as the combined CSV, with one assignment row."""
+    assignment = pd.DataFrame([{"record_type": "assignment", "course_id": "C1", "assignment_id": "A1",
+                                "assignment_name": "Assignment 1", "avg_score": 70.0, "submission_rate": 0.9}])
+    pd.concat([assignment, df.assign(record_type="student")]).to_csv(path, index=False)
+    return df
+
+
+def test_pipeline_publishes_versioned_artifacts_and_warm_starts(students, tmp_path):
+    data, artifacts = tmp_path / "data.csv", tmp_path / "artifacts"
+    df = _csv(data, students(n=150, courses=("C1", "C2")))
+    registry = ModelRegistry(artifacts)
+
+    meta = run_pipeline(data, artifacts, scope="both", trees=10, jobs=2)
+    assert registry.latest_version() == meta["version"]
+    assert set(meta["models"]) == {GLOBAL, "C1", "C2"}
+    assert meta["rows"] == len(df) and len(meta["data_hash"]) == 24
+    assert {"oob_mae", "seconds", "trees"} <= set(meta["models"]["C1"])
+
+    # Same data + settings: nothing to do
+    assert run_pipeline(data, artifacts, scope="both", trees=10)["skipped"]
+
+    grown = run_pipeline(data, artifacts, scope="both", trees=10, warm_start=True, add_trees=5, force=True)
+    assert grown["parent_version"] == meta["version"]
+    assert grown["models"]["C2"] == {**grown["models"]["C2"], "trees": 15, "warm_started": True}
+    assert registry.versions() == sorted([meta["version"], grown["version"]])
+
+    # Rows are routed to their course's model
+    predictor = registry.load()
+    store = StudentStore.from_frame(df)
+    rows = store.course_rows("C2")
+    np.testing.assert_allclose(predictor.predict_rows(store, rows),
+                               predictor.courses["C2"].predict_rows(store, rows))
+    np.testing.assert_allclose(predictor.cached_predict(store, rows), predictor.predict_rows(store, rows))
+
+
+def test_api_snapshot_uses_baseline_until_an_artifact_exists(students, tmp_path):
+    data, artifacts = tmp_path / "data.csv", tmp_path / "artifacts"
+    _csv(data, students(n=150, courses=("C1", "C2")))
+    snap = build_snapshot(1, data, artifacts)
+    assert snap.predictor.baseline and not artifacts.exists()
+    assert build_snapshot(2, data, artifacts).predictor.version == snap.predictor.version
+
+    meta = run_pipeline(data, artifacts, trees=10)
+    snap = build_snapshot(3, data, artifacts)
+    assert snap.predictor.version == meta["version"] and not snap.predictor.baseline
+    assert isinstance(snap.predictor, GradePredictor)
+    # Served from the memory-mapped compact export; the pickle stays for warm starts
+    assert snap.predictor.model is None and meta["export"]["compact_bytes"] < meta["export"]["pickle_bytes"]
+    assert ModelRegistry(artifacts).load(compact=False).model is not None
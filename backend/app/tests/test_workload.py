@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from loadtest.workload import (
+    DEFAULT_MIX,
+    DEFAULT_SLO,
+    Population,
+    ZipfSampler,
+    evaluate_slos,
+    parse_mix,
+    parse_slos,
+)
+
+
+def test_mix_overrides_defaults():
+    assert parse_mix("") == DEFAULT_MIX
+    mix = parse_mix("student_status=20, insights=0")
+    assert mix == {**DEFAULT_MIX, "student_status": 20.0, "insights": 0.0}
+    with pytest.raises(ValueError, match="Unknown request"):
+        parse_mix("nope=1")
+    with pytest.raises(ValueError, match="no positive weights"):
+        parse_mix(",".join(f"{name}=0" for name in DEFAULT_MIX))
+
+
+def test_slo_overrides_merge_per_key():
+    slo, per_name = parse_slos("p95=300", "cohort:p95=800;insights:errors=0.05")
+    assert slo == {**DEFAULT_SLO, "p95": 300.0}
+    # Unlisted keys keep the built-in override
+    assert per_name["cohort"] == {"p95": 800.0, "p99": 2500.0}
+    assert per_name["insights"] == {"errors": 0.05}
+    with pytest.raises(ValueError, match="Unknown SLO"):
+        parse_slos("p50=100")
+
+
+def test_evaluate_slos_passes_and_fails_per_name():
+    slo, per_name = parse_slos("p95=500,p99=1500,errors=0.01", "")
+    rows = [
+        {"name": "student_status", "requests": 1000, "failures": 5, "p50": 80, "p95": 400, "p99": 900},
+        {"name": "grade_drivers", "requests": 100, "failures": 2, "p50": 90, "p95": 600, "p99": 900},
+        {"name": "cohort", "requests": 100, "failures": 0, "p50": 300, "p95": 900, "p99": 2000},
+    ]
+    results = {r["name"]: r for r in evaluate_slos(rows, slo, per_name)}
+    assert results["student_status"]["passed"] and results["student_status"]["error_rate"] == 0.005
+    assert results["grade_drivers"]["violated"] == ["p95", "errors"]
+    # cohort has a looser built-in override
+    assert results["cohort"]["passed"] and results["cohort"]["slo"]["p95"] == 1000.0
+
+
+def test_zipf_skew():
+    items = np.array([f"S{i}" for i in range(10)])
+    rng = np.random.default_rng(0)
+    uniform = pd.Series(ZipfSampler(items, s=0.0).sample(rng, 50_000)).value_counts(normalize=True)
+    assert len(uniform) == 10 and np.allclose(uniform, 0.1, atol=0.01)
+
+    sampler = ZipfSampler(items, s=1.5, seed=3)
+    skewed = pd.Series(sampler.sample(rng, 50_000)).value_counts(normalize=True)
+    expected = np.arange(1, 11) ** -1.5 / (np.arange(1, 11) ** -1.5).sum()
+    # Rank 1 is the first item of the seeded shuffle
+    assert skewed.index[0] == sampler.items[0]
+    np.testing.assert_allclose(skewed[sampler.items].to_numpy(), expected, atol=0.01)
+
+
+def test_messages_name_students_of_the_course(tmp_path):
+    csv = tmp_path / "data.csv"
+    pd.DataFrame([
+        {"record_type": "assignment", "course_id": "C1", "assignment_id": "A7", "assignment_name": "Essay",
+         "avg_score": 70.0, "submission_rate": 0.9},
+        *({"record_type": "student", "course_id": c, "student_id": f"S{100000 + i}", "current_grade": 70}
+          for i, c in enumerate(["C1", "C1", "C2"])),
+    ]).to_csv(csv, index=False)
+    population = Population.load(csv, seed=0)
+    rng = np.random.default_rng(0)
+
+    assert sorted(population.students) == ["C1", "C2"]
+    message = population.message("assignment_drilldown", "C1", rng)
+    assert "A7" in message
+    assert population.message("student_status", "C2", rng) in (
+        "How is student S100002 doing in my course?", "how is S100002 doing?")
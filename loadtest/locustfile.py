@@ -1,28 +1,122 @@
-from locust import HttpUser, task, between
+"""
+Locust load test: simulated teachers chatting with the assistant and opening course
+reports, against a running API (see loadtest/workload.py for the workload model).
 
-class TeacherAssistantUser(HttpUser):
-    wait_time = between(1, 3)
+Each simulated user is one teacher in one course (Zipf-drawn) with one chat session.
+Every request is named after its intent, so Locust's stats, and the SLO report
+printed at the end, break latency down per intent.
 
-    @task
-    def chat_student_status(self):
-        payload = {
-            "teacher_id": "T1",
-            "course_id": "C1",
-            "message": "How is student S100100 doing in my course?",
-            "history": []
-        }
-        self.client.post("/chat", json=payload)
+Headless run against a local server (exits 1 if any SLO fails):
 
-    @task
-    def chat_grade_drivers(self):
-        payload = {
-            "teacher_id": "T1",
-            "course_id": "C1",
-            "message": "What is pulling student S100120's grade down?",
-            "history": []
+    locust -f loadtest/locustfile.py --headless -u 50 -r 10 -t 5m --host http://localhost:8000 \\
+        --data-path data/synthetic_course_data.csv --zipf 1.1 \\
+        --slo "p95=500,p99=1500,errors=0.01" --slo-for "interventions:p95=2000" \\
+        --slo-report loadtest/slo_report.json
+
+--data-path must be the dataset the server loaded (its DATA_PATH), so requests name
+real students. --mix reweights requests, e.g. "insights=20,interventions=0".
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from locust import HttpUser, events, task
+
+from workload import FOLLOWUP_TEMPLATES, Population, evaluate_slos, format_report, parse_mix, parse_slos
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    parser.add_argument("--data-path", default=os.environ.get("DATA_PATH", "data/synthetic_course_data.csv"),
+                        help="dataset the server loaded (CSV or columnar directory)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="student popularity exponent within a course (0 = uniform)")
+    parser.add_argument("--course-zipf", type=float, default=0.8, help="course popularity exponent")
+    parser.add_argument("--mix", default="", help='request weights, e.g. "student_status=20,insights=0"')
+    parser.add_argument("--think-time", default="1,3", help="seconds between a user's requests: min,max")
+    parser.add_argument("--slo", default="", help='default SLO, e.g. "p95=500,p99=1500,errors=0.01"')
+    parser.add_argument("--slo-for", default="", help='per-request SLOs, e.g. "interventions:p95=2000;cohort:p99=3000"')
+    parser.add_argument("--slo-report", default="", help="also write the SLO report as JSON here")
+    parser.add_argument("--workload-seed", type=int, default=0)
+
+
+workload: dict = {}
+
+
+@events.test_start.add_listener
+def load_workload(environment, **kwargs):
+    opts = environment.parsed_options
+    mix = parse_mix(opts.mix)
+    low, high = (float(x) for x in opts.think_time.split(","))
+    workload.update(
+        population=Population.load(Path(opts.data_path), zipf_s=opts.zipf, course_zipf_s=opts.course_zipf,
+                                   seed=opts.workload_seed),
+        names=list(mix),
+        weights=np.array(list(mix.values())) / sum(mix.values()),
+        think=(low, high),
+        slos=parse_slos(opts.slo, opts.slo_for),
+    )
+
+
+@events.quitting.add_listener
+def report_slos(environment, **kwargs):
+    if "slos" not in workload:
+        return
+    rows = [
+        {
+            "name": entry.name,
+            "requests": entry.num_requests,
+            "failures": entry.num_failures,
+            "p50": entry.get_response_time_percentile(0.50),
+            "p95": entry.get_response_time_percentile(0.95),
+            "p99": entry.get_response_time_percentile(0.99),
         }
-        self.client.post("/chat", json=payload)
+        for entry in environment.stats.entries.values()
+        if entry.num_requests
+    ]
+    results = evaluate_slos(rows, *workload["slos"])
+    print(format_report(results))
+    if environment.parsed_options.slo_report:
+        Path(environment.parsed_options.slo_report).write_text(json.dumps(results, indent=2))
+    if any(not r["passed"] for r in results):
+        environment.process_exit_code = 1
+
+
+class TeacherAssistantUser(HttpUser):
+    def wait_time(self):
+        return self.rng.uniform(*workload["think"])
+
+    def on_start(self):
+        self.rng = np.random.default_rng()
+        population = workload["population"]
+        self.course_id = str(population.courses.sample(self.rng)[0])
+        self.teacher_id = f"T{self.rng.integers(1_000_000)}"
+        self.session_id = None
+
+    def chat(self, name: str, message: str):
+        body = {"teacher_id": self.teacher_id, "course_id": self.course_id, "message": message}
+        if self.session_id:
+            body["session_id"] = self.session_id
+        with self.client.post("/chat", json=body, name=name, catch_response=True) as resp:
+            if resp.ok:
+                self.session_id = resp.json().get("session_id") or self.session_id
+            else:
+                resp.failure(f"HTTP {resp.status_code}")
 
     @task
-    def insights(self):
-        self.client.get("/courses/C1/insights")
+    def request(self):
+        name = str(self.rng.choice(workload["names"], p=workload["weights"]))
+        population = workload["population"]
+        if name == "insights":
+            self.client.get(f"/courses/{self.course_id}/insights", name="insights")
+        elif name == "interventions":
+            limit = int(self.rng.choice([50, 100, 500]))
+            self.client.get(f"/courses/{self.course_id}/interventions?min_risk=0.5&limit={limit}", name="interventions")
+        elif name == "followup":
+            # Ask about a student, then refer back to them in the same session; the setup
+            # turn gets its own name so it doesn't skew student_status latencies
+            self.chat("followup_setup", population.message("student_status", self.course_id, self.rng))
+            self.chat("followup", FOLLOWUP_TEMPLATES[self.rng.integers(len(FOLLOWUP_TEMPLATES))])
+        else:
+            self.chat(name, population.message(name, self.course_id, self.rng))
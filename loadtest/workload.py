@@ -0,0 +1,197 @@
+"""
+Workload model for the Locust load test (loadtest/locustfile.py); no Locust import,
+so the sampling and SLO logic can be checked on their own.
+
+- population: real course / student / assignment IDs from the dataset the server
+  loaded (CSV, CSV shards or columnar directory, via CourseDataRepo)
+- Zipf popularity: courses and, within a course, students are drawn with
+  P(rank k) ~ 1 / k^s over a seeded shuffle, so a few are hot and most are cold
+  (s=0 is uniform). Hot students hit caches; the long tail doesn't
+- request mix: every intent the chat router supports plus cohort, assignment
+  drill-down, session follow-ups, course insights and the interventions report,
+  each with several phrasings; weights are configurable
+- SLOs: p95 / p99 latency and error-rate limits, a default plus per-name overrides,
+  evaluated from the per-name stats at the end of the run
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.data_repo import CourseDataRepo  # noqa: E402
+from backend.app.services.intent_router import DEFAULT_RULES, FALLBACK  # noqa: E402
+
+
+# Chat phrasings per request name; {sid}/{sid2}/{sid3} are Zipf-drawn students of the
+# user's course, {aid} an assignment of it, {n} and {grade} small random numbers
+CHAT_TEMPLATES: dict[str, list[str]] = {
+    "student_status": ["How is student {sid} doing in my course?", "how is {sid} doing?"],
+    "grade_drivers": ["What is pulling student {sid}'s grade down?", "what's pulling {sid}'s grade down lately?"],
+    "struggling_students": ["Which students are struggling?", "Which students are failing below {grade}%?"],
+    "hard_assignments": ["What are key assignments students struggled with?", "Which key assignments were hardest?"],
+    "predict_outcome": ["How will student {sid} do by the end of the course?", "Will {sid} pass the final?"],
+    "prescribe": ["Give recommendations to help {sid} pass.",
+                  "Given student {sid} is failing, what recommendations can help?"],
+    FALLBACK: ["What is the late work policy?", "How should I run office hours before exams?",
+               "Any tips for improving homework completion?"],
+    "cohort": ["How are my bottom {n} doing?", "Compare {sid}, {sid2} and {sid3}",
+               "Students with attendance below 80% and 3 or more missing assignments"],
+    "assignment_drilldown": ["Which students struggled the most on assignment {aid}?",
+                             "Which students scored below {grade} on {aid}?"],
+}
+# Asked in the same session right after a student_status question about someone
+FOLLOWUP_TEMPLATES = ["What can we do to help them?", "How will they do by the end of the course?",
+                      "What is pulling their grade down?"]
+
+DEFAULT_MIX: dict[str, float] = {
+    "student_status": 18,
+    "grade_drivers": 10,
+    "predict_outcome": 10,
+    "prescribe": 8,
+    "struggling_students": 8,
+    "hard_assignments": 5,
+    FALLBACK: 5,
+    "cohort": 8,
+    "assignment_drilldown": 6,
+    "followup": 8,
+    "insights": 8,
+    "interventions": 2,
+}
+REQUESTS = list(DEFAULT_MIX)
+
+# Milliseconds; error rate as a fraction of requests
+DEFAULT_SLO = {"p95": 500.0, "p99": 1500.0, "errors": 0.01}
+DEFAULT_SLO_OVERRIDES = {
+    "cohort": {"p95": 1000.0, "p99": 2500.0},
+    "interventions": {"p95": 2000.0, "p99": 5000.0},
+}
+SLO_KEYS = tuple(DEFAULT_SLO)
+
+# Every intent the router can return must be exercised
+_uncovered = ({r["intent"] for r in DEFAULT_RULES} | {FALLBACK}) - set(CHAT_TEMPLATES)
+assert not _uncovered, f"No load-test phrasing for intents {_uncovered}"
+
+
+class ZipfSampler:
+    """Items drawn with P(rank k) ~ 1 / k^s, ranks assigned by a seeded shuffle."""
+
+    def __init__(self, items: np.ndarray, s: float, seed: int = 0):
+        self.items = np.random.default_rng(seed).permutation(np.asarray(items))
+        weights = np.arange(1, len(self.items) + 1, dtype=np.float64) ** -s
+        self.cdf = np.cumsum(weights) / weights.sum()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self, rng: np.random.Generator, k: int = 1) -> np.ndarray:
+        idx = np.searchsorted(self.cdf, rng.random(k), side="right")
+        return self.items[np.minimum(idx, len(self.items) - 1)]
+
+
+@dataclass
+class Population:
+    courses: ZipfSampler
+    students: dict[str, ZipfSampler]     # course_id -> its students
+    assignments: dict[str, np.ndarray]   # course_id -> assignment IDs
+
+    @staticmethod
+    def load(data_path: Path, zipf_s: float = 1.1, course_zipf_s: float = 0.8, seed: int = 0) -> "Population":
+        students, assignments = CourseDataRepo(data_path=Path(data_path)).load_tables()
+        course_of = students.strings("course_id")
+        sids = students.strings("student_id")
+        order = np.argsort(course_of, kind="stable")
+        course_sorted = course_of[order]
+        bounds = np.flatnonzero(np.r_[True, course_sorted[1:] != course_sorted[:-1], True])
+        by_course = {
+            str(course_sorted[a]): ZipfSampler(sids[order[a:b]], zipf_s, seed=seed + i)
+            for i, (a, b) in enumerate(zip(bounds[:-1], bounds[1:]))
+        }
+        a_course = assignments.strings("course_id")
+        a_ids = assignments.strings("assignment_id")
+        return Population(
+            courses=ZipfSampler(np.array(sorted(by_course)), course_zipf_s, seed=seed),
+            students=by_course,
+            assignments={c: a_ids[a_course == c] for c in by_course},
+        )
+
+    def message(self, name: str, course_id: str, rng: np.random.Generator) -> str:
+        """One chat message for request `name`, about entities of `course_id`."""
+        template = CHAT_TEMPLATES[name][rng.integers(len(CHAT_TEMPLATES[name]))]
+        sid, sid2, sid3 = self.students[course_id].sample(rng, 3)
+        aids = self.assignments.get(course_id)
+        return template.format(
+            sid=sid, sid2=sid2, sid3=sid3,
+            aid=aids[rng.integers(len(aids))] if aids is not None and len(aids) else "A1",
+            n=int(rng.choice([5, 10, 20, 30])),
+            grade=int(rng.choice([50, 60, 65, 70])),
+        )
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """"student_status=20,insights=0" -> DEFAULT_MIX with those weights replaced (0 disables)."""
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in mix:
+            raise ValueError(f"Unknown request {name!r} in mix; expected one of {REQUESTS}.")
+        mix[name] = float(weight)
+    if not any(w > 0 for w in mix.values()):
+        raise ValueError("Request mix has no positive weights.")
+    return mix
+
+
+def parse_slos(default: str = "", overrides: str = "") -> tuple[dict, dict[str, dict]]:
+    """
+    default:   "p95=500,p99=1500,errors=0.01"
+    overrides: "interventions:p95=2000,p99=5000;cohort:p95=800"
+    Unlisted keys keep DEFAULT_SLO / DEFAULT_SLO_OVERRIDES.
+    """
+    def limits(text: str) -> dict:
+        out = {}
+        for part in filter(None, (p.strip() for p in text.split(","))):
+            key, _, value = part.partition("=")
+            if key not in SLO_KEYS:
+                raise ValueError(f"Unknown SLO {key!r}; expected one of {SLO_KEYS}.")
+            out[key] = float(value)
+        return out
+
+    slo = {**DEFAULT_SLO, **limits(default)}
+    per_name = {name: dict(v) for name, v in DEFAULT_SLO_OVERRIDES.items()}
+    for part in filter(None, (p.strip() for p in overrides.split(";"))):
+        name, _, text = part.partition(":")
+        per_name.setdefault(name.strip(), {}).update(limits(text))
+    return slo, per_name
+
+
+def evaluate_slos(rows: list[dict], slo: dict, per_name: dict[str, dict]) -> list[dict]:
+    """
+    rows: {"name", "requests", "failures", "p50", "p95", "p99"} per request name.
+    Adds "error_rate", the limits applied, the violated ones and "passed".
+    """
+    out = []
+    for r in rows:
+        limits = {**slo, **per_name.get(r["name"], {})}
+        error_rate = r["failures"] / r["requests"] if r["requests"] else 0.0
+        observed = {"p95": r["p95"], "p99": r["p99"], "errors": error_rate}
+        violated = [k for k in SLO_KEYS if observed[k] is not None and observed[k] > limits[k]]
+        out.append({**r, "error_rate": error_rate, "slo": limits, "violated": violated, "passed": not violated})
+    return out
+
+
+def format_report(results: list[dict]) -> str:
+    lines = [f"{'request':<22} {'reqs':>7} {'err%':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+             f"{'SLO p95/p99 ms, err%':>22}  result"]
+    for r in sorted(results, key=lambda r: r["name"]):
+        s = r["slo"]
+        lines.append(
+            f"{r['name']:<22} {r['requests']:>7} {r['error_rate']:>6.1%} {r['p50']:>8.0f} {r['p95']:>8.0f} "
+            f"{r['p99']:>8.0f} {s['p95']:>9.0f}/{s['p99']:.0f}, {s['errors']:.0%}"
+            f"  {'PASS' if r['passed'] else 'FAIL (' + ', '.join(r['violated']) + ')'}"
+        )
+    failed = sum(not r["passed"] for r in results)
+    lines.append(f"SLOs: {'all passed' if not failed else f'{failed} request type(s) failed'}")
+    return "\n".join(lines)
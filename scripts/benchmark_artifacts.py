@@ -0,0 +1,78 @@
+"""
+Benchmark: model artifact formats, joblib pickle vs the compact export.
+
+Trains the production forest on synthetic data and saves it as the pickle and as
+compact exports with different leaf dtypes / pruning tolerances. Reports size on
+disk, load time (compact exports are memory-mapped) and the prediction error
+each introduces relative to the pickle, so a --leaf-dtype / --prune-tol setting
+for scripts/train_models.py can be picked with its cost in view.
+
+Usage:
+    python scripts/benchmark_artifacts.py [--students 4000] [--trees 400] [--repeats 5]
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_synthetic_data import generate  # noqa: E402
+from backend.app.services.predictive import FEATURES, GradePredictor, load_compact, save_compact  # noqa: E402
+
+
+VARIANTS = [("float32", 0.0), ("uint16", 0.0), ("float32", 0.5), ("uint16", 1.0)]
+
+
+def dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def time_load(fn, repeats: int) -> tuple[float, object]:
+    """Median wall time in milliseconds, and the last loaded predictor."""
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples)), out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=4000, help="students per course (3 courses)")
+    ap.add_argument("--trees", type=int, default=400)
+    ap.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args()
+
+    df = generate(n_students=args.students, n_courses=3)
+    students = df[df["record_type"] == "student"]
+    predictor = GradePredictor.train(students, n_estimators=args.trees)
+    X = students[FEATURES].to_numpy(dtype=np.float64)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pkl = tmp / "grade_predictor.pkl"
+        joblib.dump(predictor, pkl)
+        t_pkl, loaded = time_load(lambda: joblib.load(pkl), args.repeats)
+        expected = loaded.predict_many(X)
+        print(f"forest: {args.trees} trees, {len(students)} training rows")
+        print(f"{'format':>22} {'MB':>8} {'load ms':>9} {'max |diff|':>11} {'mean |diff|':>12}")
+        print(f"{'pickle':>22} {pkl.stat().st_size / 1e6:>8.1f} {t_pkl:>9.1f} {0:>11.2e} {0:>12.2e}")
+
+        for leaf_dtype, prune_tol in VARIANTS:
+            out = tmp / f"forest-{leaf_dtype}-{prune_tol}"
+            save_compact(predictor, out, leaf_dtype=leaf_dtype, prune_tol=prune_tol)
+            t_load, compact = time_load(lambda out=out: load_compact(out), args.repeats)
+            diff = np.abs(compact.predict_many(X) - expected)
+            name = f"{leaf_dtype} prune={prune_tol:g}"
+            print(f"{name:>22} {dir_bytes(out) / 1e6:>8.1f} {t_load:>9.1f} {diff.max():>11.2e} {diff.mean():>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
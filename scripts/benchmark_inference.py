@@ -0,0 +1,60 @@
+"""
+Microbenchmark: grade-model inference latency, sklearn vs flat engine.
+
+Trains the production forest on synthetic data, then times `predict_many`
+with each engine for batches of 1, 100 and 10k rows and checks that the
+two engines agree. The crossover point is what `inference_engine="auto"`
+uses (AUTO_FLAT_MAX_ROWS in services/predictive.py).
+
+Usage:
+    python scripts/benchmark_inference.py [--repeats 20]
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_synthetic_data import generate  # noqa: E402
+from backend.app.services.predictive import FEATURES, GradePredictor  # noqa: E402
+
+
+def time_call(fn, repeats: int) -> float:
+    """Median wall time in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeats", type=int, default=20)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    args = ap.parse_args()
+
+    df = generate(n_students=4000, n_courses=3)
+    students = df[df["record_type"] == "student"]
+    predictor = GradePredictor.train(students)
+    flat = GradePredictor(model=predictor.model, medians=predictor.medians).use_engine("flat")
+
+    X_all = students[FEATURES].to_numpy(dtype=np.float64)
+    print(f"forest: {len(predictor.model.estimators_)} trees, {len(flat.flat.value)} nodes, max_depth {flat.flat.max_depth}")
+    print(f"{'rows':>8} {'sklearn ms':>12} {'flat ms':>10} {'speedup':>8} {'max |diff|':>11}")
+    for n in args.sizes:
+        X = X_all[np.arange(n) % len(X_all)]
+        repeats = max(3, args.repeats if n < 10_000 else args.repeats // 4)
+        t_sk = time_call(lambda X=X: predictor.predict_many(X), repeats)
+        t_flat = time_call(lambda X=X: flat.predict_many(X), repeats)
+        diff = float(np.abs(predictor.predict_many(X) - flat.predict_many(X)).max())
+        print(f"{n:>8} {t_sk:>12.2f} {t_flat:>10.2f} {t_sk / t_flat:>7.1f}x {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
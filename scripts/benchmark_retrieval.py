@@ -0,0 +1,112 @@
+"""
+Benchmark: dense retrieval recall@k and query latency, exact vs IVF.
+
+Builds synthetic course passages (random sentences over a teaching vocabulary),
+embeds them with the HashingEmbedder, and for each corpus size compares:
+- exact search (one matmul per query) against
+- the IVF index (spherical k-means lists, `--nprobe` lists scanned per query)
+reporting recall@k of IVF against exact and the median per-query latency of each.
+Queries are paraphrase-style perturbations of random passages (words dropped and
+swapped for neighbours), so they are near, but not identical to, their source.
+
+Usage:
+    python scripts/benchmark_retrieval.py [--sizes 1000 100000 1000000] [--k 10] [--queries 200]
+
+1M passages at dim 128 is ~0.5 GB of float32 embeddings and several minutes of embedding.
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.dense import DenseIndex, HashingEmbedder  # noqa: E402
+
+
+VOCAB = (
+    "attendance absent tardy missing homework assignment quiz exam test unit lab report project "
+    "late penalty deadline extension retake makeup rubric standard grade weight participation "
+    "intervention tutoring recovery plan reteach parent conference study guide practice feedback "
+    "fractions equations essays reading writing vocabulary chemistry biology history algebra geometry "
+    "friday monday week semester quarter points percent credit policy office hours review notes"
+).split()
+
+EMBED_BATCH = 10_000
+
+
+def passages(n: int, rng: np.random.Generator) -> list[str]:
+    lengths = rng.integers(8, 20, size=n)
+    words = rng.integers(0, len(VOCAB), size=int(lengths.sum()))
+    out, pos = [], 0
+    for length in lengths:
+        out.append(" ".join(VOCAB[w] for w in words[pos:pos + length]))
+        pos += length
+    return out
+
+
+def paraphrase(text: str, rng: np.random.Generator) -> str:
+    words = [w for w in text.split() if rng.random() > 0.3]
+    return " ".join(VOCAB[rng.integers(len(VOCAB))] if rng.random() < 0.15 else w for w in words)
+
+
+def embed_all(embedder: HashingEmbedder, texts: list[str]) -> np.ndarray:
+    out = np.empty((len(texts), embedder.dim), dtype=np.float32)
+    for lo in range(0, len(texts), EMBED_BATCH):
+        out[lo:lo + EMBED_BATCH] = embedder.embed(texts[lo:lo + EMBED_BATCH])
+    return out
+
+
+def per_query_ms(search, Q: np.ndarray, k: int) -> float:
+    samples = []
+    for q in Q:
+        t0 = time.perf_counter()
+        search(q, k)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--dim", type=int, default=128)
+    ap.add_argument("--nprobe", type=int, default=16)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    print(f"{'passages':>9} {'embed s':>8} {'build s':>8} {'lists':>6} "
+          f"{'exact ms':>9} {'ivf ms':>7} {'recall@' + str(args.k):>10}")
+    for n in args.sizes:
+        rng = np.random.default_rng(args.seed)
+        texts = passages(n, rng)
+
+        t0 = time.perf_counter()
+        embedder = HashingEmbedder(dim=args.dim).fit(texts[:EMBED_BATCH])
+        X = embed_all(embedder, texts)
+        t_embed = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = DenseIndex(X, nprobe=args.nprobe, ivf=True, seed=args.seed)
+        t_build = time.perf_counter() - t0
+
+        sources = rng.choice(n, size=args.queries, replace=False)
+        Q = embedder.embed([paraphrase(texts[i], rng) for i in sources])
+
+        _, exact = index.search_exact(Q, args.k)
+        _, approx = index.search(Q, args.k)
+        recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact)])
+
+        t_exact = per_query_ms(index.search_exact, Q, args.k)
+        t_ivf = per_query_ms(index.search, Q, args.k)
+        print(f"{n:>9} {t_embed:>8.1f} {t_build:>8.1f} {index.nlist:>6} "
+              f"{t_exact:>9.2f} {t_ivf:>7.2f} {recall:>10.3f}")
+        del X, index
+
+
+if __name__ == "__main__":
+    main()
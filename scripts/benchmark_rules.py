@@ -0,0 +1,112 @@
+"""
+Benchmark: grade drivers + recommendations for a whole course, per-row vs rule table.
+
+Per-row is the original approach: one Python function call per student, with an
+`if` per rule and a dict per hit. It is timed on a sample and extrapolated. The
+rule table compares whole columns once (`RuleTable.masks`), then either
+materializes names / top action for every row or the full hit dicts.
+
+Usage:
+    python scripts/benchmark_rules.py [--students 100000] [--sample 5000]
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.analytics import DRIVER_RULES  # noqa: E402
+from backend.app.services.prescriptive import RECOMMENDATION_RULES  # noqa: E402
+
+
+def columns(n: int, seed: int = 0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return {
+        "attendance_rate": rng.uniform(0.6, 1.0, n),
+        "missing_assignments": rng.integers(0, 8, n).astype(float),
+        "late_submissions": rng.integers(0, 6, n).astype(float),
+        "avg_quiz_score": rng.uniform(40, 100, n),
+        "avg_hw_score": rng.uniform(40, 100, n),
+        "avg_exam_score": rng.uniform(40, 100, n),
+        "logins_last_7d": rng.integers(0, 10, n).astype(float),
+    }
+
+
+def per_row(s: dict) -> tuple[list[dict], list[dict]]:
+    """The if-chains the rule tables replaced."""
+    drivers = []
+    if s["attendance_rate"] < 0.9:
+        drivers.append({"factor": "attendance", "severity": "high", "detail": f"Attendance is {s['attendance_rate']:.0%}."})
+    if s["missing_assignments"] >= 3:
+        drivers.append({"factor": "missing_assignments", "severity": "high",
+                        "detail": f"Missing {s['missing_assignments']:.0f} assignments."})
+    if s["late_submissions"] >= 3:
+        drivers.append({"factor": "late_work", "severity": "medium", "detail": f"{s['late_submissions']:.0f} late submissions."})
+    if s["avg_exam_score"] < 70:
+        drivers.append({"factor": "exam_performance", "severity": "high",
+                        "detail": f"Average exam score {s['avg_exam_score']:.1f}."})
+    if s["avg_hw_score"] < 75:
+        drivers.append({"factor": "homework_performance", "severity": "medium",
+                        "detail": f"Average HW score {s['avg_hw_score']:.1f}."})
+    if s["avg_quiz_score"] < 75:
+        drivers.append({"factor": "quiz_performance", "severity": "medium",
+                        "detail": f"Average quiz score {s['avg_quiz_score']:.1f}."})
+    if s["logins_last_7d"] < 2:
+        drivers.append({"factor": "low_platform_engagement", "severity": "medium",
+                        "detail": f"Only {s['logins_last_7d']:.0f} logins in last 7 days."})
+    drivers.sort(key=lambda x: {"high": 0, "medium": 1, "low": 2}[x["severity"]])
+
+    recs = []
+    for rule in RECOMMENDATION_RULES.rules:
+        if any((s[c.feature] < c.threshold) if c.comparator == "<" else (s[c.feature] >= c.threshold) for c in rule.when):
+            recs.append({"priority": rule.level, "action": rule.name, "details": rule.message})
+    if not recs:
+        fb = RECOMMENDATION_RULES.fallback
+        recs.append({"priority": fb.level, "action": fb.name, "details": fb.message})
+    return drivers, recs
+
+
+def timed(fn) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=100_000)
+    ap.add_argument("--sample", type=int, default=5000)
+    args = ap.parse_args()
+
+    cols = columns(args.students)
+    k = min(args.sample, args.students)
+    rows = [{f: float(x[i]) for f, x in cols.items()} for i in range(k)]
+
+    t_row, legacy = timed(lambda: [per_row(r) for r in rows])
+    t_row *= args.students / k
+
+    t_mask, _ = timed(lambda: (DRIVER_RULES.masks(cols), RECOMMENDATION_RULES.masks(cols)))
+    t_names, (names, first) = timed(lambda: (DRIVER_RULES.evaluate(cols).names(),
+                                             RECOMMENDATION_RULES.evaluate(cols).first()))
+    t_lists, (drivers, recs) = timed(lambda: (DRIVER_RULES.evaluate(cols).lists(),
+                                              RECOMMENDATION_RULES.evaluate(cols).lists()))
+
+    # Same answers as the if-chains
+    assert [(d, r) for d, r in zip(drivers[:k], recs[:k])] == legacy
+    assert list(names[:k]) == [";".join(x["factor"] for x in d) for d, _ in legacy]
+    assert list(first[:k]) == [r[0]["action"] for _, r in legacy]
+
+    print(f"{args.students:,} students, 7 driver rules + 6 recommendation rules")
+    print(f"  per-row if-chains (extrapolated from {k:,}): {t_row * 1e3:9.1f} ms")
+    print(f"  rule masks only:                            {t_mask * 1e3:9.1f} ms  ({t_row / t_mask:,.0f}x)")
+    print(f"  masks + driver names + top action:          {t_names * 1e3:9.1f} ms  ({t_row / t_names:,.0f}x)")
+    print(f"  masks + full hit dicts for every row:       {t_lists * 1e3:9.1f} ms  ({t_row / t_lists:,.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Benchmark suite: every service function the request path uses, and the API
+endpoints through an in-process TestClient, at several data sizes. Results are
+saved as JSON and can be compared against a stored baseline.
+
+- sizes are total student rows (5 courses, 10 assignments each, per-student
+  submissions): 1k, 100k, 1m. Data comes from scripts/generate_synthetic_data.py,
+  written once as the columnar layout under --cache and reused by later runs
+- one model for every size (the training pipeline on the 1k data, --trees), so
+  timings change only with the data
+- each size runs in its own process: the API app reads its paths from the
+  environment at import, and a 1m snapshot shouldn't share memory with the next
+- per case: a warm-up call, then rounds until --max-time has passed and at least
+  --min-rounds ran; min / median / mean / stddev in milliseconds
+- response cache and sessions are disabled so endpoints measure the compute path
+- fully offline: no network, no server, no external services
+
+The JSON follows pytest-benchmark's layout (machine_info, commit_info,
+benchmarks[] with name/group/params/stats). With --compare, a case regresses
+when its median (--stat) exceeds the baseline's by more than --threshold
+(relative) and --noise-ms (absolute); any regression exits with status 1.
+
+Usage:
+    python scripts/benchmark_suite.py [--sizes 1k 100k 1m] [--filter chat api]
+        [--save artifacts/bench/latest.json] [--compare artifacts/bench/baseline.json --threshold 0.25]
+    python scripts/benchmark_suite.py --report artifacts/bench/latest.json --compare artifacts/bench/baseline.json
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from generate_synthetic_data import Spec, write  # noqa: E402
+
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+COURSES = 5
+ASSIGNMENTS = 10
+COURSE = "C1"
+ASSIGNMENT = "A3"
+MODEL_SIZE = "1k"
+
+CHAT_MESSAGES = {
+    "student_status": "How is student {sid} doing in my course?",
+    "grade_drivers": "What is pulling student {sid}'s grade down?",
+    "struggling_students": "Which students are struggling?",
+    "hard_assignments": "What are the hardest assignments in this course?",
+    "predict_outcome": "How will student {sid} do by the end of the course?",
+    "prescribe": "Given student {sid} is failing, what recommendations can help?",
+    "cohort_rank": "How are my bottom 30 doing?",
+    "cohort_filter": "Students with attendance below 80% and 3 or more missing assignments",
+    "assignment_drilldown": "Which students struggled the most on assignment {aid}?",
+    "fallback": "What is the late work policy?",
+}
+API_CHAT = ("student_status", "cohort_rank", "assignment_drilldown")
+
+
+@dataclass(frozen=True)
+class Stats:
+    rounds: int
+    min: float
+    median: float
+    mean: float
+    stddev: float
+    max: float
+
+    @staticmethod
+    def once(ms: float) -> "Stats":
+        return Stats(1, ms, ms, ms, 0.0, ms)
+
+
+def measure(fn: Callable[[], object], min_rounds: int, max_time: float) -> Stats:
+    """Milliseconds per call, after one warm-up call."""
+    fn()
+    samples = []
+    deadline = time.perf_counter() + max_time
+    while len(samples) < min_rounds or time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    s = np.asarray(samples)
+    return Stats(len(s), float(s.min()), float(np.median(s)), float(s.mean()), float(s.std()), float(s.max()))
+
+
+def dataset(cache: Path, size: str, jobs: int) -> Path:
+    """Columnar data for one size; generated once (spec.json marks a complete write)."""
+    spec = Spec(n_students=SIZES[size] // COURSES, n_courses=COURSES, n_assignments=ASSIGNMENTS)
+    out = cache / "data" / size
+    marker = out / "spec.json"
+    if not (marker.exists() and json.loads(marker.read_text()) == asdict(spec)):
+        t0 = time.perf_counter()
+        shards = max(1, min(jobs * 2, SIZES[size] // 50_000))
+        rows = write(out, "columnar", spec, shards=shards, jobs=jobs)
+        marker.write_text(json.dumps(asdict(spec)))
+        print(f"generated {size}: {rows} rows in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return out
+
+
+def model(cache: Path, trees: int, jobs: int) -> Path:
+    """Artifacts dir with a model trained on the MODEL_SIZE data (skipped when up to date)."""
+    from backend.app.services.training import run_pipeline
+
+    artifacts = cache / "artifacts"
+    meta = run_pipeline(data_path=dataset(cache, MODEL_SIZE, jobs), artifacts_dir=artifacts, trees=trees, jobs=jobs)
+    if not meta.get("skipped"):
+        print(f"trained model {meta['version']} ({trees} trees)", file=sys.stderr)
+    return artifacts
+
+
+def cases(snap, client) -> list[tuple[str, str, dict, Callable[[], object]]]:
+    """(group, name, params, fn) for one loaded snapshot."""
+    from backend.app.services.analytics import (
+        assignment_strugglers,
+        grade_drivers,
+        grade_drivers_many,
+        hardest_assignments,
+        struggling_students,
+        student_snapshot,
+    )
+    from backend.app.services.interventions import rank_course
+    from backend.app.services.predictive import FEATURES
+    from backend.app.services.prescriptive import RECOMMENDATION_RULES, recommendations, top_recommendations
+    from backend.app.services.tasks import chat_task
+
+    store, predictor = snap.students, snap.predictor
+    rows = store.course_rows(COURSE)
+    row = int(rows[len(rows) // 2])
+    sid = str(store.student_ids(np.array([row]))[0])
+    record = store.record(row)
+    rec_cols = {f: store.column(f)[rows] for f in RECOMMENDATION_RULES.features}
+    retriever = snap.retriever.for_course(COURSE)
+    n = {"course_rows": len(rows)}
+
+    out = [
+        ("analytics", "student_snapshot", {}, lambda: student_snapshot(store, COURSE, sid)),
+        ("analytics", "grade_drivers", {}, lambda: grade_drivers(store, COURSE, sid)),
+        ("analytics", "grade_drivers_many[course]", n, lambda: grade_drivers_many(store, rows)),
+        ("analytics", "struggling_students", {}, lambda: struggling_students(store, COURSE, threshold=70.0)),
+        ("analytics", "hardest_assignments", {}, lambda: hardest_assignments(snap.assignments, COURSE, top_n=5)),
+    ]
+    if snap.submissions is not None:
+        out.append(("analytics", "assignment_strugglers", {},
+                    lambda: assignment_strugglers(snap.submissions, store, COURSE, ASSIGNMENT)))
+    out += [
+        ("prescriptive", "recommendations", {}, lambda: recommendations(record)),
+        ("prescriptive", "top_recommendations[course]", n, lambda: top_recommendations(rec_cols)),
+        ("predictive", "predict_rows[1]", {}, lambda: predictor.predict_rows(store, [row])),
+        ("predictive", "predict_many[course]", n,
+         lambda: predictor.predict_many(store.features(rows, FEATURES))),
+        ("predictive", "cached_predict[course]", n, lambda: predictor.cached_predict(store, rows)),
+        ("predictive", "risk_rows[course]", n,
+         lambda: predictor.risk_rows(store, rows, predictor.cached_predict(store, rows))),
+        ("predictive", "rank_course", n, lambda: rank_course(store, predictor, COURSE, limit=100)),
+        ("rag", "retrieve", {}, lambda: retriever.retrieve("late work policy and extensions", k=3)),
+    ]
+    if predictor.classifier is not None:
+        # Request-path batch scoring of the fail classifier, fixed at 10k rows for every size
+        X10k = store.features(rows[np.arange(10_000) % len(rows)], FEATURES)
+        out.append(("predictive", "fail_classifier[10k]", {"rows": 10_000},
+                    lambda: predictor.classifier.predict_proba(X10k)))
+    messages = {k: m.format(sid=sid, aid=ASSIGNMENT) for k, m in CHAT_MESSAGES.items()}
+    for intent, message in messages.items():
+        out.append(("chat", f"answer[{intent}]", {}, lambda m=message: chat_task(snap, COURSE, m)))
+
+    def get(url):
+        return lambda: client.get(url).raise_for_status()
+
+    def post_chat(message):
+        body = {"teacher_id": "T1", "course_id": COURSE, "message": message}
+        return lambda: client.post("/chat", json=body).raise_for_status()
+
+    out += [("api", "GET /health", {}, get("/health"))]
+    out += [("api", f"POST /chat[{intent}]", {}, post_chat(messages[intent])) for intent in API_CHAT]
+    out += [
+        ("api", "GET /courses/{id}/insights", {}, get(f"/courses/{COURSE}/insights")),
+        ("api", "GET /courses/{id}/interventions?limit=100", {}, get(f"/courses/{COURSE}/interventions?limit=100")),
+        ("api", "GET /courses/{id}/interventions?format=csv", n, get(f"/courses/{COURSE}/interventions?format=csv")),
+    ]
+    return out
+
+
+def run_size(size: str, data: Path, artifacts: Path, filters: list[str], min_rounds: int, max_time: float) -> list[dict]:
+    """In a fresh process: point the app at this size's data, load it, time every case."""
+    os.environ.update(
+        DATA_PATH=str(data),
+        ARTIFACTS_DIR=str(artifacts),
+        RETRIEVAL_INDEX_DIR=str(artifacts / "no_retrieval_index"),
+        INTENT_RULES_PATH="",
+        TRAIN_IN_BACKGROUND="false",
+        RELOAD_POLL_SECONDS="0",
+        RESPONSE_CACHE_MB="0",
+        SESSION_STORE_MB="0",
+        REDIS_URL="",
+    )
+    from fastapi.testclient import TestClient
+    from backend.app.main import app, snapshots
+
+    results = []
+    with TestClient(app) as client:
+        snap = snapshots.current
+        results.append({"group": "snapshot", "name": "build_snapshot", "size": size,
+                        "params": {"students": len(snap.students),
+                                   "submissions": len(snap.submissions) if snap.submissions is not None else 0},
+                        "stats": asdict(Stats.once(snap.load_seconds * 1000))})
+        for group, name, params, fn in cases(snap, client):
+            full = f"{group}.{name}"
+            if filters and not any(f in full for f in filters):
+                continue
+            stats = measure(fn, min_rounds, max_time)
+            results.append({"group": group, "name": full, "size": size, "params": params, "stats": asdict(stats)})
+            print(f"  {size:>5} {full:<52} {stats.median:>10.3f} ms  ({stats.rounds} rounds)", file=sys.stderr)
+    return results
+
+
+def machine_info() -> dict:
+    import fastapi
+    import pandas
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "fastapi": fastapi.__version__,
+    }
+
+
+def commit_info() -> dict:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+    return {"id": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def compare(current: dict, baseline: dict, threshold: float, noise_ms: float, stat: str = "median") -> list[dict]:
+    """Per (size, name): baseline and current `stat` and a status; `regressed` fails the run."""
+    base = {(b["size"], b["name"]): b["stats"][stat] for b in baseline["benchmarks"]}
+    rows = []
+    for b in current["benchmarks"]:
+        key = (b["size"], b["name"])
+        now = b["stats"][stat]
+        was = base.pop(key, None)
+        if was is None:
+            status = "new"
+        elif now > was * (1 + threshold) and now - was > noise_ms:
+            status = "regressed"
+        elif now < was / (1 + threshold) and was - now > noise_ms:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append({"size": key[0], "name": key[1], "baseline_ms": was, "current_ms": now, "status": status})
+    rows += [{"size": s, "name": n, "baseline_ms": was, "current_ms": None, "status": "missing"}
+             for (s, n), was in base.items()]
+    return rows
+
+
+def print_comparison(rows: list[dict], threshold: float) -> int:
+    print(f"{'size':>5} {'benchmark':<52} {'baseline ms':>12} {'current ms':>11} {'change':>8}  status")
+    regressed = 0
+    for r in rows:
+        was, now = r["baseline_ms"], r["current_ms"]
+        change = f"{now / was - 1:+.0%}" if was and now is not None else ""
+        fmt = lambda v: f"{v:.3f}" if v is not None else "-"  # noqa: E731
+        print(f"{r['size']:>5} {r['name']:<52} {fmt(was):>12} {fmt(now):>11} {change:>8}  {r['status']}")
+        regressed += r["status"] == "regressed"
+    print(f"{regressed} regression(s) beyond {threshold:.0%}")
+    return 1 if regressed else 0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["1k", "100k"])
+    ap.add_argument("--filter", nargs="+", default=[], help="only benchmarks whose group.name contains one of these")
+    ap.add_argument("--cache", type=Path, default=ROOT / "artifacts" / "bench", help="generated data + model")
+    ap.add_argument("--trees", type=int, default=100)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--min-rounds", type=int, default=5)
+    ap.add_argument("--max-time", type=float, default=1.0, help="seconds per benchmark (after min-rounds)")
+    ap.add_argument("--save", type=Path, default=None, help="write results JSON here")
+    ap.add_argument("--report", type=Path, default=None, help="compare saved results instead of running")
+    ap.add_argument("--compare", type=Path, default=None, help="baseline results JSON")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    ap.add_argument("--stat", choices=["median", "min", "mean"], default="median",
+                    help="statistic compared (min is steadier on a busy machine)")
+    ap.add_argument("--noise-ms", type=float, default=0.05, help="ignore changes smaller than this")
+    ap.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--worker-out", type=Path, default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        results = run_size(args.worker, args.cache / "data" / args.worker, args.cache / "artifacts",
+                           args.filter, args.min_rounds, args.max_time)
+        args.worker_out.write_text(json.dumps(results))
+        return
+
+    if args.report is not None:
+        current = json.loads(args.report.read_text())
+    else:
+        artifacts = model(args.cache, args.trees, args.jobs)
+        benchmarks = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in args.sizes:
+                dataset(args.cache, size, args.jobs)
+                out = Path(tmp) / f"{size}.json"
+                subprocess.run([
+                    sys.executable, __file__, "--worker", size, "--worker-out", str(out),
+                    "--cache", str(args.cache), "--min-rounds", str(args.min_rounds), "--max-time", str(args.max_time),
+                    *(["--filter", *args.filter] if args.filter else []),
+                ], check=True)
+                benchmarks += json.loads(out.read_text())
+        current = {
+            "machine_info": machine_info(),
+            "commit_info": commit_info(),
+            "datetime": datetime.now(timezone.utc).isoformat(),
+            "settings": {"sizes": args.sizes, "trees": args.trees, "min_rounds": args.min_rounds,
+                         "max_time": args.max_time, "model": str(artifacts)},
+            "benchmarks": benchmarks,
+        }
+        if args.save is not None:
+            args.save.parent.mkdir(parents=True, exist_ok=True)
+            args.save.write_text(json.dumps(current, indent=2))
+            print(f"saved {len(benchmarks)} results to {args.save}", file=sys.stderr)
+
+    if args.compare is None:
+        print(f"{'size':>5} {'benchmark':<52} {'median ms':>10} {'min ms':>9} {'rounds':>7}")
+        for b in current["benchmarks"]:
+            s = b["stats"]
+            print(f"{b['size']:>5} {b['name']:<52} {s['median']:>10.3f} {s['min']:>9.3f} {s['rounds']:>7}")
+        return
+    baseline = json.loads(args.compare.read_text())
+    sys.exit(print_comparison(compare(current, baseline, args.threshold, args.noise_ms, args.stat), args.threshold))
+
+
+if __name__ == "__main__":
+    main()
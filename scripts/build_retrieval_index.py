@@ -0,0 +1,108 @@
+"""
+Builds (or incrementally updates) the persisted retrieval index the API memory-maps.
+
+Usage:
+    # full build from a directory of course documents
+    python scripts/build_retrieval_index.py build --docs course_docs/ [--out artifacts/retrieval_index]
+
+    # add/replace passages from files for one course (no full rebuild)
+    python scripts/build_retrieval_index.py add --course C1 syllabus.md [more files...]
+
+    # delete passages by doc_id for one course
+    python scripts/build_retrieval_index.py remove --course C1 "syllabus#3" "syllabus#4"
+
+    # fold segments and tombstones back into one segment
+    python scripts/build_retrieval_index.py compact --course C1
+
+Document layout for `build`: files at the top of --docs are shared notes,
+files in <docs>/<course_id>/ belong to that course (.txt/.md, passages split on
+blank lines). The built-in course notes are always included in the shared set.
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.rag import (  # noqa: E402
+    COURSE_NOTES,
+    Bm25Retriever,
+    CourseRetriever,
+    load_course_documents,
+)
+
+
+def cmd_build(args) -> None:
+    shared, by_course = load_course_documents(args.docs)
+    retriever = CourseRetriever.build(COURSE_NOTES + shared, by_course)
+    retriever.save(args.out)
+    sizes = ", ".join(f"{c}={len(r)}" for c, r in retriever.by_course.items()) or "none"
+    print(f"Wrote: {args.out} shared={len(retriever.shared)} courses: {sizes}")
+
+
+def _course_index(args) -> tuple[Path, Bm25Retriever]:
+    path = args.out / args.course
+    if (path / "manifest.json").exists():
+        return path, Bm25Retriever.load(path)
+    # New course: start from the shared notes, like a full build would
+    return path, Bm25Retriever(list(Bm25Retriever.load(args.out / "_shared").documents()))
+
+
+def cmd_add(args) -> None:
+    path, index = _course_index(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Reuse the directory loader's passage splitting for the given files
+        for f in args.files:
+            (Path(tmp) / f.name).write_text(f.read_text(encoding="utf-8"), encoding="utf-8")
+        docs, _ = load_course_documents(Path(tmp))
+    index.add(docs)
+    index.save(path)
+    print(f"Added {len(docs)} passages to {args.course}; live docs={len(index)} segments={len(index.segments)}")
+
+
+def cmd_remove(args) -> None:
+    path, index = _course_index(args)
+    removed = index.remove(args.doc_ids)
+    index.save(path)
+    print(f"Removed {removed} passages from {args.course}; live docs={len(index)}")
+
+
+def cmd_compact(args) -> None:
+    path, index = _course_index(args)
+    index.compact()
+    index.save(path)
+    print(f"Compacted {args.course}; live docs={len(index)}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", type=Path, default=Path("artifacts/retrieval_index"))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("build")
+    p.add_argument("--docs", type=Path, required=True)
+    p.set_defaults(fn=cmd_build)
+
+    p = sub.add_parser("add")
+    p.add_argument("--course", required=True)
+    p.add_argument("files", type=Path, nargs="+")
+    p.set_defaults(fn=cmd_add)
+
+    p = sub.add_parser("remove")
+    p.add_argument("--course", required=True)
+    p.add_argument("doc_ids", nargs="+")
+    p.set_defaults(fn=cmd_remove)
+
+    p = sub.add_parser("compact")
+    p.add_argument("--course", required=True)
+    p.set_defaults(fn=cmd_compact)
+
+    args = ap.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
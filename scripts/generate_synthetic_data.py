@@ -7,104 +7,331 @@ This keeps the project lightweight while still enabling:
 - student analytics
 - assignment analytics
 - prediction of final grade
+- per-assignment drill-down (record_type=submission: one row per student x
+  assignment with score, submitted_at and a late flag; --no-submissions skips them)
+
+Scales to district-sized datasets: every column of a block of students is drawn
+as one array, and each (course, block of BLOCK_STUDENTS students) has its own
+seeded stream, so the output depends only on --seed and the sizes, never on
+--shards or --jobs. Shards are generated in parallel processes and written
+straight to disk, either as CSV shards (one file, or a directory of part files
+that CourseDataRepo reads in order) or as the columnar layout the API memory-maps.
+
+Usage:
+    python scripts/generate_synthetic_data.py [--students 800] [--courses 3] [--assignments 10]
+        [--shards 1] [--jobs 4] [--format csv|columnar] [--out PATH] [--seed 42] [--no-submissions]
 """
 
 from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.data_repo import (  # noqa: E402
+    ASSIGNMENT_NUMERIC_COLS,
+    ASSIGNMENT_STRING_COLS,
+    STUDENT_NUMERIC_COLS,
+    SUBMISSION_NUMERIC_COLS,
+    ColumnarTable,
+)
+
+
+FORMATS = ("csv", "columnar")
+# Students per seeded stream; also the unit of work handed to a shard
+BLOCK_STUDENTS = 100_000
+FIRST_STUDENT = 100000
+# Assignment a is due TERM_START + (a + 1) weeks
+TERM_START = np.datetime64("2025-01-13T17:00:00", "s").astype(np.int64)
+WEEK = 7 * 24 * 3600
+CSV_COLUMNS = [
+    "record_type", "course_id", "assignment_id", "assignment_name", "avg_score", "submission_rate",
+    "student_id", "attendance_rate", "missing_assignments", "late_submissions", "avg_quiz_score",
+    "avg_hw_score", "avg_exam_score", "logins_last_7d", "current_grade", "final_grade", "label",
+    "score", "submitted_at", "late",
+]
+
+
+@dataclass(frozen=True)
+class Spec:
+    n_students: int = 800  # per course
+    n_courses: int = 3
+    n_assignments: int = 10
+    seed: int = 42
+    submissions: bool = True  # student x assignment rows (n_assignments per student)
+
 
 def sigmoid(x):
     return 1 / (1 + np.exp(-x))
 
 
-def generate(n_students=800, n_courses=3, n_assignments=10, seed=42) -> pd.DataFrame:
-    rng = np.random.default_rng(seed)
-    rows = []
+def _rng(seed: int, *key: int) -> np.random.Generator:
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=key))
 
-    course_ids = [f"C{i+1}" for i in range(n_courses)]
 
-    # Assignment “difficulty” per course
-    for course_id in course_ids:
-        for a in range(n_assignments):
-            assignment_id = f"A{a+1}"
-            difficulty = rng.uniform(0.8, 1.2)  # >1 is harder
-            avg_score = np.clip(rng.normal(78 / difficulty, 8), 40, 98)
-            submission_rate = np.clip(rng.normal(0.92 - (difficulty - 1) * 0.15, 0.05), 0.5, 1.0)
+def course_ids(n_courses: int) -> list[str]:
+    return [f"C{i+1}" for i in range(n_courses)]
+
+
+def assignment_ids(n_assignments: int) -> list[str]:
+    return [f"A{a+1}" for a in range(n_assignments)]
+
+
+def assignment_rows(spec: Spec) -> pd.DataFrame:
+    frames = []
+    for c, course_id in enumerate(course_ids(spec.n_courses)):
+        rng = _rng(spec.seed, c)
+        # Assignment "difficulty" per course; >1 is harder
+        difficulty = rng.uniform(0.8, 1.2, spec.n_assignments)
+        n = np.arange(1, spec.n_assignments + 1)
+        frames.append(pd.DataFrame({
+            "record_type": "assignment",
+            "course_id": course_id,
+            "assignment_id": assignment_ids(spec.n_assignments),
+            "assignment_name": [f"Assignment {a}" for a in n],
+            "avg_score": np.clip(rng.normal(78 / difficulty, 8), 40, 98),
+            "submission_rate": np.clip(rng.normal(0.92 - (difficulty - 1) * 0.15, 0.05), 0.5, 1.0),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def student_block(spec: Spec, course: int, block: int) -> dict[str, np.ndarray]:
+    """Numeric columns for students [block * BLOCK_STUDENTS, ...) of one course."""
+    start = block * BLOCK_STUDENTS
+    n = min(BLOCK_STUDENTS, spec.n_students - start)
+    rng = _rng(spec.seed, course, block + 1)
+    attendance = np.clip(rng.normal(0.92, 0.06, n), 0.5, 1.0)
+    missing = np.clip(rng.poisson(1.8, n), 0, 12)
+    late = np.clip(rng.poisson(1.2, n), 0, 12)
+    logins = np.clip(rng.poisson(4.5, n), 0, 30)
+
+    quiz = np.clip(rng.normal(78, 10, n), 20, 100)
+    hw = np.clip(rng.normal(80, 10, n), 20, 100)
+    exam = np.clip(rng.normal(76, 12, n), 10, 100)
+
+    # Current grade (imperfect, partly based on components + penalties)
+    current_grade = np.clip(
+        0.3 * hw + 0.2 * quiz + 0.4 * exam + 0.1 * (attendance * 100) - 1.5 * missing - 0.7 * late,
+        0, 100,
+    )
+
+    # Final grade (some drift)
+    final_grade = np.clip(current_grade + rng.normal(0, 6, n) - 0.8 * missing, 0, 100)
+
+    # Label: at-risk (fail) probability
+    lin = (
+        2.5 * (0.9 - attendance) +
+        0.08 * missing +
+        0.04 * late -
+        0.02 * logins +
+        0.02 * (70 - current_grade) +
+        rng.normal(0, 0.3, n)
+    )
+    label = rng.binomial(1, sigmoid(lin))
+
+    return {
+        "student_index": np.arange(start, start + n),
+        "attendance_rate": attendance,
+        "missing_assignments": missing,
+        "late_submissions": late,
+        "avg_quiz_score": quiz,
+        "avg_hw_score": hw,
+        "avg_exam_score": exam,
+        "logins_last_7d": logins,
+        "current_grade": current_grade,
+        "final_grade": final_grade,
+        "label": label,
+    }
 
-            rows.append({
-                "record_type": "assignment",
-                "course_id": course_id,
-                "assignment_id": assignment_id,
-                "assignment_name": f"Assignment {a+1}",
-                "avg_score": float(avg_score),
-                "submission_rate": float(submission_rate),
-            })
 
-    # Student records
-    for course_id in course_ids:
-        for i in range(n_students):
-            student_id = f"S{100000+i}"
-            attendance = np.clip(rng.normal(0.92, 0.06), 0.5, 1.0)
-            missing = int(np.clip(rng.poisson(1.8), 0, 12))
-            late = int(np.clip(rng.poisson(1.2), 0, 12))
-            logins = int(np.clip(rng.poisson(4.5), 0, 30))
-
-            quiz = float(np.clip(rng.normal(78, 10), 20, 100))
-            hw = float(np.clip(rng.normal(80, 10), 20, 100))
-            exam = float(np.clip(rng.normal(76, 12), 10, 100))
-
-            # Current grade (imperfect, partly based on components + penalties)
-            current_grade = (
-                0.3 * hw + 0.2 * quiz + 0.4 * exam + 0.1 * (attendance * 100)
-                - 1.5 * missing - 0.7 * late
-            )
-            current_grade = float(np.clip(current_grade, 0, 100))
-
-            # Final grade (some drift)
-            drift = rng.normal(0, 6)
-            final_grade = float(np.clip(current_grade + drift - 0.8 * missing, 0, 100))
-
-            # Label: at-risk (fail) probability
-            lin = (
-                2.5 * (0.9 - attendance) +
-                0.08 * missing +
-                0.04 * late -
-                0.02 * logins +
-                0.02 * (70 - current_grade) +
-                rng.normal(0, 0.3)
-            )
-            p_fail = sigmoid(lin)
-            label = int(rng.binomial(1, p_fail))
-
-            rows.append({
-                "record_type": "student",
-                "course_id": course_id,
-                "student_id": student_id,
-                "attendance_rate": attendance,
-                "missing_assignments": missing,
-                "late_submissions": late,
-                "avg_quiz_score": quiz,
-                "avg_hw_score": hw,
-                "avg_exam_score": exam,
-                "logins_last_7d": logins,
-                "current_grade": current_grade,
-                "final_grade": final_grade,
-                "label": label,
+def submission_block(spec: Spec, course: int, block: int, students: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    One row per (student, assignment), student-major, consistent with the student rows:
+    each student misses `missing_assignments` of them and hands in `late_submissions` late;
+    scores scatter around their homework average, scaled by assignment difficulty.
+    """
+    n, k = len(students["student_index"]), spec.n_assignments
+    difficulty = _rng(spec.seed, course).uniform(0.8, 1.2, k)  # same draw as assignment_rows
+    rng = _rng(spec.seed, course, block + 1, 1)
+    # Random order of each student's assignments: the first `missing` are skipped, the next `late` are late
+    rank = rng.random((n, k)).argsort(axis=1).argsort(axis=1)
+    missing = np.minimum(students["missing_assignments"], k)[:, None]
+    submitted = rank >= missing
+    late = submitted & (rank < missing + students["late_submissions"][:, None])
+
+    score = np.clip(rng.normal(students["avg_hw_score"][:, None] / difficulty, 8, (n, k)) - 5 * late, 0, 100)
+    due = TERM_START + WEEK * np.arange(1, k + 1)
+    offset = np.where(late, rng.uniform(3600, 5 * 24 * 3600, (n, k)), -rng.uniform(0, 3 * 24 * 3600, (n, k)))
+    return {
+        "student_index": np.repeat(students["student_index"], k),
+        "assignment_index": np.tile(np.arange(k), n),
+        "score": np.where(submitted, score, np.nan).reshape(-1),
+        "submitted_at": np.where(submitted, np.round(due + offset), np.nan).reshape(-1),
+        "late": late.reshape(-1).astype(np.int8),
+    }
+
+
+def _iso(epoch: np.ndarray) -> np.ndarray:
+    out = np.full(len(epoch), "", dtype=object)
+    ok = ~np.isnan(epoch)
+    out[ok] = np.char.add(np.datetime_as_string(epoch[ok].astype("datetime64[s]"), unit="s"), "Z")
+    return out
+
+
+def block_frames(spec: Spec, course: int, block: int) -> list[pd.DataFrame]:
+    """Student rows of one block, then their submission rows, in CSV_COLUMNS layout."""
+    cols = student_block(spec, course, block)
+    course_id = f"C{course + 1}"
+    idx = cols["student_index"]
+    students = pd.DataFrame({"record_type": "student", "course_id": course_id,
+                             "student_id": np.char.add("S", (idx + FIRST_STUDENT).astype(str)),
+                             **{c: v for c, v in cols.items() if c != "student_index"}})
+    frames = [students.reindex(columns=CSV_COLUMNS)]
+    if spec.submissions:
+        sub = submission_block(spec, course, block, cols)
+        frames.append(pd.DataFrame({
+            "record_type": "submission",
+            "course_id": course_id,
+            "student_id": np.char.add("S", (sub["student_index"] + FIRST_STUDENT).astype(str)),
+            "assignment_id": np.char.add("A", (sub["assignment_index"] + 1).astype(str)),
+            "score": sub["score"],
+            "submitted_at": _iso(sub["submitted_at"]),
+            "late": sub["late"],
+        }).reindex(columns=CSV_COLUMNS))
+    return frames
+
+
+def blocks(spec: Spec) -> list[tuple[int, int]]:
+    """(course, block) work units, in output row order."""
+    per_course = -(-spec.n_students // BLOCK_STUDENTS)
+    return [(c, b) for c in range(spec.n_courses) for b in range(per_course)]
+
+
+def generate(n_students=800, n_courses=3, n_assignments=10, seed=42, submissions=True) -> pd.DataFrame:
+    """The whole dataset in memory (assignment rows first), for tests and benchmarks."""
+    spec = Spec(n_students, n_courses, n_assignments, seed, submissions)
+    parts = [assignment_rows(spec).reindex(columns=CSV_COLUMNS)]
+    for c, b in blocks(spec):
+        parts += block_frames(spec, c, b)
+    return pd.concat(parts, ignore_index=True)
+
+
+def write_csv_shard(spec: Spec, path: Path, units: list[tuple[int, int]], assignments: pd.DataFrame | None) -> int:
+    rows = 0
+    with open(path, "w", newline="") as f:
+        f.write(",".join(CSV_COLUMNS) + "\n")
+        if assignments is not None:
+            assignments.reindex(columns=CSV_COLUMNS).to_csv(f, header=False, index=False)
+            rows += len(assignments)
+        for c, b in units:
+            for df in block_frames(spec, c, b):
+                df.to_csv(f, header=False, index=False, float_format="%.6g")
+                rows += len(df)
+    return rows
+
+
+def write_columnar_shard(spec: Spec, out: Path, units: list[tuple[int, int]]) -> int:
+    rows = 0
+    for c, b in units:
+        cols = student_block(spec, c, b)
+        idx = cols.pop("student_index")
+        first = c * spec.n_students + int(idx[0])
+        codes = {"course_id": np.full(len(idx), c, dtype=np.int32), "student_id": idx.astype(np.int32)}
+        ColumnarTable.write_rows(out / "students", first, {**cols, **codes})
+        rows += len(idx)
+        if spec.submissions:
+            sub = submission_block(spec, c, b, {**cols, "student_index": idx})
+            n = len(sub["score"])
+            ColumnarTable.write_rows(out / "submissions", first * spec.n_assignments, {
+                **sub,
+                "course_id": np.full(n, c, dtype=np.int32),
+                "student_id": sub["student_index"].astype(np.int32),
+                "assignment_id": sub["assignment_index"].astype(np.int32),
             })
+            rows += n
+    return rows
+
+
+def shard_units(spec: Spec, shards: int) -> list[list[tuple[int, int]]]:
+    """Contiguous runs of blocks, so shard files read in order reproduce the row order."""
+    units = blocks(spec)
+    bounds = np.linspace(0, len(units), shards + 1).astype(int)
+    return [units[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
 
-    return pd.DataFrame(rows)
+
+def write(out: Path, fmt: str, spec: Spec, shards: int = 1, jobs: int = 1) -> int:
+    """Generate and write the dataset; returns the number of rows written."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}.")
+    assignments = assignment_rows(spec)
+    parts = shard_units(spec, shards)
+    extra = 0
+
+    if fmt == "csv":
+        if shards == 1:
+            out.parent.mkdir(parents=True, exist_ok=True)
+            paths = [out]
+        else:
+            out.mkdir(parents=True, exist_ok=True)
+            paths = [out / f"part-{i:05d}.csv" for i in range(shards)]
+        # Assignment rows go in the first shard
+        jobs_args = [(spec, p, units, assignments if i == 0 else None) for i, (p, units) in enumerate(zip(paths, parts))]
+        fn = write_csv_shard
+    else:
+        ColumnarTable.from_frame(assignments, ASSIGNMENT_NUMERIC_COLS, ASSIGNMENT_STRING_COLS).save(out / "assignments")
+        # Codes are positional: course c -> course_ids[c], student i -> S{FIRST_STUDENT + i}, A{a + 1}
+        dicts = {"course_id": course_ids(spec.n_courses),
+                 "student_id": [f"S{FIRST_STUDENT + i}" for i in range(spec.n_students)]}
+        n_rows = spec.n_students * spec.n_courses
+        ColumnarTable.allocate(out / "students", STUDENT_NUMERIC_COLS, n_rows, dicts)
+        if spec.submissions:
+            ColumnarTable.allocate(out / "submissions", SUBMISSION_NUMERIC_COLS, n_rows * spec.n_assignments,
+                                   {**dicts, "assignment_id": assignment_ids(spec.n_assignments)})
+        jobs_args = [(spec, out, units) for units in parts]
+        fn = write_columnar_shard
+        extra = len(assignments)
+
+    if jobs > 1 and shards > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            written = sum(pool.map(fn, *zip(*jobs_args)))
+    else:
+        written = sum(fn(*a) for a in jobs_args)
+    return written + extra
 
 
 def main():
-    out = Path("data")
-    out.mkdir(parents=True, exist_ok=True)
-    df = generate()
-    path = out / "synthetic_course_data.csv"
-    df.to_csv(path, index=False)
-    print(f"Wrote: {path} rows={len(df)}")
-    print(df["record_type"].value_counts())
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=800, help="students per course")
+    ap.add_argument("--courses", type=int, default=3)
+    ap.add_argument("--assignments", type=int, default=10, help="assignments per course")
+    ap.add_argument("--shards", type=int, default=1, help="CSV part files / parallel work units")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--format", choices=FORMATS, default="csv")
+    ap.add_argument("--out", type=Path, default=None,
+                    help="default: data/synthetic_course_data.csv, data/synthetic_csv/ (sharded) or data/columnar/")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--no-submissions", action="store_true", help="skip the student x assignment rows")
+    args = ap.parse_args()
+
+    out = args.out
+    if out is None:
+        if args.format == "columnar":
+            out = Path("data/columnar")
+        else:
+            out = Path("data/synthetic_course_data.csv") if args.shards == 1 else Path("data/synthetic_csv")
+
+    t0 = time.perf_counter()
+    spec = Spec(args.students, args.courses, args.assignments, args.seed, submissions=not args.no_submissions)
+    rows = write(out, args.format, spec, shards=args.shards, jobs=args.jobs)
+    print(f"Wrote: {out} rows={rows} ({args.format}, shards={args.shards}, jobs={args.jobs}) "
+          f"in {time.perf_counter() - t0:.1f}s")
 
 
 if __name__ == "__main__":
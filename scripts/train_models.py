@@ -0,0 +1,73 @@
+"""
+Trains the grade models offline and publishes a versioned artifact the API loads
+(artifacts/models/<version>/ + artifacts/models/LATEST). A running API picks it
+up on its next reload poll, or immediately via POST /admin/reload.
+
+Global and per-course models are trained in parallel processes (--jobs). With
+--warm-start the latest artifact's forests keep their trees and grow by
+--add-trees fitted on the current data, e.g. after a new term is added.
+
+Usage:
+    python scripts/train_models.py [--data data/synthetic_course_data.csv] [--artifacts artifacts]
+        [--scope global|course|both] [--courses C1 C2] [--trees 400] [--jobs 4]
+        [--warm-start --add-trees 50] [--leaf-dtype float32|uint16] [--prune-tol 0] [--force]
+
+The API serves the compact export (models/<version>/forest/): float32 thresholds
+(exact), float32 leaves by default; uint16 leaves and --prune-tol trade a little
+accuracy for size (see scripts/benchmark_artifacts.py).
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.forest_engine import LEAF_DTYPES  # noqa: E402
+from backend.app.services.training import SCOPES, run_pipeline  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", type=Path, default=Path("data/synthetic_course_data.csv"))
+    ap.add_argument("--artifacts", type=Path, default=Path("artifacts"))
+    ap.add_argument("--scope", choices=SCOPES, default="global")
+    ap.add_argument("--courses", nargs="+", default=None, help="per-course models only for these courses")
+    ap.add_argument("--trees", type=int, default=400)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--warm-start", action="store_true")
+    ap.add_argument("--add-trees", type=int, default=50)
+    ap.add_argument("--leaf-dtype", choices=LEAF_DTYPES, default="float32")
+    ap.add_argument("--prune-tol", type=float, default=0.0, help="merge sibling leaves within this many grade points")
+    ap.add_argument("--force", action="store_true", help="retrain even if data and settings are unchanged")
+    args = ap.parse_args()
+
+    meta = run_pipeline(
+        data_path=args.data,
+        artifacts_dir=args.artifacts,
+        scope=args.scope,
+        courses=args.courses,
+        trees=args.trees,
+        warm_start=args.warm_start,
+        add_trees=args.add_trees,
+        jobs=args.jobs,
+        force=args.force,
+        leaf_dtype=args.leaf_dtype,
+        prune_tol=args.prune_tol,
+    )
+    if meta.get("skipped"):
+        print(f"Up to date: {meta['version']} (data hash {meta['data_hash']}); use --force to retrain")
+        return
+    print(f"Published {meta['version']} in {meta['total_seconds']:.1f}s (rows={meta['rows']}, jobs={meta['jobs']})")
+    for name, m in meta["models"].items():
+        print(f"  {name}: {json.dumps(m)}")
+    export = meta["export"]
+    print(f"  export: compact {export['compact_bytes'] / 1e6:.1f}MB ({export['leaf_dtype']} leaves), "
+          f"pickle {export['pickle_bytes'] / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
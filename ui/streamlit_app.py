@@ -25,6 +25,7 @@ with tab_chat:
 
     if "history" not in st.session_state:
         st.session_state.history = []
+        st.session_state.session_id = None
 
     for msg in st.session_state.history:
         with st.chat_message(msg["role"]):
@@ -36,15 +37,16 @@ with tab_chat:
         with st.chat_message("user"):
             st.markdown(user_msg)
 
-        payload = {
-            "teacher_id": teacher_id,
-            "course_id": course_id,
-            "message": user_msg,
-            "history": [{"role": m["role"], "content": m["content"]} for m in st.session_state.history[-8:]],
-        }
+        # The server keeps the conversation context; history only goes with the first request
+        payload = {"teacher_id": teacher_id, "course_id": course_id, "message": user_msg}
+        if st.session_state.session_id:
+            payload["session_id"] = st.session_state.session_id
+        else:
+            payload["history"] = [{"role": m["role"], "content": m["content"]} for m in st.session_state.history[-9:-1]]
         r = requests.post(f"{API_BASE}/chat", json=payload, timeout=30)
         r.raise_for_status()
         resp = r.json()
+        st.session_state.session_id = resp.get("session_id")
 
         st.session_state.history.append({"role": "assistant", "content": resp["answer"]})
         with st.chat_message("assistant"):